@@ -1,3 +1,4 @@
+DROP TABLE IF EXISTS "SkuSecuencias";
 DROP TABLE IF EXISTS "DetallesVenta";
 DROP TABLE IF EXISTS "Ventas";
 DROP TABLE IF EXISTS "MovimientosInventario";
@@ -67,4 +68,11 @@ CREATE TABLE "MovimientosInventario" (
   "ubicacion_id" INT REFERENCES "Ubicaciones"("ubicacion_id")
 );
 
+-- Índice para la paginación por clave de la GUI
+\ir migracion_relacional_01_indice_paginacion.sql
+-- Búsqueda por nombre o SKU con índices de trigramas
+\ir migracion_relacional_02_busqueda_trigram.sql
+-- Contadores de SKU por fabricante y categoría
+\ir migracion_relacional_03_secuencias_sku.sql
+
 \echo "Script crear_base_relacional.sql ejecutado con éxito."
@@ -1,3 +1,9 @@
+DROP TABLE IF EXISTS "saldo_stock_archivado";
+DROP TABLE IF EXISTS "resumen_meses_pendientes";
+DROP TABLE IF EXISTS "version_datos";
+DROP TABLE IF EXISTS "resumen_control";
+DROP TABLE IF EXISTS "resumen_stock_diario";
+DROP TABLE IF EXISTS "resumen_ventas_mensual";
 DROP TABLE IF EXISTS "hechos_stock";
 DROP TABLE IF EXISTS "hechos_ventas";
 DROP TABLE IF EXISTS "productos";
@@ -47,25 +53,32 @@ CREATE TABLE "productos" (
   "ubicacion_fk" INTEGER REFERENCES "ubicaciones"("ubicacion_id")
 );
 
+-- Las tablas de hechos están particionadas por año sobre `fecha` (ver migracion_v2_03_particiones.sql).
+-- Aquí solo se crea la partición DEFAULT; las anuales las crea el generador (src/inserts.py) o
+-- src/particiones.py. La llave primaria incluye la fecha porque es la columna de partición.
 CREATE TABLE "hechos_ventas" (
-  "venta_id" SERIAL PRIMARY KEY,
+  "venta_id" SERIAL,
   "nro_boleta" INTEGER NOT NULL,
   "producto_fk" INTEGER NOT NULL REFERENCES "productos"("producto_id"),
   "fecha" TIMESTAMP NOT NULL,
   "cliente_fk" INTEGER REFERENCES "cliente"("cliente_id"),
   "cantidad" INTEGER NOT NULL,
   "costo_unitario" NUMERIC(12, 2) NOT NULL, -- Se mantienen NUMERIC
-  "total_venta" NUMERIC(14, 2) NOT NULL     -- Se mantienen NUMERIC
-);
+  "total_venta" NUMERIC(14, 2) NOT NULL,    -- Se mantienen NUMERIC
+  PRIMARY KEY ("venta_id", "fecha")
+) PARTITION BY RANGE ("fecha");
+CREATE TABLE "hechos_ventas_default" PARTITION OF "hechos_ventas" DEFAULT;
 
 CREATE TABLE "hechos_stock" (
-  "movimiento_id" SERIAL PRIMARY KEY,
+  "movimiento_id" SERIAL,
   "producto_fk" INTEGER NOT NULL REFERENCES "productos"("producto_id"),
   "fecha" TIMESTAMP NOT NULL,
   "ubicacion_fk" INTEGER REFERENCES "ubicaciones"("ubicacion_id"),
   "tipo_movimiento_fk" SMALLINT NOT NULL REFERENCES "dim_movimiento"("id"), -- FK a 'id' de dim_movimiento
-  "cantidad" INTEGER NOT NULL
-);
+  "cantidad" INTEGER NOT NULL,
+  PRIMARY KEY ("movimiento_id", "fecha")
+) PARTITION BY RANGE ("fecha");
+CREATE TABLE "hechos_stock_default" PARTITION OF "hechos_stock" DEFAULT;
 
 INSERT INTO
   "dim_movimiento" (tipo_movimiento, descripcion_movimiento)
@@ -77,5 +90,15 @@ VALUES
   ('AJUSTE_INV_NEG', 'Ajuste de Inventario Negativo')
 ON CONFLICT (tipo_movimiento) DO NOTHING; -- Conflicto sobre el código UNIQUE, no sobre el ID serial
 
+-- Índices de fechas y llaves foráneas de los hechos
+\ir migracion_v2_01_indices_fechas.sql
+-- Tablas de resumen mensual/diario para los análisis
+\ir migracion_v2_02_resumenes.sql
+-- Contadores de versión de los datos (caché de resultados y refresco de resúmenes)
+\ir migracion_v2_04_version_datos.sql
+-- Meses de hechos modificados o borrados, para el refresco de resúmenes
+\ir migracion_v2_05_meses_pendientes.sql
+-- Saldo de stock de los años separados, para el stock de apertura de los años siguientes
+\ir migracion_v2_06_saldo_stock_archivado.sql
 
 \echo "Script crear_base_v2 (con RUT y nombres corregidos) ejecutado."
@@ -0,0 +1,11 @@
+-- Índice para la paginación por clave de la tabla de productos (crear_base_relacional.sql).
+-- La GUI pide cada página con (nombre, producto_id) > (cursor) ORDER BY nombre, producto_id LIMIT n,
+-- así que con este índice la página N cuesta lo mismo que la primera; con OFFSET había que
+-- recorrer y descartar todas las filas anteriores.
+-- Se puede aplicar sobre una base existente: psql -d lubricentro_db -f sql/migracion_relacional_01_indice_paginacion.sql
+
+CREATE INDEX IF NOT EXISTS "idx_productos_nombre_id" ON "Productos" ("nombre", "producto_id");
+
+ANALYZE "Productos";
+
+\echo "Migración relacional_01 (índice de paginación de productos) ejecutada."
@@ -0,0 +1,21 @@
+-- Búsqueda de productos por nombre o SKU insensible a acentos, servida por índices de trigramas.
+-- unaccent() no es IMMUTABLE (depende del diccionario configurado), así que no se puede usar en un
+-- índice de expresión. f_unaccent() fija el diccionario y se declara IMMUTABLE; las consultas de
+-- src/queries_relacional.py filtran con f_unaccent(columna) ILIKE f_unaccent('%término%'), que
+-- los índices GIN con gin_trgm_ops resuelven sin recorrer toda la tabla.
+-- Se puede aplicar sobre una base existente: psql -d lubricentro_db -f sql/migracion_relacional_02_busqueda_trigram.sql
+
+CREATE EXTENSION IF NOT EXISTS unaccent;
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+CREATE OR REPLACE FUNCTION f_unaccent(text)
+RETURNS text
+LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT
+AS $$ SELECT public.unaccent('public.unaccent'::regdictionary, $1) $$;
+
+CREATE INDEX IF NOT EXISTS "idx_productos_nombre_trgm" ON "Productos" USING gin (f_unaccent("nombre") gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS "idx_productos_sku_trgm" ON "Productos" USING gin (f_unaccent("sku") gin_trgm_ops);
+
+ANALYZE "Productos";
+
+\echo "Migración relacional_02 (búsqueda por trigramas) ejecutada."
@@ -0,0 +1,30 @@
+-- Contadores de SKU por (fabricante, categoría) para la base relacional (crear_base_relacional.sql).
+-- Los SKU tienen la forma FAB-CAT-0001. En vez de buscar el último SKU de la combinación y sumarle
+-- uno en Python (dos usuarios podían obtener el mismo), el número se reserva con
+-- INSERT ... ON CONFLICT DO UPDATE ... RETURNING sobre esta tabla, en la misma sentencia que inserta
+-- el producto (ver INSERT_PRODUCT_WITH_SKU_SQL en src/queries_relacional.py). La fila del contador
+-- queda bloqueada hasta el fin de la transacción, así que dos inserciones concurrentes nunca
+-- reciben el mismo número.
+-- Se puede aplicar sobre una base existente: psql -d lubricentro_db -f sql/migracion_relacional_03_secuencias_sku.sql
+
+CREATE TABLE IF NOT EXISTS "SkuSecuencias" (
+  "fabricante_id" INT NOT NULL REFERENCES "Fabricantes"("fabricante_id"),
+  "categoria_id" INT NOT NULL REFERENCES "Categorias"("categoria_id"),
+  "ultimo" INT NOT NULL DEFAULT 0,
+  PRIMARY KEY ("fabricante_id", "categoria_id")
+);
+
+-- Productos por combinación de fabricante y categoría (inicialización de los contadores, reportes)
+CREATE INDEX IF NOT EXISTS "idx_productos_fabricante_categoria" ON "Productos" ("fabricante_id", "categoria_id");
+
+-- En una base con productos, los contadores parten desde el mayor número de SKU existente
+INSERT INTO "SkuSecuencias" ("fabricante_id", "categoria_id", "ultimo")
+SELECT "fabricante_id", "categoria_id", MAX(SUBSTRING("sku" FROM '-([0-9]+)$')::INT)
+FROM "Productos"
+WHERE "fabricante_id" IS NOT NULL AND "categoria_id" IS NOT NULL AND "sku" ~ '-[0-9]+$'
+GROUP BY "fabricante_id", "categoria_id"
+ON CONFLICT ("fabricante_id", "categoria_id") DO UPDATE SET "ultimo" = GREATEST("SkuSecuencias"."ultimo", EXCLUDED."ultimo");
+
+ANALYZE "Productos";
+
+\echo "Migración relacional_03 (secuencias de SKU) ejecutada."
@@ -0,0 +1,22 @@
+-- Índices para el esquema estrella (crear_basev2.sql).
+-- Las consultas de src/queries.py filtran por fecha >= inicio AND fecha < fin, así que
+-- un informe de un año solo recorre las filas de ese año aunque haya muchos años de historia.
+-- Se puede aplicar sobre una base existente: psql -d lubricentro_db -f sql/migracion_v2_01_indices_fechas.sql
+
+-- B-tree sobre fecha: el generador (src/inserts.py) inserta fechas desordenadas, por lo que
+-- un índice BRIN no serviría. Si los hechos se cargan en orden cronológico, un
+-- "USING brin (fecha)" ocupa una fracción del espacio y sirve igual para rangos por año.
+CREATE INDEX IF NOT EXISTS "idx_hechos_ventas_fecha" ON "hechos_ventas" ("fecha");
+CREATE INDEX IF NOT EXISTS "idx_hechos_stock_fecha" ON "hechos_stock" ("fecha");
+
+-- Llaves foráneas usadas en los JOIN con las dimensiones
+CREATE INDEX IF NOT EXISTS "idx_hechos_ventas_producto" ON "hechos_ventas" ("producto_fk");
+CREATE INDEX IF NOT EXISTS "idx_hechos_ventas_cliente" ON "hechos_ventas" ("cliente_fk");
+CREATE INDEX IF NOT EXISTS "idx_hechos_stock_producto" ON "hechos_stock" ("producto_fk");
+CREATE INDEX IF NOT EXISTS "idx_hechos_stock_tipo_movimiento" ON "hechos_stock" ("tipo_movimiento_fk");
+CREATE INDEX IF NOT EXISTS "idx_productos_categoria" ON "productos" ("categoria_fk");
+
+ANALYZE "hechos_ventas";
+ANALYZE "hechos_stock";
+
+\echo "Migración v2_01 (índices de fechas y llaves foráneas) ejecutada."
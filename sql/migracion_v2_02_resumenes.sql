@@ -0,0 +1,39 @@
+-- Tablas de resumen del esquema estrella, leídas por los análisis de src/analysis.py.
+-- Se mantienen con src/resumenes.py (refrescar_resumenes), que solo recalcula los meses
+-- que recibieron hechos nuevos desde el último refresco.
+-- Se puede aplicar sobre una base existente: psql -d lubricentro_db -f sql/migracion_v2_02_resumenes.sql
+
+-- Ventas agregadas por (mes, producto, cliente). La categoría se obtiene del producto al consultar.
+CREATE TABLE IF NOT EXISTS "resumen_ventas_mensual" (
+  "mes" DATE NOT NULL,                       -- primer día del mes
+  "producto_fk" INTEGER NOT NULL,
+  "cliente_fk" INTEGER,                      -- NULL para ventas sin cliente
+  "cantidad" BIGINT NOT NULL,
+  "total_venta" NUMERIC(18, 2) NOT NULL,
+  "n_ventas" INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS "idx_resumen_ventas_mensual_mes" ON "resumen_ventas_mensual" ("mes");
+
+-- Movimientos de stock agregados por (día, producto, tipo de movimiento).
+-- Se guarda por día porque la evolución de stock se grafica por día; la distribución
+-- mensual se obtiene agrupando estos días.
+CREATE TABLE IF NOT EXISTS "resumen_stock_diario" (
+  "dia" DATE NOT NULL,
+  "producto_fk" INTEGER NOT NULL,
+  "tipo_movimiento_fk" SMALLINT NOT NULL,
+  "cantidad" BIGINT NOT NULL,
+  "n_movimientos" INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS "idx_resumen_stock_diario_dia" ON "resumen_stock_diario" ("dia");
+
+-- Último id de cada tabla de hechos ya incorporado a los resúmenes.
+-- Con 0 el primer refresco recalcula toda la historia.
+CREATE TABLE IF NOT EXISTS "resumen_control" (
+  "tabla_hechos" VARCHAR(50) PRIMARY KEY,
+  "ultimo_id" BIGINT NOT NULL DEFAULT 0
+);
+INSERT INTO "resumen_control" (tabla_hechos, ultimo_id)
+VALUES ('hechos_ventas', 0), ('hechos_stock', 0)
+ON CONFLICT (tabla_hechos) DO NOTHING;
+
+\echo "Migración v2_02 (tablas de resumen) ejecutada."
@@ -0,0 +1,83 @@
+-- Particionamiento por año de las tablas de hechos del esquema estrella (crear_basev2.sql).
+-- hechos_ventas y hechos_stock pasan a ser tablas particionadas por rango de `fecha`, con una
+-- partición por año (hechos_ventas_2024, ...) y una partición DEFAULT para fechas sin partición.
+-- Las consultas de src/queries.py que filtran por fecha >= inicio AND fecha < fin leen solo la
+-- partición del año, y un año viejo se archiva o elimina separando su partición (src/particiones.py)
+-- en lugar de con un DELETE masivo.
+-- La llave primaria pasa a ser (id, fecha), porque en una tabla particionada debe incluir la columna
+-- de partición. Los id siguen saliendo de la misma secuencia, así que resumen_control y
+-- MAX_VENTA_ID_SQL / MAX_MOVIMIENTO_ID_SQL siguen funcionando igual.
+-- Se puede aplicar sobre una base existente: psql -d lubricentro_db -f sql/migracion_v2_03_particiones.sql
+-- Si las tablas ya están particionadas no hace nada. Copia todas las filas: en tablas grandes conviene
+-- ejecutarla en una ventana de mantenimiento.
+
+DO $$
+DECLARE
+  anio INTEGER;
+BEGIN
+  IF EXISTS (SELECT 1 FROM pg_class WHERE relname = 'hechos_ventas' AND relkind = 'r') THEN
+    -- La secuencia se conserva: deja de pertenecer a la tabla antigua para no borrarse con ella
+    ALTER SEQUENCE "hechos_ventas_venta_id_seq" OWNED BY NONE;
+    ALTER TABLE "hechos_ventas" RENAME TO "hechos_ventas_sin_particionar";
+    ALTER TABLE "hechos_ventas_sin_particionar" RENAME CONSTRAINT "hechos_ventas_pkey" TO "hechos_ventas_sin_particionar_pkey";
+    DROP INDEX IF EXISTS "idx_hechos_ventas_fecha", "idx_hechos_ventas_producto", "idx_hechos_ventas_cliente";
+
+    CREATE TABLE "hechos_ventas" (
+      "venta_id" INTEGER NOT NULL DEFAULT nextval('hechos_ventas_venta_id_seq'),
+      "nro_boleta" INTEGER NOT NULL,
+      "producto_fk" INTEGER NOT NULL REFERENCES "productos"("producto_id"),
+      "fecha" TIMESTAMP NOT NULL,
+      "cliente_fk" INTEGER REFERENCES "cliente"("cliente_id"),
+      "cantidad" INTEGER NOT NULL,
+      "costo_unitario" NUMERIC(12, 2) NOT NULL,
+      "total_venta" NUMERIC(14, 2) NOT NULL,
+      PRIMARY KEY ("venta_id", "fecha")
+    ) PARTITION BY RANGE ("fecha");
+    CREATE TABLE "hechos_ventas_default" PARTITION OF "hechos_ventas" DEFAULT;
+
+    FOR anio IN SELECT DISTINCT EXTRACT(YEAR FROM fecha)::INTEGER FROM "hechos_ventas_sin_particionar" LOOP
+      EXECUTE format('CREATE TABLE %I PARTITION OF "hechos_ventas" FOR VALUES FROM (%L) TO (%L)',
+                     'hechos_ventas_' || anio, make_date(anio, 1, 1), make_date(anio + 1, 1, 1));
+    END LOOP;
+
+    INSERT INTO "hechos_ventas" SELECT * FROM "hechos_ventas_sin_particionar";
+    DROP TABLE "hechos_ventas_sin_particionar";
+    ALTER SEQUENCE "hechos_ventas_venta_id_seq" OWNED BY "hechos_ventas"."venta_id";
+    RAISE NOTICE 'hechos_ventas particionada por año.';
+  END IF;
+
+  IF EXISTS (SELECT 1 FROM pg_class WHERE relname = 'hechos_stock' AND relkind = 'r') THEN
+    ALTER SEQUENCE "hechos_stock_movimiento_id_seq" OWNED BY NONE;
+    ALTER TABLE "hechos_stock" RENAME TO "hechos_stock_sin_particionar";
+    ALTER TABLE "hechos_stock_sin_particionar" RENAME CONSTRAINT "hechos_stock_pkey" TO "hechos_stock_sin_particionar_pkey";
+    DROP INDEX IF EXISTS "idx_hechos_stock_fecha", "idx_hechos_stock_producto", "idx_hechos_stock_tipo_movimiento";
+
+    CREATE TABLE "hechos_stock" (
+      "movimiento_id" INTEGER NOT NULL DEFAULT nextval('hechos_stock_movimiento_id_seq'),
+      "producto_fk" INTEGER NOT NULL REFERENCES "productos"("producto_id"),
+      "fecha" TIMESTAMP NOT NULL,
+      "ubicacion_fk" INTEGER REFERENCES "ubicaciones"("ubicacion_id"),
+      "tipo_movimiento_fk" SMALLINT NOT NULL REFERENCES "dim_movimiento"("id"),
+      "cantidad" INTEGER NOT NULL,
+      PRIMARY KEY ("movimiento_id", "fecha")
+    ) PARTITION BY RANGE ("fecha");
+    CREATE TABLE "hechos_stock_default" PARTITION OF "hechos_stock" DEFAULT;
+
+    FOR anio IN SELECT DISTINCT EXTRACT(YEAR FROM fecha)::INTEGER FROM "hechos_stock_sin_particionar" LOOP
+      EXECUTE format('CREATE TABLE %I PARTITION OF "hechos_stock" FOR VALUES FROM (%L) TO (%L)',
+                     'hechos_stock_' || anio, make_date(anio, 1, 1), make_date(anio + 1, 1, 1));
+    END LOOP;
+
+    INSERT INTO "hechos_stock" SELECT * FROM "hechos_stock_sin_particionar";
+    DROP TABLE "hechos_stock_sin_particionar";
+    ALTER SEQUENCE "hechos_stock_movimiento_id_seq" OWNED BY "hechos_stock"."movimiento_id";
+    RAISE NOTICE 'hechos_stock particionada por año.';
+  END IF;
+END
+$$;
+
+-- Los índices de fechas y llaves foráneas se crean sobre las tablas particionadas y cada partición
+-- (actual o futura) recibe el suyo
+\ir migracion_v2_01_indices_fechas.sql
+
+\echo "Migración v2_03 (particiones anuales de hechos_ventas y hechos_stock) ejecutada."
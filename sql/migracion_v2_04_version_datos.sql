@@ -0,0 +1,43 @@
+-- Versión de los datos del esquema estrella, para la caché de resultados (src/cache_resultados.py)
+-- y para saltarse el refresco de resúmenes cuando los hechos no cambiaron (src/resumenes.py).
+-- Cada sentencia que inserta, modifica, borra o trunca una de las tablas de abajo incrementa su
+-- contador en "version_datos" mediante un trigger por sentencia (no por fila), así que una carga con
+-- COPY de millones de filas cuesta un solo UPDATE. El contador se bloquea hasta el COMMIT: dos
+-- transacciones que escriben la misma tabla se esperan al actualizarlo.
+-- Aplicar después de migracion_v2_03_particiones.sql (que recrea las tablas de hechos).
+-- Se puede aplicar sobre una base existente: psql -d lubricentro_db -f sql/migracion_v2_04_version_datos.sql
+
+CREATE TABLE IF NOT EXISTS "version_datos" (
+  "tabla" VARCHAR(50) PRIMARY KEY,
+  "version" BIGINT NOT NULL DEFAULT 0
+);
+
+CREATE OR REPLACE FUNCTION incrementar_version_datos() RETURNS trigger AS $$
+BEGIN
+  UPDATE "version_datos" SET "version" = "version" + 1 WHERE "tabla" = TG_TABLE_NAME;
+  RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+
+-- Hechos, dimensiones y resúmenes: todo lo que leen las consultas de src/queries.py
+DO $$
+DECLARE
+  nombre_tabla TEXT;
+BEGIN
+  FOREACH nombre_tabla IN ARRAY ARRAY['hechos_ventas', 'hechos_stock', 'productos', 'cliente', 'categorias',
+                               'fabricantes', 'ubicaciones', 'dim_movimiento',
+                               'resumen_ventas_mensual', 'resumen_stock_diario'] LOOP
+    INSERT INTO "version_datos" ("tabla") VALUES (nombre_tabla) ON CONFLICT ("tabla") DO NOTHING;
+    EXECUTE format('DROP TRIGGER IF EXISTS %I ON %I', 'trg_version_datos_' || nombre_tabla, nombre_tabla);
+    EXECUTE format('CREATE TRIGGER %I AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON %I '
+                   'FOR EACH STATEMENT EXECUTE FUNCTION incrementar_version_datos()',
+                   'trg_version_datos_' || nombre_tabla, nombre_tabla);
+  END LOOP;
+END
+$$;
+
+-- Versión de hechos_ventas / hechos_stock con la que se hizo el último refresco de resúmenes.
+-- Si no cambió desde entonces, src/resumenes.py no lee las tablas de hechos.
+ALTER TABLE "resumen_control" ADD COLUMN IF NOT EXISTS "version_datos" BIGINT NOT NULL DEFAULT -1;
+
+\echo "Migración v2_04 (versión de los datos para la caché de resultados) ejecutada."
@@ -0,0 +1,72 @@
+-- Meses de los hechos que cambiaron desde el último refresco de resúmenes (src/resumenes.py).
+-- El refresco incremental por id (resumen_control.ultimo_id) solo ve filas nuevas con id mayor al
+-- último procesado: no ve un UPDATE, un DELETE ni un id menor que se confirma tarde desde otra
+-- transacción. Estos triggers por sentencia anotan el mes de cada fila insertada, modificada (mes
+-- anterior y nuevo) o borrada, leyendo las tablas de transición; un TRUNCATE anota mes NULL, que
+-- pide reconstruir todo el resumen. refrescar_resumenes consume las filas en su transacción.
+-- Aplicar después de migracion_v2_03_particiones.sql (los triggers van sobre las tablas particionadas)
+-- y de migracion_v2_04_version_datos.sql.
+-- Se puede aplicar sobre una base existente: psql -d lubricentro_db -f sql/migracion_v2_05_meses_pendientes.sql
+
+DO $$
+BEGIN
+  IF to_regclass('resumen_meses_pendientes') IS NULL THEN
+    CREATE TABLE "resumen_meses_pendientes" (
+      "tabla_hechos" VARCHAR(50) NOT NULL,
+      "mes" DATE -- primer día del mes; NULL = reconstruir todo el resumen
+    );
+    -- En una base existente los resúmenes pueden tener cambios anteriores sin aplicar: el primer
+    -- refresco los reconstruye completos
+    INSERT INTO "resumen_meses_pendientes" VALUES ('hechos_ventas', NULL), ('hechos_stock', NULL);
+    UPDATE "resumen_control" SET "version_datos" = -1;
+  END IF;
+END
+$$;
+
+CREATE OR REPLACE FUNCTION registrar_meses_pendientes() RETURNS trigger AS $$
+BEGIN
+  IF TG_OP = 'TRUNCATE' THEN
+    INSERT INTO "resumen_meses_pendientes" VALUES (TG_TABLE_NAME, NULL);
+  ELSIF TG_OP = 'INSERT' THEN
+    INSERT INTO "resumen_meses_pendientes"
+    SELECT DISTINCT TG_TABLE_NAME, DATE_TRUNC('month', fecha)::DATE FROM filas_nuevas;
+  ELSIF TG_OP = 'UPDATE' THEN
+    INSERT INTO "resumen_meses_pendientes"
+    SELECT TG_TABLE_NAME, DATE_TRUNC('month', fecha)::DATE FROM filas_nuevas
+    UNION
+    SELECT TG_TABLE_NAME, DATE_TRUNC('month', fecha)::DATE FROM filas_viejas;
+  ELSE
+    INSERT INTO "resumen_meses_pendientes"
+    SELECT DISTINCT TG_TABLE_NAME, DATE_TRUNC('month', fecha)::DATE FROM filas_viejas;
+  END IF;
+  RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+
+-- Una tabla de transición solo se permite en triggers de un único evento: un trigger por operación
+DO $$
+DECLARE
+  nombre_tabla TEXT;
+BEGIN
+  FOREACH nombre_tabla IN ARRAY ARRAY['hechos_ventas', 'hechos_stock'] LOOP
+    EXECUTE format('DROP TRIGGER IF EXISTS %I ON %I', 'trg_meses_insert_' || nombre_tabla, nombre_tabla);
+    EXECUTE format('CREATE TRIGGER %I AFTER INSERT ON %I REFERENCING NEW TABLE AS filas_nuevas '
+                   'FOR EACH STATEMENT EXECUTE FUNCTION registrar_meses_pendientes()',
+                   'trg_meses_insert_' || nombre_tabla, nombre_tabla);
+    EXECUTE format('DROP TRIGGER IF EXISTS %I ON %I', 'trg_meses_update_' || nombre_tabla, nombre_tabla);
+    EXECUTE format('CREATE TRIGGER %I AFTER UPDATE ON %I REFERENCING OLD TABLE AS filas_viejas NEW TABLE AS filas_nuevas '
+                   'FOR EACH STATEMENT EXECUTE FUNCTION registrar_meses_pendientes()',
+                   'trg_meses_update_' || nombre_tabla, nombre_tabla);
+    EXECUTE format('DROP TRIGGER IF EXISTS %I ON %I', 'trg_meses_delete_' || nombre_tabla, nombre_tabla);
+    EXECUTE format('CREATE TRIGGER %I AFTER DELETE ON %I REFERENCING OLD TABLE AS filas_viejas '
+                   'FOR EACH STATEMENT EXECUTE FUNCTION registrar_meses_pendientes()',
+                   'trg_meses_delete_' || nombre_tabla, nombre_tabla);
+    EXECUTE format('DROP TRIGGER IF EXISTS %I ON %I', 'trg_meses_truncate_' || nombre_tabla, nombre_tabla);
+    EXECUTE format('CREATE TRIGGER %I AFTER TRUNCATE ON %I '
+                   'FOR EACH STATEMENT EXECUTE FUNCTION registrar_meses_pendientes()',
+                   'trg_meses_truncate_' || nombre_tabla, nombre_tabla);
+  END LOOP;
+END
+$$;
+
+\echo "Migración v2_05 (meses pendientes de los resúmenes) ejecutada."
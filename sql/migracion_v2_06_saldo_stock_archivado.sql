@@ -0,0 +1,15 @@
+-- Saldo de stock de los años de hechos_stock separados o eliminados con src/particiones.py.
+-- Al separar un año, sus días salen de resumen_stock_diario, pero el stock de apertura de los años
+-- siguientes (STOCK_EVOLUCION_SQL en src/queries.py) sigue necesitando sus movimientos: aquí queda
+-- la suma de las cantidades del año por producto, que se arrastra a todos los años posteriores.
+-- Adjuntar de nuevo el año borra su fila y vuelve a agregar sus días al resumen.
+-- Se puede aplicar sobre una base existente: psql -d lubricentro_db -f sql/migracion_v2_06_saldo_stock_archivado.sql
+
+CREATE TABLE IF NOT EXISTS "saldo_stock_archivado" (
+  "anio" INTEGER NOT NULL,
+  "producto_fk" INTEGER NOT NULL,
+  "cantidad" BIGINT NOT NULL, -- suma con signo de los movimientos del año
+  PRIMARY KEY ("anio", "producto_fk")
+);
+
+\echo "Migración v2_06 (saldo de stock de los años archivados) ejecutada."
@@ -1,5 +1,5 @@
 import pandas as pd
-from src.database import execute_query
+from src.database import execute_query, execute_query_streamed
 from src.queries import (
     VENTAS_POR_MES_SQL,
     TOP_PRODUCTOS_CANTIDAD_SQL,
@@ -7,7 +7,9 @@ from src.queries import (
     STOCK_EVOLUCION_SQL,
     DISTRIBUCION_TIPOS_MOVIMIENTO_SQL,
     MAS_VENDIDO_FECHA_SQL,
-    VENTAS_POR_CLIENTE_SQL
+    VENTAS_POR_CLIENTE_SQL,
+    VENTAS_ANUALES_DETALLE_SQL,
+    STOCK_ANUAL_DETALLE_SQL
 )
 from src.plotting import (
     graficar_ventas_por_mes,
@@ -16,24 +18,63 @@ from src.plotting import (
     graficar_evolucion_stock,
     graficar_distribucion_tipos_movimiento,
     graficar_top_productos_rango,
-    graficar_ventas_por_cliente
+    graficar_ventas_por_cliente,
+    graficar_comparacion_ventas_por_mes,
+    graficar_comparacion_ventas_por_categoria,
+    renderizar_en_paralelo
 )
 import src.config
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+
+def rango_anual(year: int) -> dict:
+    """
+    Parámetros [fecha_desde, fecha_hasta) que cubren el año completo, para las consultas por año.
+    """
+    return rango_años(year, year)
+
+def rango_años(año_inicio: int, año_fin: int) -> dict:
+    """
+    Parámetros [fecha_desde, fecha_hasta) que cubren desde el 1 de enero de `año_inicio`
+    hasta el 31 de diciembre de `año_fin`.
+    """
+    return {'fecha_desde': date(año_inicio, 1, 1), 'fecha_hasta': date(año_fin + 1, 1, 1)}
+
+# Análisis anuales: nombre -> (función de gráfico, plantilla del archivo de salida)
+GRAFICOS_ANUALES = {
+    'ventas_por_mes': (graficar_ventas_por_mes, "analisis_ventas_por_mes_{year}.png"),
+    'top_productos': (graficar_top_productos, "analisis_top_5_productos_vendidos_{year}.png"),
+    'ventas_por_categoria': (graficar_ventas_por_categoria, "analisis_ventas_por_categoria_{year}.png"),
+    'evolucion_stock': (graficar_evolucion_stock, "analisis_evolucion_stock_{year}.png"),
+    'distribucion_tipos_movimiento': (graficar_distribucion_tipos_movimiento, "analisis_distribucion_tipos_movimiento_{year}.png"),
+    'ventas_por_cliente': (graficar_ventas_por_cliente, "analisis_ventas_por_cliente_{year}.png"),
+}
+
+# Análisis que se pueden comparar entre años: nombre -> función de gráfico comparativo
+COMPARACIONES_ANUALES = {
+    'ventas_por_mes': graficar_comparacion_ventas_por_mes,
+    'ventas_por_categoria': graficar_comparacion_ventas_por_categoria,
+}
+
+def obtener_ventas_por_mes(year: int) -> pd.DataFrame | None:
+    """
+    Consulta las ventas por mes de un año con las columnas ya tipadas. None si la consulta falla.
+    """
+    df = execute_query(VENTAS_POR_MES_SQL, rango_anual(year), cacheable=True, columnar=True)
+    if df is not None and not df.empty:
+        df['mes'] = df['mes'].astype(int)
+    return df
 
 def analizar_ventas_por_mes(year: int):
     """
     Obtiene los datos de ventas por mes para un año y genera el gráfico.
     """
     print(f"\n--- Iniciando análisis: Ventas por Mes para el año {year} ---")
-    params = {'year': year}
-    print(f"DEBUG: params type: {type(params)}, value: {params}")
-    df = execute_query(VENTAS_POR_MES_SQL, params)
+    df = obtener_ventas_por_mes(year)
 
     if df is not None:
         if not df.empty:
-            df['mes'] = df['mes'].astype(int)
-            df['ventas_totales'] = pd.to_numeric(df['ventas_totales'])
-            filename = f"analisis_ventas_por_mes_{year}.png"
+            filename = GRAFICOS_ANUALES['ventas_por_mes'][1].format(year=year)
             graficar_ventas_por_mes(df, filename, year)
         else:
             print(f"INFO: No se encontraron datos de ventas por mes para el año {year}.")
@@ -41,19 +82,22 @@ def analizar_ventas_por_mes(year: int):
         print(f"ERROR: No se pudieron obtener los datos de ventas por mes para el año {year}.")
     print("--- Análisis: Ventas por Mes finalizado ---")
 
+def obtener_top_productos_vendidos(year: int) -> pd.DataFrame | None:
+    """
+    Consulta el top 5 de productos más vendidos de un año con las columnas ya tipadas.
+    """
+    return execute_query(TOP_PRODUCTOS_CANTIDAD_SQL, rango_anual(year), cacheable=True, columnar=True)
+
 def analizar_top_productos_vendidos(year: int):
     """
     Obtiene los datos del top 5 de productos más vendidos para un año y genera el gráfico.
     """
     print(f"\n--- Iniciando análisis: Top 5 Productos Vendidos para el año {year} ---")
-    params = {'year': year}
-    print(f"DEBUG: params type: {type(params)}, value: {params}")
-    df = execute_query(TOP_PRODUCTOS_CANTIDAD_SQL, params)
+    df = obtener_top_productos_vendidos(year)
 
     if df is not None:
         if not df.empty:
-            df['cantidad_total_vendida'] = pd.to_numeric(df['cantidad_total_vendida'])
-            filename = f"analisis_top_5_productos_vendidos_{year}.png"
+            filename = GRAFICOS_ANUALES['top_productos'][1].format(year=year)
             graficar_top_productos(df, filename, year)
         else:
             print(f"INFO: No se encontraron datos del top 5 de productos para el año {year}.")
@@ -61,19 +105,22 @@ def analizar_top_productos_vendidos(year: int):
         print(f"ERROR: No se pudieron obtener los datos del top 5 de productos para el año {year}.")
     print("--- Análisis: Top 5 Productos Vendidos finalizado ---")
 
+def obtener_ventas_por_categoria(year: int) -> pd.DataFrame | None:
+    """
+    Consulta las ventas por categoría de un año con las columnas ya tipadas.
+    """
+    return execute_query(VENTAS_POR_CATEGORIA_SQL, rango_anual(year), cacheable=True, columnar=True)
+
 def analizar_ventas_por_categoria(year: int):
     """
     Obtiene los datos de ventas por categoría de producto para un año y genera el gráfico.
     """
     print(f"\n--- Iniciando análisis: Ventas por Categoría para el año {year} ---")
-    params = {'year': year}
-    print(f"DEBUG: params type: {type(params)}, value: {params}")
-    df = execute_query(VENTAS_POR_CATEGORIA_SQL, params)
+    df = obtener_ventas_por_categoria(year)
 
     if df is not None:
         if not df.empty:
-            df['ventas_totales_categoria'] = pd.to_numeric(df['ventas_totales_categoria'])
-            filename = f"analisis_ventas_por_categoria_{year}.png"
+            filename = GRAFICOS_ANUALES['ventas_por_categoria'][1].format(year=year)
             graficar_ventas_por_categoria(df, filename, year)
         else:
             print(f"INFO: No se encontraron datos de ventas por categoría para el año {year}.")
@@ -81,20 +128,42 @@ def analizar_ventas_por_categoria(year: int):
         print(f"ERROR: No se pudieron obtener los datos de ventas por categoría para el año {year}.")
     print("--- Análisis: Ventas por Categoría finalizado ---")
 
+# Productos del gráfico de evolución de stock: los `top_n` con más movimiento (None = todos) entre
+# `productos` (lista de producto_id, None = todos). src/main.py la cambia con seleccionar_productos_stock.
+SELECCION_STOCK = {'top_n': src.config.STOCK_EVOLUCION_TOP_N or None, 'productos': None}
+
+def seleccionar_productos_stock(top_n: int | None = None, productos: list | None = None):
+    """
+    Define qué productos muestra la evolución de stock: `top_n` (0 o None = todos) y/o una lista de producto_id.
+    """
+    SELECCION_STOCK['top_n'] = top_n or None
+    SELECCION_STOCK['productos'] = list(productos) if productos else None
+
+def consultar_evolucion_stock(years: list) -> pd.DataFrame | None:
+    """
+    Lee por partes, en una sola consulta, el saldo diario de stock de los productos de SELECCION_STOCK
+    en cada año de `years` (columna `anio`); cada parte llega con las columnas ya tipadas (fecha como
+    datetime64, stock entero).
+    """
+    params = {'años': sorted(set(years)), **SELECCION_STOCK}
+    return execute_query_streamed(STOCK_EVOLUCION_SQL, params, cacheable=True, columnar=True)
+
+def obtener_evolucion_stock(year: int) -> pd.DataFrame | None:
+    """
+    Saldo diario de stock por producto de un año, partiendo del stock al 1 de enero.
+    """
+    return consultar_evolucion_stock([year])
+
 def analizar_evolucion_stock(year: int):
     """
     Obtiene los datos de evolución de stock por producto para un año y genera el gráfico.
     """
     print(f"\n--- Iniciando análisis: Evolución de Stock por Producto para el año {year} ---")
-    params = {'year': year}
-    print(f"DEBUG: params type: {type(params)}, value: {params}")
-    df = execute_query(STOCK_EVOLUCION_SQL, params)
+    df = obtener_evolucion_stock(year)
 
     if df is not None:
         if not df.empty:
-            df['variacion_stock'] = pd.to_numeric(df['variacion_stock'])
-            df['fecha'] = pd.to_datetime(df['fecha'])
-            filename = f"analisis_evolucion_stock_{year}.png"
+            filename = GRAFICOS_ANUALES['evolucion_stock'][1].format(year=year)
             graficar_evolucion_stock(df, filename, year)
         else:
             print(f"INFO: No se encontraron datos de evolución de stock para el año {year}.")
@@ -102,20 +171,22 @@ def analizar_evolucion_stock(year: int):
         print(f"ERROR: No se pudieron obtener los datos de evolución de stock para el año {year}.")
     print("--- Análisis: Evolución de Stock por Producto finalizado ---")
 
+def obtener_distribucion_tipos_movimiento(year: int) -> pd.DataFrame | None:
+    """
+    Consulta el total mensual por tipo de movimiento de stock de un año con las columnas ya tipadas.
+    """
+    return execute_query(DISTRIBUCION_TIPOS_MOVIMIENTO_SQL, rango_anual(year), cacheable=True, columnar=True)
+
 def analizar_distribucion_tipos_movimiento(year: int):
     """
     Obtiene los datos de distribución de tipos de movimiento de stock por mes para un año y genera el gráfico.
     """
     print(f"\n--- Iniciando análisis: Distribución de Tipos de Movimiento de Stock para el año {year} ---")
-    params = {'year': year}
-    print(f"DEBUG: params type: {type(params)}, value: {params}")
-    df = execute_query(DISTRIBUCION_TIPOS_MOVIMIENTO_SQL, params)
+    df = obtener_distribucion_tipos_movimiento(year)
 
     if df is not None:
         if not df.empty:
-            df['total_movimiento'] = pd.to_numeric(df['total_movimiento'])
-            df['mes'] = pd.to_datetime(df['mes'])
-            filename = f"analisis_distribucion_tipos_movimiento_{year}.png"
+            filename = GRAFICOS_ANUALES['distribucion_tipos_movimiento'][1].format(year=year)
             graficar_distribucion_tipos_movimiento(df, filename, year)
         else:
             print(f"INFO: No se encontraron datos de distribución de tipos de movimiento para el año {year}.")
@@ -170,12 +241,11 @@ def analizar_top_productos_vendidos_en_rango(year: int):
 
     print(f"Analizando productos más vendidos desde {fecha_inicio_str} hasta {fecha_fin_str}.")
 
-    params = {'fecha_inicio': fecha_inicio_str, 'fecha_fin': fecha_fin_str}
-    df = execute_query(MAS_VENDIDO_FECHA_SQL, params)
+    params = {'fecha_desde': fecha_inicio_dt.date(), 'fecha_hasta': fecha_fin_dt.date() + timedelta(days=1)}
+    df = execute_query(MAS_VENDIDO_FECHA_SQL, params, cacheable=True, columnar=True)
 
     if df is not None:
         if not df.empty:
-            df['total_vendido'] = pd.to_numeric(df['total_vendido'])
             if 'total_vendido' in df.columns and 'cantidad_total_vendida' not in df.columns:
                  df.rename(columns={'total_vendido': 'cantidad_total_vendida'}, inplace=True)
 
@@ -187,22 +257,176 @@ def analizar_top_productos_vendidos_en_rango(year: int):
         print(f"ERROR: No se pudieron obtener los datos de ventas en el rango {fecha_inicio_str} a {fecha_fin_str}.")
     print(f"--- Análisis: Top 10 Productos Vendidos en Rango ({fecha_inicio_str} a {fecha_fin_str}) finalizado ---")
 
+def obtener_ventas_por_cliente(year: int) -> pd.DataFrame | None:
+    """
+    Consulta el total de ventas por cliente de un año con las columnas ya tipadas.
+    """
+    return execute_query(VENTAS_POR_CLIENTE_SQL, rango_anual(year), cacheable=True, columnar=True)
+
 def analizar_ventas_por_cliente(year: int):
     """
     Obtiene el total de ventas por cliente para un año dado y genera el gráfico.
     """
     print(f"\n--- Iniciando análisis: Ventas por Cliente para el año {year} ---")
-    params = {'year': year}
-    print(f"DEBUG: params type: {type(params)}, value: {params}")
-    df = execute_query(VENTAS_POR_CLIENTE_SQL, params)
+    df = obtener_ventas_por_cliente(year)
 
     if df is not None:
         if not df.empty:
-            df['total_ventas'] = pd.to_numeric(df['total_ventas'])
-            filename = f"analisis_ventas_por_cliente_{year}.png"
+            filename = GRAFICOS_ANUALES['ventas_por_cliente'][1].format(year=year)
             graficar_ventas_por_cliente(df, filename, year)
         else:
             print(f"INFO: No se encontraron datos de ventas por cliente para el año {year}.")
     else:
         print(f"ERROR: No se pudieron obtener los datos de ventas por cliente para el año {year}.")
     print("--- Análisis: Ventas por Cliente finalizado ---")
+
+# Análisis anuales: nombre -> función que obtiene su DataFrame listo para graficar
+CONSULTAS_ANUALES = {
+    'ventas_por_mes': obtener_ventas_por_mes,
+    'top_productos': obtener_top_productos_vendidos,
+    'ventas_por_categoria': obtener_ventas_por_categoria,
+    'evolucion_stock': obtener_evolucion_stock,
+    'distribucion_tipos_movimiento': obtener_distribucion_tipos_movimiento,
+    'ventas_por_cliente': obtener_ventas_por_cliente,
+}
+
+def derivar_analisis_anuales(df_ventas: pd.DataFrame, df_stock: pd.DataFrame) -> dict:
+    """
+    Calcula en pandas cinco de los análisis anuales a partir de las ventas (VENTAS_ANUALES_DETALLE_SQL)
+    y los movimientos de stock (STOCK_ANUAL_DETALLE_SQL) de un año. La evolución de stock no se
+    deriva aquí porque necesita el stock anterior al año: la calcula STOCK_EVOLUCION_SQL.
+    Devuelve un dict nombre -> DataFrame con las mismas columnas que las consultas individuales.
+    """
+    resultados = {}
+
+    if df_ventas.empty:
+        for nombre in ('ventas_por_mes', 'top_productos', 'ventas_por_categoria', 'ventas_por_cliente'):
+            resultados[nombre] = pd.DataFrame()
+    else:
+        df_ventas = df_ventas.assign(mes=df_ventas['mes'].dt.month.astype(int))
+        resultados['ventas_por_mes'] = (
+            df_ventas.groupby('mes', as_index=False)['total_venta'].sum()
+            .rename(columns={'total_venta': 'ventas_totales'})
+        )
+        resultados['top_productos'] = (
+            df_ventas.groupby('nombre_articulo', as_index=False)['cantidad'].sum()
+            .rename(columns={'cantidad': 'cantidad_total_vendida'})
+            .nlargest(5, 'cantidad_total_vendida')
+        )
+        resultados['ventas_por_categoria'] = (
+            df_ventas.groupby('nombre_categoria', as_index=False)['total_venta'].sum()
+            .rename(columns={'total_venta': 'ventas_totales_categoria'})
+            .sort_values('ventas_totales_categoria', ascending=False)
+        )
+        resultados['ventas_por_cliente'] = (
+            df_ventas.dropna(subset=['nombre_cliente'])
+            .groupby('nombre_cliente', as_index=False)['total_venta'].sum()
+            .rename(columns={'total_venta': 'total_ventas'})
+            .sort_values('total_ventas', ascending=False)
+        )
+
+    if df_stock.empty:
+        resultados['distribucion_tipos_movimiento'] = pd.DataFrame()
+    else:
+        resultados['distribucion_tipos_movimiento'] = (
+            df_stock.assign(mes=df_stock['dia'].dt.to_period('M').dt.to_timestamp())
+            .groupby(['tipo_movimiento', 'mes'], as_index=False)['cantidad'].sum()
+            .rename(columns={'cantidad': 'total_movimiento'})
+            .sort_values(['mes', 'tipo_movimiento'])
+        )
+
+    return resultados
+
+def _obtener_datos_lote(years: list, hilos: ThreadPoolExecutor) -> dict | None:
+    """
+    Lee en paralelo las ventas, el stock y la evolución de stock de los años pedidos (una consulta
+    cada una que devuelve solo esos años, con los nombres de las dimensiones ya unidos), separa las
+    filas por año y deriva los análisis de cada año.
+    Devuelve un dict año -> {nombre del análisis -> DataFrame}.
+    """
+    params = {'años': sorted(set(years))}
+    futuro_ventas = hilos.submit(execute_query, VENTAS_ANUALES_DETALLE_SQL, params, cacheable=True, columnar=True)
+    futuro_stock = hilos.submit(execute_query, STOCK_ANUAL_DETALLE_SQL, params, cacheable=True, columnar=True)
+    futuro_evolucion = hilos.submit(consultar_evolucion_stock, years)
+    df_ventas, df_stock, df_evolucion = futuro_ventas.result(), futuro_stock.result(), futuro_evolucion.result()
+    if df_ventas is None or df_stock is None or df_evolucion is None:
+        print(f"ERROR: No se pudieron obtener las ventas o el stock de los años {years}.")
+        return None
+
+    ventas_por_año = dict(tuple(df_ventas.groupby(df_ventas['mes'].dt.year))) if not df_ventas.empty else {}
+    stock_por_año = dict(tuple(df_stock.groupby(df_stock['dia'].dt.year))) if not df_stock.empty else {}
+    evolucion_por_año = dict(tuple(df_evolucion.groupby('anio'))) if not df_evolucion.empty else {}
+    return {
+        year: {
+            **derivar_analisis_anuales(ventas_por_año.get(year, df_ventas.iloc[0:0]), stock_por_año.get(year, df_stock.iloc[0:0])),
+            'evolucion_stock': evolucion_por_año.get(year, df_evolucion.iloc[0:0])
+        }
+        for year in years
+    }
+
+def _tareas_graficos_anuales(datos: dict, year: int) -> list:
+    """
+    Arma las tareas de gráfico (graficar_*, args) de los análisis de un año, informando los que no tienen datos.
+    """
+    tareas = []
+    for nombre, df in datos.items():
+        graficar, plantilla = GRAFICOS_ANUALES[nombre]
+        if df is None:
+            print(f"ERROR: No se pudieron obtener los datos del análisis '{nombre}' para el año {year}.")
+        elif df.empty:
+            print(f"INFO: No se encontraron datos para el análisis '{nombre}' del año {year}.")
+        else:
+            tareas.append((graficar, (df, plantilla.format(year=year), year)))
+    return tareas
+
+def analizar_año(year: int, lote: bool = False, jobs: int = 1):
+    """
+    Genera los seis análisis anuales en dos fases: primero todas las consultas, en un pool
+    de `jobs` hilos, y luego todos los gráficos, en un pool de `jobs` procesos.
+    Con `lote` las consultas se reducen a una lectura de ventas y una de stock.
+    Los nombres de archivo son los de GRAFICOS_ANUALES, sin importar el orden en que terminen.
+    """
+    modo = "por lotes" if lote else "por consulta"
+    print(f"\n--- Iniciando análisis anuales ({modo}, {jobs} trabajos) para el año {year} ---")
+    with ThreadPoolExecutor(max_workers=jobs) as hilos:
+        if lote:
+            datos_por_año = _obtener_datos_lote([year], hilos)
+            if datos_por_año is None:
+                return
+            datos = datos_por_año[year]
+        else:
+            futuros = {nombre: hilos.submit(obtener, year) for nombre, obtener in CONSULTAS_ANUALES.items()}
+            datos = {nombre: futuro.result() for nombre, futuro in futuros.items()}
+
+    renderizar_en_paralelo(_tareas_graficos_anuales(datos, year), jobs)
+    print("--- Análisis anuales finalizados ---")
+
+def analizar_años(years: list, jobs: int = 1, comparar: bool = False):
+    """
+    Genera los análisis anuales de varios años en un solo proceso. Las ventas y el stock de
+    todos los años se leen con una consulta por tabla y se separan por año en pandas.
+    Con `comparar` se agregan gráficos que comparan las ventas por mes y por categoría entre años.
+    """
+    years = sorted(set(years))
+    print(f"\n--- Iniciando análisis anuales para los años {years} ({jobs} trabajos) ---")
+    with ThreadPoolExecutor(max_workers=max(jobs, 2)) as hilos:
+        datos_por_año = _obtener_datos_lote(years, hilos)
+    if datos_por_año is None:
+        return
+
+    tareas = []
+    for year in years:
+        tareas.extend(_tareas_graficos_anuales(datos_por_año[year], year))
+
+    if comparar and len(years) > 1:
+        sufijo = "_".join(str(year) for year in years)
+        for nombre, graficar in COMPARACIONES_ANUALES.items():
+            partes = [datos_por_año[year][nombre].assign(anio=year) for year in years if not datos_por_año[year][nombre].empty]
+            if not partes:
+                print(f"INFO: No hay datos para comparar '{nombre}' entre los años {years}.")
+                continue
+            filename = f"comparacion_{nombre}_{sufijo}.png"
+            tareas.append((graficar, (pd.concat(partes, ignore_index=True), filename, years)))
+
+    renderizar_en_paralelo(tareas, jobs)
+    print(f"--- Análisis anuales para los años {years} finalizados ---")
@@ -0,0 +1,122 @@
+# src/cache_resultados.py
+
+import hashlib
+import json
+import os
+import threading
+import uuid
+import pandas as pd
+import src.config as config
+
+class CacheResultados:
+    """
+    Caché en disco de resultados de consultas (DataFrames guardados como Parquet), para no volver a
+    leer la base de datos cuando los datos no cambiaron. La clave es el sha256 del texto SQL, los
+    parámetros y un token de versión de los datos (ver VERSION_DATOS_SQL): cualquier cambio en las
+    tablas consultadas cambia el token y las entradas anteriores dejan de usarse.
+    Cuando la carpeta supera `max_bytes` se borran las entradas usadas hace más tiempo (LRU según la
+    fecha de modificación del archivo, que se actualiza en cada lectura).
+    """
+
+    def __init__(self, directorio: str, max_bytes: int):
+        self.directorio = directorio
+        self.max_bytes = max_bytes
+        self.aciertos = 0
+        self.fallos = 0
+        self._lock = threading.Lock()
+        os.makedirs(directorio, exist_ok=True)
+
+    @staticmethod
+    def clave(sql_query: str, params, version: str) -> str:
+        contenido = json.dumps([sql_query, params, version], sort_keys=True, default=str)
+        return hashlib.sha256(contenido.encode('utf-8')).hexdigest()
+
+    def _ruta(self, clave: str) -> str:
+        return os.path.join(self.directorio, f"{clave}.parquet")
+
+    def leer(self, clave: str) -> pd.DataFrame | None:
+        """DataFrame guardado con `clave`, o None si no está (o el archivo está dañado)."""
+        ruta = self._ruta(clave)
+        try:
+            df = pd.read_parquet(ruta)
+            os.utime(ruta)
+        except FileNotFoundError:
+            df = None
+        except (OSError, ValueError) as e:
+            print(f"WARNING: Entrada de la caché de resultados ilegible ({e}); se descarta.")
+            self._borrar(ruta)
+            df = None
+        with self._lock:
+            if df is None:
+                self.fallos += 1
+            else:
+                self.aciertos += 1
+        return df
+
+    def guardar(self, clave: str, df: pd.DataFrame):
+        """Guarda `df` con `clave` y recorta la caché si supera el tamaño máximo."""
+        if df is None or len(df.columns) == 0:
+            return
+        ruta = self._ruta(clave)
+        # Se escribe a un archivo temporal y se renombra, así otro hilo nunca lee un archivo a medias
+        temporal = f"{ruta}.{uuid.uuid4().hex}.tmp"
+        try:
+            df.to_parquet(temporal, index=False)
+            os.replace(temporal, ruta)
+        except (OSError, ValueError, TypeError) as e:
+            print(f"WARNING: No se pudo guardar un resultado en la caché: {e}")
+            self._borrar(temporal)
+            return
+        self._recortar()
+
+    def _recortar(self):
+        with self._lock:
+            entradas = []
+            for entrada in os.scandir(self.directorio):
+                if entrada.name.endswith(".parquet"):
+                    try:
+                        estado = entrada.stat()
+                    except FileNotFoundError:
+                        continue
+                    entradas.append((estado.st_mtime, estado.st_size, entrada.path))
+            total = sum(tamaño for _, tamaño, _ in entradas)
+            for _, tamaño, ruta in sorted(entradas):
+                if total <= self.max_bytes:
+                    break
+                self._borrar(ruta)
+                total -= tamaño
+
+    @staticmethod
+    def _borrar(ruta: str):
+        try:
+            os.remove(ruta)
+        except FileNotFoundError:
+            pass
+
+    def limpiar(self):
+        """Borra todas las entradas."""
+        with self._lock:
+            for entrada in os.scandir(self.directorio):
+                if entrada.name.endswith(".parquet"):
+                    self._borrar(entrada.path)
+
+_cache = None
+
+def activar(directorio: str = None, max_mb: float = None) -> CacheResultados:
+    """
+    Activa la caché para las consultas marcadas como `cacheable` (ver execute_query).
+    Por defecto usa CACHE_RESULTADOS_DIR y CACHE_RESULTADOS_MAX_MB de la configuración.
+    """
+    global _cache
+    _cache = CacheResultados(
+        directorio or config.CACHE_RESULTADOS_DIR,
+        int((max_mb if max_mb is not None else config.CACHE_RESULTADOS_MAX_MB) * 1024 * 1024)
+    )
+    return _cache
+
+def desactivar():
+    global _cache
+    _cache = None
+
+def cache_activa() -> CacheResultados | None:
+    return _cache
@@ -32,6 +32,23 @@ DB_PASS = os.getenv("DB_PASS")
 DB_HOST = os.getenv("DB_HOST", "localhost")
 DB_PORT = os.getenv("DB_PORT", "5432")
 
+# Parámetros del pool de conexiones (opcionales en el .env)
+# DB_POOL_MIN es además la cantidad de conexiones ociosas que el pool mantiene abiertas
+DB_POOL_MIN = int(os.getenv("DB_POOL_MIN", "2"))
+DB_POOL_MAX = int(os.getenv("DB_POOL_MAX", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_PING_SEGUNDOS = float(os.getenv("DB_POOL_PING_SEGUNDOS", "60"))
+
+# Cómo obtiene la GUI el total de productos para la paginación: estimado, exacto o sin_total (ver src/paginacion.py)
+GUI_ESTRATEGIA_CONTEO = os.getenv("GUI_ESTRATEGIA_CONTEO", "estimado")
+
+# Caché en disco de resultados de los análisis (src/cache_resultados.py, se activa con --cache en src/main.py)
+CACHE_RESULTADOS_DIR = os.getenv("CACHE_RESULTADOS_DIR", os.path.join(project_root or os.getcwd(), "cache_resultados"))
+CACHE_RESULTADOS_MAX_MB = float(os.getenv("CACHE_RESULTADOS_MAX_MB", "256"))
+
+# Productos del gráfico de evolución de stock: los N con más movimiento del año (0 = todos)
+STOCK_EVOLUCION_TOP_N = int(os.getenv("STOCK_EVOLUCION_TOP_N", "10"))
+
 def check_db_config() -> bool:
     """
     revisa las variables del .env para asegurarse que no falte ninguna
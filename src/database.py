@@ -1,6 +1,38 @@
+import atexit
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
 import psycopg2
+import psycopg2.extensions
+import psycopg2.pool
+import numpy as np
 import pandas as pd
 import src.config as config
+from src import cache_resultados
+from src.queries import VERSION_DATOS_SQL
+
+_pool = None
+_pool_lock = threading.Lock()
+_pool_slots = None
+_ultimo_uso = {}
+
+STREAM_ITERSIZE = 10000
+
+# Modo columnar: NUMERIC se decodifica directo a float con el conversor de float8 de psycopg2 (en C),
+# sin crear un Decimal por celda. Se registra solo en los cursores que lo piden.
+NUMERIC_A_FLOAT = psycopg2.extensions.new_type(psycopg2.extensions.DECIMAL.values, 'NUMERIC_A_FLOAT', psycopg2.extensions.FLOAT)
+
+# OID de PostgreSQL -> dtype de NumPy de la columna en modo columnar. Los enteros con NULL pasan a
+# float64 con NaN, igual que al armar el DataFrame por filas. El resto de los tipos (texto, etc.)
+# queda como lista y pandas infiere su tipo.
+DTYPES_COLUMNARES = {
+    20: np.int64, 21: np.int64, 23: np.int64,          # int8, int2, int4
+    700: np.float64, 701: np.float64, 1700: np.float64,  # float4, float8, numeric
+    1082: 'datetime64[D]',                               # date
+    1114: 'datetime64[us]',                              # timestamp
+}
 
 def get_db_connection():
     """
@@ -27,81 +59,393 @@ def get_db_connection():
         print(f"error al conectar con psycopg2: {e}")
         return None
 
-def test_connection():
+def get_pool():
     """
-    Intenta conectar a la base de datos usando get_db_connection y devuelve True/False.
+    Devuelve el pool de conexiones del proceso, creándolo la primera vez que se pide.
+    Es seguro entre hilos. Devuelve None si la configuración es inválida o no se puede conectar.
     """
-    conn = get_db_connection()
-    if conn:
+    global _pool, _pool_slots
+    if _pool is not None and not _pool.closed:
+        return _pool
+    with _pool_lock:
+        if _pool is not None and not _pool.closed:
+            return _pool
+        if not config.check_db_config():
+            return None
         try:
-            conn.close()
-            return True
-        except Exception as e:
-            print(f"Error al cerrar conexión de prueba (psycopg2): {e}")
-            return False
-    else:
+            _pool = psycopg2.pool.ThreadedConnectionPool(
+                config.DB_POOL_MIN,
+                config.DB_POOL_MAX,
+                dbname=config.DB_NAME,
+                user=config.DB_USER,
+                password=config.DB_PASS,
+                host=config.DB_HOST,
+                port=config.DB_PORT
+            )
+            # ThreadedConnectionPool lanza PoolError si se agota; el semáforo hace esperar en su lugar
+            _pool_slots = threading.BoundedSemaphore(config.DB_POOL_MAX)
+            _ultimo_uso.clear()
+            return _pool
+        except psycopg2.Error as e:
+            print(f"error al crear el pool de conexiones: {e}")
+            return None
+
+def close_pool():
+    """
+    Cierra todas las conexiones del pool. La siguiente consulta vuelve a crearlo.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is not None and not _pool.closed:
+            _pool.closeall()
+        _pool = None
+        _ultimo_uso.clear()
+
+atexit.register(close_pool)
+
+def _conexion_sana(conn) -> bool:
+    """
+    Revisa que una conexión del pool siga usable antes de entregarla.
+    Solo hace un ping (SELECT 1) si la conexión estuvo ociosa más de DB_POOL_PING_SEGUNDOS.
+    """
+    if conn.closed:
+        return False
+    if conn.info.transaction_status == psycopg2.extensions.TRANSACTION_STATUS_UNKNOWN:
+        return False
+    if time.monotonic() - _ultimo_uso.get(id(conn), 0) < config.DB_POOL_PING_SEGUNDOS:
+        return True
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT 1;")
+        conn.rollback()
+        return True
+    except psycopg2.Error:
         return False
 
-def execute_query(sql_query: str, params: dict = None) -> pd.DataFrame | None:
+@contextmanager
+def get_pooled_connection():
     """
-    ejecuta una consulta sql, devuelve un df con el resultado (si la consulta no esta bien devuelve un df vacio)
+    Presta una conexión del pool para usarla en un bloque `with`:
+
+        with get_pooled_connection() as conn:
+            if conn: ...
+
+    Entrega None si no hay conexión disponible. Al salir del bloque se hace rollback de
+    cualquier transacción pendiente (hay que llamar a conn.commit() explícitamente) y
+    la conexión vuelve al pool.
     """
+    pool = get_pool()
+    if pool is None:
+        yield None
+        return
+    slots = _pool_slots
+    if not slots.acquire(timeout=config.DB_POOL_TIMEOUT):
+        print(f"error: no hubo conexiones libres en el pool tras {config.DB_POOL_TIMEOUT} segundos")
+        yield None
+        return
+
     conn = None
     try:
-        conn = get_db_connection()
-        if not conn:
-            return None
-        with conn.cursor() as cursor:
-            cursor.execute(sql_query, params)
-            if cursor.description:
-                column_names = [desc[0] for desc in cursor.description]
-                rows = cursor.fetchall()
-                return pd.DataFrame(rows, columns=column_names)
+        try:
+            for _ in range(config.DB_POOL_MAX + 1):
+                conn = pool.getconn()
+                if _conexion_sana(conn):
+                    break
+                _ultimo_uso.pop(id(conn), None)
+                pool.putconn(conn, close=True)
+                conn = None
+        except psycopg2.Error as e:
+            print(f"error al obtener conexión del pool: {e}")
+            conn = None
+        yield conn
+    finally:
+        if conn is not None:
+            descartar = conn.closed != 0
+            if not descartar and conn.info.transaction_status != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+                try:
+                    conn.rollback()
+                except psycopg2.Error:
+                    descartar = True
+            if descartar:
+                _ultimo_uso.pop(id(conn), None)
             else:
-                return pd.DataFrame()
+                _ultimo_uso[id(conn)] = time.monotonic()
+            try:
+                pool.putconn(conn, close=descartar)
+            except psycopg2.pool.PoolError:
+                # el pool se cerró mientras la conexión estaba prestada
+                conn.close()
+        slots.release()
+
+def test_connection():
+    """
+    Intenta obtener una conexión del pool y devuelve True/False.
+    """
+    with get_pooled_connection() as conn:
+        return conn is not None
+
+class Cancelacion:
+    """
+    Permite cancelar desde otro hilo las consultas que se le asocien (ver execute_query).
+    cancelar() marca la cancelación y envía un pedido de cancelación al servidor por cada
+    conexión que esté ejecutando una consulta asociada; las consultas posteriores ni se envían.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._conexiones = set()
+        self.cancelada = False
+
+    def cancelar(self):
+        # conn.cancel() se envía con el lock tomado: _liberar espera a que termine, así una conexión
+        # no puede volver al pool (y tomar otra consulta) entre que se lee y se cancela
+        with self._lock:
+            self.cancelada = True
+            for conn in self._conexiones:
+                try:
+                    conn.cancel()
+                except psycopg2.Error:
+                    pass
+
+    def _registrar(self, conn) -> bool:
+        """Asocia la conexión mientras corre la consulta. Devuelve False si ya se canceló."""
+        with self._lock:
+            if self.cancelada:
+                return False
+            self._conexiones.add(conn)
+            return True
+
+    def _liberar(self, conn):
+        with self._lock:
+            self._conexiones.discard(conn)
+
+def _columnas_tipadas(descripcion, filas: list) -> list:
+    """
+    Transpone `filas` a una lista de columnas, convirtiendo cada columna numérica o de fecha en un
+    arreglo de NumPy del tipo de DTYPES_COLUMNARES según el OID que informa `descripcion`.
+    """
+    columnas = list(zip(*filas)) if filas else [()] * len(descripcion)
+    tipadas = []
+    for desc, columna in zip(descripcion, columnas):
+        dtype = DTYPES_COLUMNARES.get(desc.type_code)
+        if dtype is np.int64 and None in columna:
+            dtype = np.float64
+        tipadas.append(np.array(columna, dtype=dtype) if dtype is not None else list(columna))
+    return tipadas
+
+def _dataframe_columnar(nombres: list, columnas: list) -> pd.DataFrame:
+    return pd.DataFrame(dict(zip(nombres, columnas)), columns=nombres)
 
+def execute_query_rows(sql_query: str, params: dict = None, cancelacion: Cancelacion = None,
+                       columnar: bool = False) -> tuple[list | None, list] | None:
+    """
+    Igual que execute_query pero sin armar un DataFrame: devuelve (nombres de columnas, filas como tuplas),
+    pensado para resultados que van directo a la interfaz. Si la consulta no devuelve filas (INSERT sin
+    RETURNING, etc.) las columnas son None. Devuelve None si hay error o si se canceló.
+    Con `columnar` devuelve (nombres, columnas): NUMERIC llega como float y las columnas numéricas y de
+    fecha como arreglos de NumPy tipados (ver DTYPES_COLUMNARES).
+    """
+    try:
+        with get_pooled_connection() as conn:
+            if not conn:
+                return None
+            if cancelacion is not None and not cancelacion._registrar(conn):
+                return None
+            try:
+                with conn.cursor() as cursor:
+                    if columnar:
+                        psycopg2.extensions.register_type(NUMERIC_A_FLOAT, cursor)
+                    cursor.execute(sql_query, params)
+                    if cursor.description:
+                        column_names = [desc[0] for desc in cursor.description]
+                        if columnar:
+                            return column_names, _columnas_tipadas(cursor.description, cursor.fetchall())
+                        return column_names, cursor.fetchall()
+                    else:
+                        return None, []
+            finally:
+                if cancelacion is not None:
+                    cancelacion._liberar(conn)
+
+    except psycopg2.extensions.QueryCanceledError as e:
+        if cancelacion is not None and cancelacion.cancelada:
+            return None
+        print(f"Error de Base de Datos (psycopg2) al ejecutar consulta SELECT: {e}\nSQL: {sql_query.strip()}\nParams: {params}")
+        return None
     except psycopg2.Error as e:
         print(f"Error de Base de Datos (psycopg2) al ejecutar consulta SELECT: {e}\nSQL: {sql_query.strip()}\nParams: {params}")
         return None
     except Exception as e:
         print(f"Error Inesperado al ejecutar consulta SELECT: {e}\nSQL: {sql_query.strip()}\nParams: {params}")
         return None
-    finally:
-        if conn:
-            conn.close()
+
+def _version_datos() -> str | None:
+    """Token con los contadores de version_datos de todas las tablas, o None si no se pudo leer."""
+    resultado = execute_query_rows(VERSION_DATOS_SQL)
+    if resultado is None or resultado[0] is None:
+        return None
+    return ",".join(f"{tabla}:{version}" for tabla, version in resultado[1])
+
+def _buscar_en_cache(sql_query: str, params, variante: str = "") -> tuple:
+    """
+    Devuelve (caché, clave, df guardado o None) para una consulta cacheable, o (None, None, None)
+    si la caché de resultados no está activa. Si no se puede leer la versión de los datos, la
+    caché se desactiva para no servir resultados desactualizados.
+    """
+    cache = cache_resultados.cache_activa()
+    if cache is None:
+        return None, None, None
+    version = _version_datos()
+    if version is None:
+        print("WARNING: No se pudo leer version_datos (¿se ejecutó sql/migracion_v2_04_version_datos.sql?). Se desactiva la caché de resultados.")
+        cache_resultados.desactivar()
+        return None, None, None
+    clave = cache.clave(sql_query, params, f"{version}|{variante}")
+    return cache, clave, cache.leer(clave)
+
+def execute_query(sql_query: str, params: dict = None, cancelacion: Cancelacion = None, cacheable: bool = False,
+                  columnar: bool = False) -> pd.DataFrame | None:
+    """
+    ejecuta una consulta sql, devuelve un df con el resultado (si la consulta no esta bien devuelve un df vacio)
+    Con `cancelacion` la consulta se puede interrumpir desde otro hilo; si se cancela devuelve None sin informar error.
+    Con `cacheable`, si la caché de resultados está activa (src/cache_resultados.py), el resultado se
+    toma de ella mientras los datos no cambien.
+    Con `columnar` el df se arma por columnas ya tipadas (NUMERIC como float64, enteros como int64,
+    fechas como datetime64), sin pasar por Decimal ni necesitar pd.to_numeric después.
+    """
+    if cacheable:
+        cache, clave, df = _buscar_en_cache(sql_query, params, "columnar" if columnar else "")
+        if df is not None:
+            return df
+    resultado = execute_query_rows(sql_query, params, cancelacion, columnar=columnar)
+    if resultado is None:
+        return None
+    column_names, datos = resultado
+    if column_names is None:
+        return pd.DataFrame()
+    df = _dataframe_columnar(column_names, datos) if columnar else pd.DataFrame(datos, columns=column_names)
+    if cacheable and cache is not None:
+        cache.guardar(clave, df)
+    return df
+
+def iter_query_chunks(sql_query: str, params: dict = None, itersize: int = STREAM_ITERSIZE, as_dataframe: bool = True,
+                      columnar: bool = False):
+    """
+    Ejecuta una consulta SELECT con un cursor del lado del servidor (cursor con nombre) y
+    entrega el resultado por partes de a lo más `itersize` filas, como DataFrames o como listas de tuplas.
+    Solo hay una parte en memoria a la vez. Si hay un error de base de datos se informa y se relanza.
+    Con `columnar` los DataFrames se arman por columnas tipadas, como en execute_query.
+    """
+    with get_pooled_connection() as conn:
+        if not conn:
+            raise psycopg2.OperationalError("No se pudo conectar a la base de datos.")
+        try:
+            with conn.cursor(name=f"stream_{uuid.uuid4().hex}") as cursor:
+                cursor.itersize = itersize
+                if columnar:
+                    psycopg2.extensions.register_type(NUMERIC_A_FLOAT, cursor)
+                cursor.execute(sql_query, params)
+                column_names = None
+                while True:
+                    rows = cursor.fetchmany(itersize)
+                    if not rows:
+                        break
+                    if not as_dataframe:
+                        yield rows
+                        continue
+                    if column_names is None:
+                        column_names = [desc[0] for desc in cursor.description]
+                    if columnar:
+                        yield _dataframe_columnar(column_names, _columnas_tipadas(cursor.description, rows))
+                    else:
+                        yield pd.DataFrame(rows, columns=column_names)
+        except psycopg2.Error as e:
+            print(f"Error de Base de Datos (psycopg2) al leer consulta por partes: {e}\nSQL: {sql_query.strip()}\nParams: {params}")
+            raise
+
+def execute_query_streamed(sql_query: str, params: dict = None, transform=None, itersize: int = STREAM_ITERSIZE,
+                           cacheable: bool = False, columnar: bool = False) -> pd.DataFrame | None:
+    """
+    Igual que execute_query pero lee el resultado por partes con iter_query_chunks.
+    `transform` se aplica a cada parte (conversión de tipos, agregación parcial, etc.)
+    antes de unirlas, así nunca se materializa el resultado crudo completo.
+    Devuelve None si hay error y un df vacío si la consulta no trae filas.
+    Con `cacheable` se guarda el resultado ya transformado (la clave incluye el nombre de `transform`).
+    Con `columnar` cada parte llega con columnas tipadas, como en execute_query.
+    """
+    if cacheable:
+        variante = f"{transform.__module__}.{transform.__qualname__}" if transform else ""
+        variante += "|columnar" if columnar else ""
+        cache, clave, df = _buscar_en_cache(sql_query, params, variante)
+        if df is not None:
+            return df
+    partes = []
+    try:
+        for chunk in iter_query_chunks(sql_query, params, itersize=itersize, columnar=columnar):
+            partes.append(transform(chunk) if transform else chunk)
+    except psycopg2.Error:
+        return None
+    except Exception as e:
+        print(f"Error Inesperado al leer consulta por partes: {e}\nSQL: {sql_query.strip()}\nParams: {params}")
+        return None
+    if not partes:
+        return pd.DataFrame()
+    df = pd.concat(partes, ignore_index=True)
+    if cacheable and cache is not None:
+        cache.guardar(clave, df)
+    return df
 
 def execute_mod_query(sql_query: str, params: tuple = None) -> tuple[bool, str]:
     """
     Ejecuta una consulta de modificación (INSERT, UPDATE, DELETE) en la base de datos.
     Devuelve una tupla: (True/False si fue exitoso, mensaje de éxito o error).
     """
-    conn = None
     try:
-        conn = get_db_connection()
-        if not conn:
-            return (False, "No se pudo conectar a la base de datos.")
-        with conn.cursor() as cursor:
-            cursor.execute(sql_query, params)
-            conn.commit()
-            msg = f"Consulta de modificación ejecutada. Filas afectadas: {cursor.rowcount}"
-            print(f"INFO: {msg}")
-            return (True, msg)
+        # el rollback en caso de error lo hace get_pooled_connection al devolver la conexión
+        with get_pooled_connection() as conn:
+            if not conn:
+                return (False, "No se pudo conectar a la base de datos.")
+            with conn.cursor() as cursor:
+                cursor.execute(sql_query, params)
+                conn.commit()
+                msg = f"Consulta de modificación ejecutada. Filas afectadas: {cursor.rowcount}"
+                print(f"INFO: {msg}")
+                return (True, msg)
 
     except psycopg2.Error as e:
         error_msg = f"Error de Base de Datos: {e.pgerror}"
         print(f"{error_msg}\nSQL: {sql_query.strip()}\nParams: {params}")
-        if conn:
-            conn.rollback()
         return (False, error_msg) # Devuelve el mensaje de error de la BD
     except Exception as e:
         error_msg = f"Error Inesperado: {e}"
         print(f"{error_msg}\nSQL: {sql_query.strip()}\nParams: {params}")
-        if conn:
-            conn.rollback()
         return (False, error_msg)
-    finally:
-        if conn:
-            conn.close()
+
+def execute_mod_query_returning(sql_query: str, params: tuple | dict = None) -> tuple[bool, str, list]:
+    """
+    Igual que execute_mod_query, para sentencias con RETURNING.
+    Devuelve una tupla: (True/False si fue exitoso, mensaje de éxito o error, filas devueltas).
+    """
+    try:
+        with get_pooled_connection() as conn:
+            if not conn:
+                return (False, "No se pudo conectar a la base de datos.", [])
+            with conn.cursor() as cursor:
+                cursor.execute(sql_query, params)
+                rows = cursor.fetchall() if cursor.description else []
+                conn.commit()
+                msg = f"Consulta de modificación ejecutada. Filas afectadas: {cursor.rowcount}"
+                print(f"INFO: {msg}")
+                return (True, msg, rows)
+
+    except psycopg2.Error as e:
+        error_msg = f"Error de Base de Datos: {e.pgerror}"
+        print(f"{error_msg}\nSQL: {sql_query.strip()}\nParams: {params}")
+        return (False, error_msg, [])
+    except Exception as e:
+        error_msg = f"Error Inesperado: {e}"
+        print(f"{error_msg}\nSQL: {sql_query.strip()}\nParams: {params}")
+        return (False, error_msg, [])
 
 def get_next_product_id() -> int:
     """
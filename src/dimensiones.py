@@ -0,0 +1,71 @@
+# src/dimensiones.py
+
+import threading
+from src.database import execute_query_rows
+from src.queries_relacional import GET_ALL_DIMENSIONS_SQL
+
+class CacheDimensiones:
+    """
+    Caché en memoria de tablas de dimensiones pequeñas, cargadas juntas en un solo viaje a la
+    base de datos con una consulta que devuelve filas (dimension, id, nombre).
+    mapa() entrega un dict id -> nombre por dimensión. invalidar() marca la caché como
+    desactualizada y la próxima lectura la recarga; cada carga incrementa `version`, para que
+    quien arme estructuras a partir de la caché (opciones de la GUI, etc.) sepa cuándo rehacerlas.
+    """
+
+    def __init__(self, sql_query: str):
+        self.sql_query = sql_query
+        self.version = 0
+        self._mapas = None
+        self._opciones = {}
+        self._lock = threading.Lock()
+
+    def invalidar(self):
+        """Descarta lo cargado; la próxima lectura vuelve a consultar la base de datos."""
+        with self._lock:
+            self._mapas = None
+            self._opciones = {}
+
+    def obtener(self, conn=None) -> dict | None:
+        """
+        Devuelve {dimension: {id: nombre}}, cargándolo si hace falta. Con `conn` la carga usa esa
+        conexión (y ve lo que su transacción haya insertado); si no, una del pool.
+        Devuelve None si no se pudo cargar.
+        """
+        with self._lock:
+            if self._mapas is not None:
+                return self._mapas
+            if conn is not None:
+                with conn.cursor() as cursor:
+                    cursor.execute(self.sql_query)
+                    filas = cursor.fetchall()
+            else:
+                resultado = execute_query_rows(self.sql_query)
+                if resultado is None:
+                    return None
+                filas = resultado[1]
+            mapas = {}
+            for dimension, id_, nombre in filas:
+                mapas.setdefault(dimension, {})[id_] = nombre
+            self._mapas = mapas
+            self._opciones = {}
+            self.version += 1
+            return mapas
+
+    def mapa(self, dimension: str, conn=None) -> dict | None:
+        """Dict id -> nombre de `dimension` (vacío si no tiene filas), o None si no se pudo cargar."""
+        mapas = self.obtener(conn)
+        return None if mapas is None else mapas.get(dimension, {})
+
+    def opciones(self, dimension: str, conn=None) -> list | None:
+        """Lista de (id, nombre) de `dimension` ordenada por nombre, para listas desplegables."""
+        mapa = self.mapa(dimension, conn)
+        if mapa is None:
+            return None
+        with self._lock:
+            if dimension not in self._opciones:
+                self._opciones[dimension] = sorted(mapa.items(), key=lambda item: item[1])
+            return self._opciones[dimension]
+
+# Catálogos de la base relacional de la GUI: categoria, fabricante, ubicacion
+DIMENSIONES_RELACIONAL = CacheDimensiones(GET_ALL_DIMENSIONS_SQL)
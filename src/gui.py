@@ -5,12 +5,22 @@ import os
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 import flet as ft
-import subprocess
 import threading
 import math
-from src.database import execute_query, execute_mod_query
+from src.database import execute_query, execute_mod_query, execute_mod_query_returning, Cancelacion
 from src.queries_relacional import *
-from src.config import check_db_config
+from src.config import check_db_config, GUI_ESTRATEGIA_CONTEO
+from src.dimensiones import DIMENSIONES_RELACIONAL
+from src.skus import prefijo_sku, previsualizar_sku
+from src.paginacion import ContadorProductos, CachePaginas, obtener_pagina, precargar_paginas
+from src.inserts_relacional import ejecutar_carga, CargaCancelada
+
+# Espera tras la última tecla antes de buscar, en segundos
+SEARCH_DEBOUNCE_SECONDS = 0.3
+
+def format_clp(values) -> list[str]:
+    """Formatea montos como $1.234.567; un monto NULL (p. ej. costo_unitario) se muestra como $0."""
+    return [f"${int(value or 0):,}".replace(",", ".") for value in values]
 
 def main(page: ft.Page):
     page.title = "LUBRI-EXPRESS - Gestión de Inventario"
@@ -42,11 +52,31 @@ def main(page: ft.Page):
 
     # --- LÓGICA DE PAGINACIÓN Y BÚSQUEDA ---
     page_size = 15
-    current_offset = ft.Text("0", visible=False)
+    # Paginación por clave: número de página mostrado, cursores (nombre, producto_id) de la
+    # primera y última fila visibles, y la consulta con que se obtuvo la página actual
+    # ('inicio', 'siguiente' o 'anterior' + cursor) para poder recargarla tal cual.
+    pagination_state = {'page': 1, 'first': None, 'last': None, 'mode': 'inicio', 'cursor': None}
+
+    # Totales para "Página X de Y"; la existencia de página siguiente se sabe pidiendo una fila extra
+    products_counter = ContadorProductos(GUI_ESTRATEGIA_CONTEO)
+    # Páginas ya vistas o precargadas (la siguiente y la anterior se piden en segundo plano)
+    products_page_cache = CachePaginas()
+
+    def invalidate_products_cache():
+        products_counter.invalidar(); products_page_cache.invalidar()
+
+    def reset_pagination():
+        pagination_state.update(page=1, first=None, last=None, mode='inicio', cursor=None)
+
+    # Cargas de la tabla: cada pedido recibe un número de generación y su propia Cancelacion.
+    # Un pedido nuevo cancela el temporizador y las consultas del anterior, y solo la
+    # generación más reciente dibuja su resultado.
+    load_state = {'generation': 0, 'timer': None, 'cancel': None}
+    load_lock = threading.Lock()
 
     def handle_search_change(e):
-        current_offset.value = "0"
-        load_products_data()
+        reset_pagination()
+        load_products_data(delay=SEARCH_DEBOUNCE_SECONDS)
 
     search_field = ft.TextField(
         label="Buscar por Nombre o SKU",
@@ -56,77 +86,134 @@ def main(page: ft.Page):
         dense=True
     )
 
-    def load_products_data(e=None):
-        offset = int(current_offset.value)
-        search_term = search_field.value
-        sql_search_term = f"%{search_term}%"
-
-        query_params = ()
-        if search_term:
-            count_query = COUNT_FILTERED_PRODUCTS_SQL
-            data_query = GET_FILTERED_PAGINATED_PRODUCTS_SQL
-            query_params = (sql_search_term, sql_search_term)
+    def load_products_data(e=None, delay=0):
+        with load_lock:
+            load_state['generation'] += 1
+            if load_state['timer'] is not None: load_state['timer'].cancel()
+            if load_state['cancel'] is not None: load_state['cancel'].cancelar()
+            cancelacion = Cancelacion()
+            timer = threading.Timer(delay, products_load_worker, args=(load_state['generation'], cancelacion, search_field.value))
+            timer.daemon = True
+            load_state.update(timer=timer, cancel=cancelacion)
+        timer.start()
+
+    def products_load_worker(generation, cancelacion, search_term):
+        # Página y total en una sola consulta (el total sale de la caché o de una estimación si se puede)
+        mode, cursor = pagination_state['mode'], pagination_state['cursor']
+        result = obtener_pagina(products_counter, search_term, mode, cursor, page_size, cancelacion, products_page_cache)
+        # Si al retroceder no hay una página completa (se borraron o agregaron filas antes), se vuelve al inicio
+        if mode == 'anterior' and result is not None and len(result['filas']) < page_size:
+            mode, cursor = 'inicio', None
+            result = obtener_pagina(products_counter, search_term, mode, cursor, page_size, cancelacion, products_page_cache)
+        if cancelacion.cancelada: return
+        if result is None: result = {'filas': [], 'hay_mas': False, 'total': None, 'exacto': False}
+        # Hacia atrás la fila extra indica si hay página anterior; siempre hay siguiente (de ahí se vino)
+        has_next = True if mode == 'anterior' else result['hay_mas']
+
+        with load_lock:
+            if cancelacion.cancelada or generation != load_state['generation']: return
+            if mode == 'inicio' and pagination_state['mode'] != 'inicio': reset_pagination()
+            render_products_page(result['filas'], result['total'], result['exacto'], has_next)
+            neighbours = adjacent_pages(has_next)
+        page.update()
+        precargar_paginas(products_counter, products_page_cache, search_term, neighbours, page_size)
+
+    def adjacent_pages(has_next):
+        # Mismos (modo, cursor) que usará go_to_page para ir a la página siguiente y a la anterior
+        neighbours = []
+        if has_next and pagination_state['last'] is not None: neighbours.append(('siguiente', pagination_state['last']))
+        if pagination_state['page'] == 2: neighbours.append(('inicio', None))
+        elif pagination_state['page'] > 2 and pagination_state['first'] is not None: neighbours.append(('anterior', pagination_state['first']))
+        return neighbours
+
+    def render_products_page(rows, total_records, exact, has_next):
+        # rows: tuplas (producto_id, nombre, sku, costo_unitario, precio_venta, stock, categoria, fabricante, ubicacion)
+        if rows:
+            pagination_state['first'] = (rows[0][1], rows[0][0])
+            pagination_state['last'] = (rows[-1][1], rows[-1][0])
+        current_page = pagination_state['page']
+
+        if total_records is None:
+            pagination_text.value = f"Página {current_page}"
         else:
-            count_query = COUNT_PRODUCTS_SQL
-            data_query = GET_PAGINATED_PRODUCTS_SQL
-
-        df_count = execute_query(count_query, query_params)
-        total_records = df_count['total'][0] if df_count is not None and not df_count.empty else 0
-        total_pages = math.ceil(total_records / page_size) if total_records > 0 else 1
-        current_page = (offset // page_size) + 1
-
-        pagination_text.value = f"Página {current_page} de {total_pages}"
+            total_pages = max(math.ceil(total_records / page_size), current_page, 1)
+            pagination_text.value = f"Página {current_page} de {total_pages}" if exact else f"Página {current_page} de ~{total_pages}"
         prev_button.disabled = (current_page == 1)
-        next_button.disabled = (current_page >= total_pages)
-
-        paginated_params = query_params + (page_size, offset)
-        df = execute_query(data_query, paginated_params)
-
-        products_datatable.rows.clear()
-        if df is not None and not df.empty:
-            for index, row in df.iterrows():
-                products_datatable.rows.append(
-                    ft.DataRow(
-                        color=ft.Colors.with_opacity(0.05, ft.Colors.PRIMARY) if index % 2 == 0 else None,
-                        cells=[
-                            ft.DataCell(ft.Text(str(row['producto_id']))),
-                            ft.DataCell(ft.Text(row['nombre'], width=300, no_wrap=True, tooltip=row['nombre'])),
-                            ft.DataCell(ft.Text(row['sku'])),
-                            ft.DataCell(ft.Text(f"${int(row['costo_unitario']):,}".replace(",", "."))),
-                            ft.DataCell(ft.Text(f"${int(row['precio_venta']):,}".replace(",", "."))),
-                            ft.DataCell(ft.Text(str(row['stock']))),
-                            ft.DataCell(ft.Text(row['categoria'])),
-                            ft.DataCell(ft.Text(row['fabricante'])),
-                            ft.DataCell(ft.Text(row['ubicacion'])),
-                            ft.DataCell(ft.Row([
-                                    ft.IconButton(icon=ft.Icons.EDIT, tooltip="Editar", on_click=show_edit_form, data=row['producto_id']),
-                                    ft.IconButton(icon=ft.Icons.DELETE, icon_color=ft.Colors.RED_400, tooltip="Eliminar", on_click=show_delete_confirmation, data=row['producto_id'])
-                                ]))]))
-        page.update()
+        next_button.disabled = not has_next
+
+        costos = format_clp([row[3] for row in rows]); precios = format_clp([row[4] for row in rows])
+        stripe = ft.Colors.with_opacity(0.05, ft.Colors.PRIMARY)
+        products_datatable.rows = [
+            ft.DataRow(
+                color=stripe if index % 2 == 0 else None,
+                cells=[
+                    ft.DataCell(ft.Text(str(producto_id))),
+                    ft.DataCell(ft.Text(nombre, width=300, no_wrap=True, tooltip=nombre)),
+                    ft.DataCell(ft.Text(sku)),
+                    ft.DataCell(ft.Text(costo)),
+                    ft.DataCell(ft.Text(precio)),
+                    ft.DataCell(ft.Text(str(stock))),
+                    ft.DataCell(ft.Text(categoria)),
+                    ft.DataCell(ft.Text(fabricante)),
+                    ft.DataCell(ft.Text(ubicacion)),
+                    ft.DataCell(ft.Row([
+                            ft.IconButton(icon=ft.Icons.EDIT, tooltip="Editar", on_click=show_edit_form, data=producto_id),
+                            ft.IconButton(icon=ft.Icons.DELETE, icon_color=ft.Colors.RED_400, tooltip="Eliminar", on_click=show_delete_confirmation, data=producto_id)
+                        ]))])
+            for index, ((producto_id, nombre, sku, _, _, stock, categoria, fabricante, ubicacion), costo, precio)
+            in enumerate(zip(rows, costos, precios))
+        ]
+
+    def refresh_products(e):
+        invalidate_products_cache()
+        load_products_data()
 
     def go_to_page(e):
-        offset = int(current_offset.value)
-        if e.control.tooltip == "Página Siguiente": current_offset.value = str(offset + page_size)
-        elif e.control.tooltip == "Página Anterior": current_offset.value = str(offset - page_size)
+        if e.control.tooltip == "Página Siguiente" and pagination_state['last'] is not None:
+            pagination_state.update(page=pagination_state['page'] + 1, mode='siguiente', cursor=pagination_state['last'])
+        elif e.control.tooltip == "Página Anterior" and pagination_state['first'] is not None:
+            if pagination_state['page'] <= 2: reset_pagination()
+            else: pagination_state.update(page=pagination_state['page'] - 1, mode='anterior', cursor=pagination_state['first'])
         load_products_data()
 
     prev_button = ft.IconButton(icon=ft.Icons.NAVIGATE_BEFORE, on_click=go_to_page, tooltip="Página Anterior")
     next_button = ft.IconButton(icon=ft.Icons.NAVIGATE_NEXT, on_click=go_to_page, tooltip="Página Siguiente")
     pagination_text = ft.Text()
 
-    def load_data_worker():
-        load_data_button.disabled = True; progress_ring.visible = True; page.update()
+    # La carga de datos de prueba corre en un hilo del mismo proceso y va informando su avance
+    load_job = {'cancelar': None}
+    def show_load_progress(evento):
+        eta = f" · faltan ~{evento.eta_seg:.0f} s" if evento.eta_seg is not None else ""
+        progress_ring.value = evento.fraccion or None
+        progress_text.value = f"{evento.etapa}: {evento.filas:,} filas ({evento.filas_por_seg:,.0f} filas/s){eta}".replace(",", ".")
+        page.update()
+    def load_data_worker(cancelar):
         try:
-            subprocess.run([sys.executable, "src/inserts_relacional.py"], capture_output=True, text=True, check=True)
-            page.snack_bar = ft.SnackBar(content=ft.Text("Datos de prueba cargados con éxito."), bgcolor=ft.Colors.GREEN); page.snack_bar.open = True
-            current_offset.value = "0"; populate_dropdowns(); load_products_data()
-        except subprocess.CalledProcessError as e:
-            page.snack_bar = ft.SnackBar(content=ft.Text(f"Error al cargar datos: {e.stderr[:100]}..."), bgcolor=ft.Colors.RED); page.snack_bar.open = True
-        load_data_button.disabled = False; progress_ring.visible = False; page.update()
+            ejecutar_carga(progreso=show_load_progress, cancelar=cancelar)
+            page.snack_bar = ft.SnackBar(content=ft.Text("Datos de prueba cargados con éxito."), bgcolor=ft.Colors.GREEN)
+        except CargaCancelada:
+            page.snack_bar = ft.SnackBar(content=ft.Text("Carga de datos cancelada; las tablas quedaron vacías."), bgcolor=ft.Colors.ORANGE)
+        except Exception as e:
+            page.snack_bar = ft.SnackBar(content=ft.Text(f"Error al cargar datos: {e}"), bgcolor=ft.Colors.RED)
+        page.snack_bar.open = True
+        load_job['cancelar'] = None
+        invalidate_products_cache(); DIMENSIONES_RELACIONAL.invalidar(); reset_pagination(); populate_dropdowns(); load_products_data()
+        load_data_button.disabled = False; cancel_load_button.visible = False
+        progress_ring.visible = False; progress_ring.value = None; progress_text.visible = False; page.update()
     def run_data_load(e):
-        threading.Thread(target=load_data_worker, daemon=True).start()
+        cancelar = threading.Event()
+        load_job['cancelar'] = cancelar
+        load_data_button.disabled = True; cancel_load_button.visible = True; cancel_load_button.disabled = False
+        progress_ring.visible = True; progress_text.value = "Iniciando carga..."; progress_text.visible = True; page.update()
+        threading.Thread(target=load_data_worker, args=(cancelar,), daemon=True).start()
+    def cancel_data_load(e):
+        if load_job['cancelar'] is not None:
+            load_job['cancelar'].set()
+            cancel_load_button.disabled = True; progress_text.value = "Cancelando..."; page.update()
     load_data_button = ft.ElevatedButton(text="Cargar Datos", icon=ft.Icons.UPLOAD, on_click=run_data_load, tooltip="Puebla la BD con datos de prueba.")
+    cancel_load_button = ft.TextButton(text="Cancelar", icon=ft.Icons.CANCEL, on_click=cancel_data_load, visible=False, tooltip="Detiene la carga al terminar el mes en curso.")
     progress_ring = ft.ProgressRing(visible=False, width=16, height=16, stroke_width=2)
+    progress_text = ft.Text(visible=False, size=12)
     editing_product_id = ft.Text(visible=False)
     nombre_field = ft.TextField(label="Nombre del Producto", col=6); sku_field = ft.TextField(label="SKU", read_only=True, hint_text="Se genera...", col=6)
     costo_field = ft.TextField(label="Costo Unitario", input_filter=ft.InputFilter(allow=True, regex_string=r"[0-9]*"), col=4)
@@ -143,24 +230,25 @@ def main(page: ft.Page):
         if not fab_id_str or not cat_id_str: sku_field.value = "Seleccione..."; bottom_sheet.update(); return
         try: fab_id = int(fab_id_str); cat_id = int(cat_id_str)
         except ValueError: return
-        fab_text = next((opt.text for opt in fabricante_dropdown.options if opt.key == fab_id), ""); cat_text = next((opt.text for opt in categoria_dropdown.options if opt.key == cat_id), "")
-        fab_prefix = fab_text[:3].upper(); cat_prefix = cat_text[:3].upper(); combo_key = f"{fab_prefix}-{cat_prefix}"
-        df_last_sku = execute_query(GET_LAST_SKU_SQL, (fab_id, cat_id))
-        next_seq = 1
-        if df_last_sku is not None and not df_last_sku.empty:
-            last_sku = df_last_sku['sku'][0]
-            try: next_seq = int(last_sku.split('-')[-1]) + 1
-            except (ValueError, IndexError): next_seq = 1
-        new_sku = f"{combo_key}-{next_seq:04d}"; sku_field.value = new_sku; bottom_sheet.update()
+        # Al editar sin cambiar fabricante ni categoría se conserva el SKU del producto
+        if editing_product_id.value is not None and editing_product_id.data['combo'] == (fab_id, cat_id): sku_field.value = editing_product_id.data['sku']; bottom_sheet.update(); return
+        # Vista previa: el número definitivo se reserva al guardar (INSERT_PRODUCT_WITH_SKU_SQL)
+        new_sku = previsualizar_sku(fab_id, cat_id, sku_prefix(fab_id, cat_id))
+        sku_field.value = new_sku if new_sku is not None else "Seleccione..."; bottom_sheet.update()
+
+    def sku_prefix(fab_id, cat_id):
+        fab_text = (DIMENSIONES_RELACIONAL.mapa('fabricante') or {}).get(fab_id, ""); cat_text = (DIMENSIONES_RELACIONAL.mapa('categoria') or {}).get(cat_id, "")
+        return prefijo_sku(fab_text, cat_text)
 
+    dropdowns_version = [None]
     def populate_dropdowns():
         # ...
-        df_cat = execute_query(GET_ALL_CATEGORIAS_SQL);
-        if df_cat is not None: categoria_dropdown.options = [ft.dropdown.Option(key=row['categoria_id'], text=row['nombre']) for _, row in df_cat.iterrows()]
-        df_fab = execute_query(GET_ALL_FABRICANTES_SQL);
-        if df_fab is not None: fabricante_dropdown.options = [ft.dropdown.Option(key=row['fabricante_id'], text=row['nombre']) for _, row in df_fab.iterrows()]
-        df_ubi = execute_query(GET_ALL_UBICACIONES_SQL);
-        if df_ubi is not None: ubicacion_dropdown.options = [ft.dropdown.Option(key=row['ubicacion_id'], text=row['descripcion']) for _, row in df_ubi.iterrows()]
+        # Las opciones solo se rehacen si la caché de catálogos se recargó desde la última vez
+        if DIMENSIONES_RELACIONAL.obtener() is None or dropdowns_version[0] == DIMENSIONES_RELACIONAL.version: return
+        dropdowns_version[0] = DIMENSIONES_RELACIONAL.version
+        categoria_dropdown.options = [ft.dropdown.Option(key=key, text=text) for key, text in DIMENSIONES_RELACIONAL.opciones('categoria')]
+        fabricante_dropdown.options = [ft.dropdown.Option(key=key, text=text) for key, text in DIMENSIONES_RELACIONAL.opciones('fabricante')]
+        ubicacion_dropdown.options = [ft.dropdown.Option(key=key, text=text) for key, text in DIMENSIONES_RELACIONAL.opciones('ubicacion')]
 
     def close_bottom_sheet(e):
         bottom_sheet.open = False; bottom_sheet.update()
@@ -170,18 +258,25 @@ def main(page: ft.Page):
         is_edit_mode = editing_product_id.value is not None
         if not all([nombre_field.value, sku_field.value, costo_field.value, precio_field.value, stock_field.value, categoria_dropdown.value, fabricante_dropdown.value, ubicacion_dropdown.value]):
             page.snack_bar = ft.SnackBar(content=ft.Text("Todos los campos son obligatorios."), bgcolor=ft.Colors.ERROR); page.snack_bar.open = True; page.update(); return
-        if is_edit_mode:
-            params = (nombre_field.value, sku_field.value, float(costo_field.value), float(precio_field.value), int(stock_field.value), int(categoria_dropdown.value), int(fabricante_dropdown.value), int(ubicacion_dropdown.value), int(editing_product_id.value))
-            success, msg = execute_mod_query(UPDATE_PRODUCT_SQL, params); result_msg = f"Producto '{nombre_field.value}' actualizado."
+        fab_id = int(fabricante_dropdown.value); cat_id = int(categoria_dropdown.value)
+        params = {'nombre': nombre_field.value, 'prefijo': sku_prefix(fab_id, cat_id), 'costo_unitario': float(costo_field.value), 'precio_venta': float(precio_field.value), 'stock': int(stock_field.value),
+                  'categoria_id': cat_id, 'fabricante_id': fab_id, 'ubicacion_id': int(ubicacion_dropdown.value)}
+        if is_edit_mode and editing_product_id.data['combo'] == (fab_id, cat_id):
+            update_params = (params['nombre'], editing_product_id.data['sku'], params['costo_unitario'], params['precio_venta'], params['stock'], cat_id, fab_id, params['ubicacion_id'], int(editing_product_id.value))
+            success, msg = execute_mod_query(UPDATE_PRODUCT_SQL, update_params); result_msg = f"Producto '{nombre_field.value}' actualizado."
+        elif is_edit_mode:
+            # Cambió la combinación fabricante/categoría: se reserva un SKU nuevo en la misma sentencia
+            success, msg, rows = execute_mod_query_returning(UPDATE_PRODUCT_WITH_NEW_SKU_SQL, dict(params, producto_id=int(editing_product_id.value)))
+            result_msg = f"Producto '{nombre_field.value}' actualizado con SKU {rows[0][1]}." if rows else f"Producto '{nombre_field.value}' actualizado."
         else:
-            params = (nombre_field.value, sku_field.value, float(costo_field.value), float(precio_field.value), int(stock_field.value), int(categoria_dropdown.value), int(fabricante_dropdown.value), int(ubicacion_dropdown.value))
-            success, msg = execute_mod_query(INSERT_PRODUCT_SQL, params); result_msg = f"Producto '{nombre_field.value}' agregado."
-        if success: page.snack_bar = ft.SnackBar(content=ft.Text(result_msg), bgcolor=ft.Colors.GREEN); load_products_data(); close_bottom_sheet(None)
+            success, msg, rows = execute_mod_query_returning(INSERT_PRODUCT_WITH_SKU_SQL, params)
+            result_msg = f"Producto '{nombre_field.value}' agregado con SKU {rows[0][1]}." if rows else f"Producto '{nombre_field.value}' agregado."
+        if success: invalidate_products_cache(); page.snack_bar = ft.SnackBar(content=ft.Text(result_msg), bgcolor=ft.Colors.GREEN); load_products_data(); close_bottom_sheet(None)
         else: page.snack_bar = ft.SnackBar(content=ft.Text(f"Error al guardar: {msg}"), bgcolor=ft.Colors.ERROR)
         page.snack_bar.open = True; page.update()
 
     def show_add_form(e):
-        editing_product_id.value = None; form_title.value = "Agregar Nuevo Producto"
+        editing_product_id.value = None; editing_product_id.data = None; form_title.value = "Agregar Nuevo Producto"
         nombre_field.value = ""; sku_field.value = ""; costo_field.value = ""; precio_field.value = ""; stock_field.value = ""
         categoria_dropdown.value = None; fabricante_dropdown.value = None; ubicacion_dropdown.value = None
         bottom_sheet.open = True; bottom_sheet.update()
@@ -193,6 +288,7 @@ def main(page: ft.Page):
             editing_product_id.value = str(prod['producto_id']); form_title.value = f"Editando Producto ID: {prod['producto_id']}"
             nombre_field.value = prod['nombre']; sku_field.value = prod['sku']; costo_field.value = str(int(prod['costo_unitario'])); precio_field.value = str(int(prod['precio_venta'])); stock_field.value = str(prod['stock'])
             categoria_dropdown.value = str(prod['categoria_id']); fabricante_dropdown.value = str(prod['fabricante_id']); ubicacion_dropdown.value = str(prod['ubicacion_id'])
+            editing_product_id.data = {'combo': (int(prod['fabricante_id']), int(prod['categoria_id'])), 'sku': prod['sku']}
             bottom_sheet.open = True; bottom_sheet.update()
 
     bottom_sheet = ft.BottomSheet(
@@ -211,7 +307,7 @@ def main(page: ft.Page):
 
     def confirmed_delete(e):
         product_id = e.control.data; success, message = execute_mod_query(DELETE_PRODUCT_SQL, (product_id,))
-        if success: page.snack_bar = ft.SnackBar(content=ft.Text(f"Producto ID {product_id} eliminado"), bgcolor=ft.Colors.GREEN); load_products_data()
+        if success: invalidate_products_cache(); page.snack_bar = ft.SnackBar(content=ft.Text(f"Producto ID {product_id} eliminado"), bgcolor=ft.Colors.GREEN); load_products_data()
         else: page.snack_bar = ft.SnackBar(content=ft.Text(f"Error al eliminar: {message}"), bgcolor=ft.Colors.ERROR)
         delete_confirm_card.visible = False; page.snack_bar.open = True; page.update()
     def cancel_delete(e):
@@ -237,9 +333,11 @@ def main(page: ft.Page):
         expand=True, spacing=15, controls=[
             ft.Row(controls=[
                     ft.ElevatedButton(text="Agregar Producto", icon=ft.Icons.ADD, on_click=show_add_form),
-                    ft.ElevatedButton(text="Refrescar", icon=ft.Icons.REFRESH, on_click=load_products_data),
+                    ft.ElevatedButton(text="Refrescar", icon=ft.Icons.REFRESH, on_click=refresh_products),
                     load_data_button,
                     progress_ring,
+                    progress_text,
+                    cancel_load_button,
                 ], alignment=ft.MainAxisAlignment.START
             ),
             delete_confirm_card,
@@ -1,13 +1,19 @@
+import argparse
 import psycopg2
 import random
+import io
 import os
 import sys
+import time
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from datetime import datetime, timedelta
 import src.config as config
 from src.database import get_db_connection
+from src.particiones import crear_particiones_anuales
 
 
+# Tamaños con --scale 1. Clientes, productos y hechos crecen en proporción a la escala;
+# fabricantes, categorías y ubicaciones son catálogos pequeños y se mantienen fijos.
 N_FABRICANTES = 10
 N_CATEGORIAS = 7
 N_UBICACIONES = 10
@@ -15,12 +21,68 @@ N_CLIENTES = 100
 N_PRODUCTOS = 34
 N_VENTAS = 480
 N_MOV_STOCK_OTROS = 80
+# sobre esta cantidad de clientes los RUT se derivan del id para evitar choques
+MAX_CLIENTES_RUT_ALEATORIO = 100000
 AÑO_INICIO_SIM = 2023
 AÑO_FIN_SIM = 2025
 CODIGOS_MOVIMIENTO_ESPERADOS = [
     'SALIDA_VTA', 'ENTRADA_COMPRA',
     'AJUSTE_INV_POS', 'AJUSTE_INV_NEG'
 ]
+COPY_LOTE_FILAS = 50000
+
+
+class CargadorCopy:
+    """
+    Acumula filas en un buffer de texto en memoria y las envía a `tabla` con
+    COPY ... FROM STDIN cada `lote` filas, así nunca se tiene el conjunto completo en memoria.
+    El rendimiento informado mide solo el tiempo de los COPY de esta tabla, no el de generar las
+    filas (que en insertar_hechos se intercala entre ventas y stock).
+    """
+
+    def __init__(self, cursor, tabla: str, columnas: list, lote: int = COPY_LOTE_FILAS):
+        self.cursor = cursor
+        self.tabla = tabla
+        self.lote = lote
+        self.sql_copy = f"COPY {tabla} ({', '.join(columnas)}) FROM STDIN"
+        self.buffer = io.StringIO()
+        self.filas_buffer = 0
+        self.filas_total = 0
+        self.segundos_copy = 0.0
+
+    @staticmethod
+    def _formatear(valor) -> str:
+        if valor is None:
+            return '\\N'
+        if isinstance(valor, str):
+            return valor.replace('\\', '\\\\').replace('\t', '\\t').replace('\n', '\\n').replace('\r', '\\r')
+        return str(valor)
+
+    def agregar(self, fila: tuple):
+        self.buffer.write('\t'.join(map(self._formatear, fila)))
+        self.buffer.write('\n')
+        self.filas_buffer += 1
+        if self.filas_buffer >= self.lote:
+            self.vaciar()
+
+    def vaciar(self):
+        if self.filas_buffer == 0:
+            return
+        self.buffer.seek(0)
+        inicio = time.perf_counter()
+        self.cursor.copy_expert(self.sql_copy, self.buffer)
+        self.segundos_copy += time.perf_counter() - inicio
+        self.filas_total += self.filas_buffer
+        self.buffer = io.StringIO()
+        self.filas_buffer = 0
+
+    def cerrar(self) -> int:
+        """Envía lo que quede en el buffer, informa el rendimiento y devuelve el total de filas."""
+        self.vaciar()
+        segundos = self.segundos_copy
+        filas_por_seg = self.filas_total / segundos if segundos > 0 else float('inf')
+        print(f"  {self.tabla}: {self.filas_total} filas cargadas con COPY en {segundos:.2f} s de envío ({filas_por_seg:,.0f} filas/s).")
+        return self.filas_total
 
 
 def generar_fecha_aleatoria(año_inicio=AÑO_INICIO_SIM, año_fin=AÑO_FIN_SIM):
@@ -45,8 +107,27 @@ def generar_fecha_aleatoria(año_inicio=AÑO_INICIO_SIM, año_fin=AÑO_FIN_SIM):
     )
     return random_date
 
-def generar_rut_chileno():
-    rut_base = random.randint(5000000, 25000000)
+def calcular_tamaños(scale: float = 1.0) -> dict:
+    """
+    Devuelve la cantidad de filas a generar por tabla para un factor de escala.
+    Con scale=1 se obtienen los tamaños originales (480 ventas); con scale≈94000 se llega
+    a unos 100 millones de filas de hechos entre hechos_ventas y hechos_stock.
+    """
+    if scale <= 0:
+        raise ValueError("El factor de escala debe ser mayor que 0.")
+    return {
+        'fabricantes': N_FABRICANTES,
+        'categorias': N_CATEGORIAS,
+        'ubicaciones': N_UBICACIONES,
+        'clientes': max(1, round(N_CLIENTES * scale)),
+        'productos': max(1, round(N_PRODUCTOS * scale)),
+        'ventas': max(1, round(N_VENTAS * scale)),
+        'mov_stock_otros': max(1, round(N_MOV_STOCK_OTROS * scale)),
+    }
+
+def generar_rut_chileno(rut_base=None):
+    if rut_base is None:
+        rut_base = random.randint(5000000, 25000000)
     reversed_digits = [int(d) for d in reversed(str(rut_base))]
     factors = [2, 3, 4, 5, 6, 7] * (len(reversed_digits) // 6 + 1)
     s = sum(d * factors[i] for i, d in enumerate(reversed_digits))
@@ -72,43 +153,47 @@ def obtener_ids_tipos_movimiento(cursor) -> dict:
         raise
     return mov_type_ids
 
-def insertar_dimensiones_principales(cursor):
+def insertar_dimensiones_principales(cursor, tamaños: dict = None):
+    tamaños = tamaños or calcular_tamaños()
     fabricantes_ids, categorias_ids, ubicaciones_ids = [], [], []
-    cliente_ids = list(range(1, N_CLIENTES + 1))
+    cliente_ids = range(1, tamaños['clientes'] + 1)
 
     print("Insertando fabricantes...")
     fab_sql = "INSERT INTO fabricantes (nombre_fabricante) VALUES (%s) RETURNING fabricante_id;"
-    for i in range(1, N_FABRICANTES + 1):
+    for i in range(1, tamaños['fabricantes'] + 1):
         cursor.execute(fab_sql, (f'Fabricante_{i}',)); fabricantes_ids.append(cursor.fetchone()[0])
 
     print("Insertando categorías...")
     cat_sql = "INSERT INTO categorias (nombre_categoria) VALUES (%s) RETURNING categoria_id;"
-    for i in range(1, N_CATEGORIAS + 1):
+    for i in range(1, tamaños['categorias'] + 1):
         cursor.execute(cat_sql, (f'Categoría_{i}',)); categorias_ids.append(cursor.fetchone()[0])
 
     print("Insertando ubicaciones...")
     ubi_sql = "INSERT INTO ubicaciones (codigo_ubicacion, descripcion_ubicacion) VALUES (%s, %s) RETURNING ubicacion_id;"
-    for i in range(1, N_UBICACIONES + 1):
+    for i in range(1, tamaños['ubicaciones'] + 1):
         cursor.execute(ubi_sql, (f'UB{i:03}', f'Bodega {i}')); ubicaciones_ids.append(cursor.fetchone()[0])
 
-    print("Insertando clientes (con RUT)...")
-    cli_sql = "INSERT INTO cliente (cliente_id, rut, nombre_cliente) VALUES (%s, %s, %s);"
-    clientes_data = []
+    print(f"Insertando {len(cliente_ids)} clientes (con RUT)...")
+    clientes_copy = CargadorCopy(cursor, "cliente", ["cliente_id", "rut", "nombre_cliente"])
+    ruts_aleatorios = len(cliente_ids) <= MAX_CLIENTES_RUT_ALEATORIO
     ruts_generados = set()
     for i in cliente_ids:
-        rut = generar_rut_chileno()
-        while rut in ruts_generados: rut = generar_rut_chileno()
-        ruts_generados.add(rut)
-        clientes_data.append((i, rut, f'Cliente Nombre{i} Apellido{i}'))
-    cursor.executemany(cli_sql, clientes_data)
+        if ruts_aleatorios:
+            rut = generar_rut_chileno()
+            while rut in ruts_generados: rut = generar_rut_chileno()
+            ruts_generados.add(rut)
+        else:
+            rut = generar_rut_chileno(5000000 + i)
+        clientes_copy.agregar((i, rut, f'Cliente Nombre{i} Apellido{i}'))
+    clientes_copy.cerrar()
 
     print("Dimensiones principales insertadas.")
     return fabricantes_ids, categorias_ids, ubicaciones_ids, cliente_ids
 
-def insertar_productos(cursor, fabricantes_ids, categorias_ids, ubicaciones_ids):
-    producto_ids = list(range(1, N_PRODUCTOS + 1)) # Definir IDs de producto aquí
+def insertar_productos(cursor, fabricantes_ids, categorias_ids, ubicaciones_ids, n_productos: int = N_PRODUCTOS):
+    producto_ids = range(1, n_productos + 1) # Definir IDs de producto aquí
     print("Insertando productos (precios/costos en CLP)...")
-    productos_data = []
+    productos_copy = CargadorCopy(cursor, "productos", ["producto_id", "nombre_articulo", "fabricante_fk", "categoria_fk", "sku", "costo", "precio", "ubicacion_fk"])
     for i in producto_ids:
         nombre = f'Aceite Sintético {i}W{random.choice([30, 40])}' if i % 2 == 0 else f'Filtro Aire Mod {i}'
         fab_id = random.choice(fabricantes_ids)
@@ -117,23 +202,19 @@ def insertar_productos(cursor, fabricantes_ids, categorias_ids, ubicaciones_ids)
         costo = random.randint(4000, 60000)
         precio = int(costo * random.uniform(1.25, 1.9))
         ubi_id = random.choice(ubicaciones_ids)
-        productos_data.append((i, nombre, fab_id, cat_id, sku, costo, precio, ubi_id))
+        productos_copy.agregar((i, nombre, fab_id, cat_id, sku, costo, precio, ubi_id))
 
-    prod_sql = """
-    INSERT INTO productos (producto_id, nombre_articulo, fabricante_fk, categoria_fk, sku, costo, precio, ubicacion_fk)
-    VALUES (%s, %s, %s, %s, %s, %s, %s, %s);
-    """
-    cursor.executemany(prod_sql, productos_data)
-    print(f"{len(productos_data)} productos insertados.")
+    print(f"{productos_copy.cerrar()} productos insertados.")
     return producto_ids
 
-def insertar_hechos(cursor, producto_ids, cliente_ids, ubicaciones_ids, mov_type_ids: dict):
-    ventas_data, stock_data = [], []
+def insertar_hechos(cursor, producto_ids, cliente_ids, ubicaciones_ids, mov_type_ids: dict, n_ventas: int = N_VENTAS, n_mov_otros: int = N_MOV_STOCK_OTROS):
+    ventas_copy = CargadorCopy(cursor, "hechos_ventas", ["nro_boleta", "producto_fk", "fecha", "cliente_fk", "cantidad", "costo_unitario", "total_venta"])
+    stock_copy = CargadorCopy(cursor, "hechos_stock", ["producto_fk", "fecha", "ubicacion_fk", "tipo_movimiento_fk", "cantidad"])
     productos_info = {}
 
     cursor.execute("SELECT producto_id, costo, precio FROM productos;")
     for prod_id, costo, precio in cursor.fetchall():
-        productos_info[prod_id] = {'costo': int(costo or 0), 'precio': int(precio or 0)}
+        productos_info[prod_id] = (int(costo or 0), int(precio or 0))
 
     print("Generando stock inicial...")
     tipo_mov_id_ini = mov_type_ids.get('ENTRADA_INI')
@@ -145,7 +226,7 @@ def insertar_hechos(cursor, producto_ids, cliente_ids, ubicaciones_ids, mov_type
         if random.random() < 0.8:
             cantidad_inicial = random.randint(20, 150)
             ubi_id = random.choice(ubicaciones_ids) if random.random() > 0.1 else None
-            stock_data.append((prod_id, fecha_inicial, ubi_id, tipo_mov_id_ini, cantidad_inicial))
+            stock_copy.agregar((prod_id, fecha_inicial, ubi_id, tipo_mov_id_ini, cantidad_inicial))
 
     print("Simulando ventas y salidas de stock (CLP)...")
     tipo_mov_id_vta = mov_type_ids.get('SALIDA_VTA')
@@ -153,7 +234,7 @@ def insertar_hechos(cursor, producto_ids, cliente_ids, ubicaciones_ids, mov_type
         print("ID de tipo de movimiento 'SALIDA_VTA' no encontrado.")
         raise ValueError("ID 'SALIDA_VTA' no encontrado.")
 
-    for _ in range(1, N_VENTAS + 1):
+    for _ in range(1, n_ventas + 1):
         nro_boleta = random.randint(10000, 99999)
         prod_id = random.choice(producto_ids)
         fecha_venta = generar_fecha_aleatoria()
@@ -163,13 +244,12 @@ def insertar_hechos(cursor, producto_ids, cliente_ids, ubicaciones_ids, mov_type
             print(f"Producto ID {prod_id} no encontrado en productos_info durante la simulación de ventas. Saltando esta venta.")
             continue
 
-        costo_unitario = productos_info[prod_id]['costo']
-        precio_unitario = productos_info[prod_id]['precio']
+        costo_unitario, precio_unitario = productos_info[prod_id]
         total_venta = int(precio_unitario * cantidad_venta)
 
-        ventas_data.append((nro_boleta, prod_id, fecha_venta, cli_id, cantidad_venta, costo_unitario, total_venta))
+        ventas_copy.agregar((nro_boleta, prod_id, fecha_venta, cli_id, cantidad_venta, costo_unitario, total_venta))
         ubi_id_venta = random.choice(ubicaciones_ids) if random.random() > 0.2 else None
-        stock_data.append((prod_id, fecha_venta, ubi_id_venta, tipo_mov_id_vta, -cantidad_venta))
+        stock_copy.agregar((prod_id, fecha_venta, ubi_id_venta, tipo_mov_id_vta, -cantidad_venta))
 
     print("Simulando otras entradas y ajustes de stock...")
     tipo_mov_compra_id = mov_type_ids.get('ENTRADA_COMPRA')
@@ -180,7 +260,7 @@ def insertar_hechos(cursor, producto_ids, cliente_ids, ubicaciones_ids, mov_type
     if not otros_tipos_ids:
         print("No se encontraron IDs para tipos de movimiento 'ENTRADA_COMPRA', 'AJUSTE_INV_POS', 'AJUSTE_INV_NEG'. No se simularán estos movimientos.")
 
-    for _ in range(1, N_MOV_STOCK_OTROS + 1):
+    for _ in range(1, n_mov_otros + 1):
          if not otros_tipos_ids: break
          prod_id = random.choice(producto_ids)
          fecha_mov = generar_fecha_aleatoria()
@@ -190,13 +270,10 @@ def insertar_hechos(cursor, producto_ids, cliente_ids, ubicaciones_ids, mov_type
          if tipo_mov_id == tipo_mov_compra_id: cantidad_mov = random.randint(10, 60)
          elif tipo_mov_id == tipo_mov_aj_pos_id: cantidad_mov = random.randint(1, 5)
          elif tipo_mov_id == tipo_mov_aj_neg_id: cantidad_mov = -random.randint(1, 5)
-         stock_data.append((prod_id, fecha_mov, ubi_id, tipo_mov_id, cantidad_mov))
+         stock_copy.agregar((prod_id, fecha_mov, ubi_id, tipo_mov_id, cantidad_mov))
 
-    sql_ventas = "INSERT INTO hechos_ventas (nro_boleta, producto_fk, fecha, cliente_fk, cantidad, costo_unitario, total_venta) VALUES (%s, %s, %s, %s, %s, %s, %s);"
-    cursor.executemany(sql_ventas, ventas_data)
-
-    sql_stock = "INSERT INTO hechos_stock (producto_fk, fecha, ubicacion_fk, tipo_movimiento_fk, cantidad) VALUES (%s, %s, %s, %s, %s);"
-    cursor.executemany(sql_stock, stock_data)
+    ventas_copy.cerrar()
+    stock_copy.cerrar()
 
 def actualizar_stock_productos(cursor):
     print("Calculando y actualizando stock_actual en productos...")
@@ -210,7 +287,7 @@ def actualizar_stock_productos(cursor):
     """
     sql_update_cero = """
     UPDATE productos SET stock_actual = 0
-    WHERE producto_id NOT IN (SELECT DISTINCT producto_fk FROM hechos_stock);
+    WHERE NOT EXISTS (SELECT 1 FROM hechos_stock hs WHERE hs.producto_fk = productos.producto_id);
     """
     try:
         cursor.execute(sql_update_stock)
@@ -222,11 +299,16 @@ def actualizar_stock_productos(cursor):
         print(f"ERROR al actualizar stock_actual en productos: {e}")
         raise
 
-def main():
+def main(scale: float = 1.0, seed: int = None):
     if not config.check_db_config():
         print("Configuración de base de datos invalida. Revisa los logs")
         return
 
+    tamaños = calcular_tamaños(scale)
+    if seed is not None:
+        random.seed(seed)
+    print(f"Generando datos con escala {scale} y semilla {seed}: {tamaños}")
+
     conn = None
     try:
         conn = get_db_connection()
@@ -243,13 +325,17 @@ def main():
                      raise ValueError("Faltan IDs de tipos de movimiento esenciales.")
 
                 print("PASO 2: Insertando Dimensiones Principales...")
-                f_ids, c_ids, u_ids, cli_ids = insertar_dimensiones_principales(cursor)
+                f_ids, c_ids, u_ids, cli_ids = insertar_dimensiones_principales(cursor, tamaños)
 
                 print("PASO 3: Insertando Productos...")
-                p_ids = insertar_productos(cursor, f_ids, c_ids, u_ids)
+                p_ids = insertar_productos(cursor, f_ids, c_ids, u_ids, tamaños['productos'])
 
                 print("PASO 4: Insertando Hechos (Ventas y Stock)...")
-                insertar_hechos(cursor, p_ids, cli_ids, u_ids, mov_type_ids)
+                # Los hechos están particionados por año: cada año simulado tiene su partición antes del COPY
+                creadas = crear_particiones_anuales(cursor, range(AÑO_INICIO_SIM, AÑO_FIN_SIM + 1))
+                if creadas:
+                    print(f"  Particiones creadas: {', '.join(creadas)}")
+                insertar_hechos(cursor, p_ids, cli_ids, u_ids, mov_type_ids, tamaños['ventas'], tamaños['mov_stock_otros'])
 
                 print("PASO 5: Actualizando stock_actual en productos...")
                 actualizar_stock_productos(cursor)
@@ -262,4 +348,8 @@ def main():
             print("--- Conexión a la base de datos cerrada. ---")
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Puebla el esquema estrella con datos ficticios.")
+    parser.add_argument("--scale", type=float, default=1.0, help="Factor de escala de clientes, productos y hechos (1 = 480 ventas).")
+    parser.add_argument("--seed", type=int, default=None, help="Semilla aleatoria; la misma semilla y escala generan los mismos datos.")
+    args = parser.parse_args()
+    main(args.scale, args.seed)
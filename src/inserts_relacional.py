@@ -4,11 +4,65 @@ import sys
 import os
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
+import argparse
 import psycopg2
+import psycopg2.extras
 import random
 import datetime
+import threading
+import time
+from collections import Counter, namedtuple
 from dateutil.relativedelta import relativedelta
 from src.database import get_db_connection
+from src.dimensiones import DIMENSIONES_RELACIONAL
+from src.skus import prefijo_sku, formatear_sku, reservar_skus
+
+# Tamaños con --scale 1. Los catálogos (categorías, fabricantes, ubicaciones) son fijos.
+N_CLIENTES = 150
+N_PRODUCTOS = 200
+VENTAS_MES_MIN = 480
+VENTAS_MES_MAX = 520
+AÑOS_SIMULADOS = 3
+# sobre esta cantidad de clientes los RUT se derivan del índice para evitar choques
+MAX_CLIENTES_RUT_ALEATORIO = 100000
+
+# Evento de avance de ejecutar_carga():
+#   etapa         -> nombre de la etapa en curso
+#   filas         -> filas escritas hasta ahora
+#   filas_por_seg -> ritmo promedio desde el inicio
+#   eta_seg       -> segundos estimados para terminar (None si aún no hay ritmo)
+#   fraccion      -> avance estimado entre 0 y 1 (meses de ventas registrados)
+ProgresoCarga = namedtuple('ProgresoCarga', ['etapa', 'filas', 'filas_por_seg', 'eta_seg', 'fraccion'])
+
+class CargaCancelada(Exception):
+    """Se canceló la carga de datos de prueba antes de terminar."""
+
+# Filas por sentencia INSERT (page_size de execute_values) en las etapas de clientes, productos y
+# stock inicial; entre lote y lote se revisa si se pidió cancelar la carga
+LOTE_INSERCION = 1000
+
+def _revisar_cancelacion(cancelar: threading.Event | None, etapa: str):
+    if cancelar is not None and cancelar.is_set():
+        raise CargaCancelada(f"Carga cancelada durante la etapa '{etapa}'.")
+
+def _insertar_por_lotes(cursor, sql_query: str, filas: list, cancelar: threading.Event | None, etapa: str, template: str = None):
+    """execute_values en lotes de LOTE_INSERCION filas, revisando `cancelar` antes de cada uno."""
+    for inicio in range(0, len(filas), LOTE_INSERCION):
+        _revisar_cancelacion(cancelar, etapa)
+        psycopg2.extras.execute_values(cursor, sql_query, filas[inicio:inicio + LOTE_INSERCION], template=template, page_size=LOTE_INSERCION)
+
+def calcular_tamaños(scale: float = 1.0) -> dict:
+    """
+    Devuelve la cantidad de clientes, productos y ventas mensuales para un factor de escala.
+    Con scale=1 se generan ~18 mil ventas en 3 años; el resto crece en proporción.
+    """
+    if scale <= 0:
+        raise ValueError("El factor de escala debe ser mayor que 0.")
+    return {
+        'clientes': max(1, round(N_CLIENTES * scale)),
+        'productos': max(1, round(N_PRODUCTOS * scale)),
+        'ventas_mes': (max(1, round(VENTAS_MES_MIN * scale)), max(1, round(VENTAS_MES_MAX * scale))),
+    }
 
 def limpiar_tablas(conn):
     with conn.cursor() as cursor:
@@ -28,45 +82,53 @@ def insertar_catalogos(conn):
         cursor.executemany("INSERT INTO \"Ubicaciones\" (descripcion) VALUES (%s);", ubicaciones)
     conn.commit()
     print("Catálogos insertados.")
+    return len(categorias) + len(fabricantes) + len(ubicaciones)
 
-def insertar_clientes(conn, cantidad):
+def insertar_clientes(conn, cantidad, cancelar: threading.Event = None):
     with conn.cursor() as cursor:
         print(f"Insertando {cantidad} clientes...")
         nombres = ["Ana", "Juan", "Maria", "Pedro", "Luisa", "Carlos", "Sofia", "Miguel", "Laura", "Diego"]
         apellidos = ["Gonzalez", "Rodriguez", "Gomez", "Fernandez", "Lopez", "Martinez", "Perez", "Sanchez"]
+        ruts_aleatorios = cantidad <= MAX_CLIENTES_RUT_ALEATORIO
+        clientes = []
         for i in range(cantidad):
-            rut = f"{random.randint(10000000, 25000000)}-{random.randint(0,9)}"
+            if i % LOTE_INSERCION == 0:
+                _revisar_cancelacion(cancelar, "Clientes")
+            if ruts_aleatorios:
+                rut = f"{random.randint(10000000, 25000000)}-{random.randint(0,9)}"
+            else:
+                rut = f"{10000000 + i}-{random.randint(0,9)}"
             nombre = f"{random.choice(nombres)} {random.choice(apellidos)}"
-            cursor.execute("INSERT INTO \"Clientes\" (rut, nombre_completo) VALUES (%s, %s) ON CONFLICT (rut) DO NOTHING;", (rut, nombre))
+            clientes.append((rut, nombre))
+        _insertar_por_lotes(cursor, "INSERT INTO \"Clientes\" (rut, nombre_completo) VALUES %s ON CONFLICT (rut) DO NOTHING;", clientes, cancelar, "Clientes")
     conn.commit()
     print("Clientes insertados.")
 
 
-def insertar_productos(conn, cantidad):
-    """Inserta productos con nombres genéricos y SKUs estructurados."""
+def insertar_productos(conn, cantidad, cancelar: threading.Event = None):
+    """
+    Inserta productos con nombres genéricos y SKUs estructurados.
+    Si `cancelar` se activa, lanza CargaCancelada antes del siguiente lote (sin confirmar nada).
+    """
     with conn.cursor() as cursor:
         print(f"Insertando {cantidad} productos con SKUs consistentes...")
-        cursor.execute("SELECT categoria_id, nombre FROM \"Categorias\";")
-        categorias = {row[0]: row[1] for row in cursor.fetchall()}
-        cursor.execute("SELECT fabricante_id, nombre FROM \"Fabricantes\";")
-        fabricantes = {row[0]: row[1] for row in cursor.fetchall()}
-        cursor.execute("SELECT ubicacion_id FROM \"Ubicaciones\";")
-        ubi_ids = [row[0] for row in cursor.fetchall()]
+        # Los catálogos recién insertados se cargan en la caché compartida con una sola consulta
+        DIMENSIONES_RELACIONAL.invalidar()
+        categorias = DIMENSIONES_RELACIONAL.mapa('categoria', conn)
+        fabricantes = DIMENSIONES_RELACIONAL.mapa('fabricante', conn)
+        ubi_ids = list(DIMENSIONES_RELACIONAL.mapa('ubicacion', conn))
         nombres_base = ["Kit de Mantenimiento", "Componente de Motor", "Sistema de Frenado", "Filtro de Alto Flujo", "Aceite Sintético Avanzado", "Batería de Larga Duración", "Amortiguador de Gas"]
         modelos = ["Serie 100", "Pro-V", "XLT", "Gold Standard", "Eco-Max", "Ultra-Duty"]
 
-        sku_counters = {}
+        cat_ids = list(categorias.keys())
+        fab_ids = list(fabricantes.keys())
+        productos = []
 
         for i in range(cantidad):
-            cat_id = random.choice(list(categorias.keys()))
-            fab_id = random.choice(list(fabricantes.keys()))
-
-            fab_prefix = fabricantes[fab_id][:3].upper()
-            cat_prefix = categorias[cat_id][:3].upper()
-            combo_key = f"{fab_prefix}-{cat_prefix}"
-            current_seq = sku_counters.get(combo_key, 0) + 1
-            sku_counters[combo_key] = current_seq
-            sku = f"{combo_key}-{current_seq:04d}"
+            if i % LOTE_INSERCION == 0:
+                _revisar_cancelacion(cancelar, "Productos")
+            cat_id = random.choice(cat_ids)
+            fab_id = random.choice(fab_ids)
 
             nombre = f"{random.choice(nombres_base)} {random.choice(modelos)} {random.randint(100, 999)}"
 
@@ -74,81 +136,234 @@ def insertar_productos(conn, cantidad):
             costo_unitario = precio_venta * round(random.uniform(0.6, 0.8), 2)
             stock = 0
 
-            params = (nombre, sku, costo_unitario, precio_venta, stock, cat_id, fab_id, random.choice(ubi_ids))
-            cursor.execute("""
-                INSERT INTO "Productos" (nombre, sku, costo_unitario, precio_venta, stock, categoria_id, fabricante_id, ubicacion_id)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s);
-            """, params)
+            productos.append([nombre, None, costo_unitario, precio_venta, stock, cat_id, fab_id, random.choice(ubi_ids)])
+
+        # Los números de SKU se reservan en bloque en "SkuSecuencias", en la misma transacción
+        cantidades = Counter((producto[6], producto[5]) for producto in productos)
+        siguiente = reservar_skus(cursor, cantidades)
+        for producto in productos:
+            cat_id, fab_id = producto[5], producto[6]
+            producto[1] = formatear_sku(prefijo_sku(fabricantes[fab_id], categorias[cat_id]), siguiente[(fab_id, cat_id)])
+            siguiente[(fab_id, cat_id)] += 1
+        _insertar_por_lotes(cursor, """
+            INSERT INTO "Productos" (nombre, sku, costo_unitario, precio_venta, stock, categoria_id, fabricante_id, ubicacion_id)
+            VALUES %s;
+        """, productos, cancelar, "Productos")
     conn.commit()
     print("Productos insertados.")
 
-def registrar_movimientos_stock_inicial(conn):
+def registrar_movimientos_stock_inicial(conn, cancelar: threading.Event = None):
     with conn.cursor() as cursor:
         print("Registrando stock inicial...")
-        cursor.execute("SELECT producto_id, ubicacion_id FROM \"Productos\";")
+        cursor.execute("SELECT producto_id, ubicacion_id FROM \"Productos\" ORDER BY producto_id;")
         productos = cursor.fetchall()
-        for prod_id, ubi_id in productos:
-            cantidad_inicial = random.randint(20, 100)
-            cursor.execute("INSERT INTO \"MovimientosInventario\" (tipo, cantidad, producto_id, ubicacion_id) VALUES ('compra_inicial', %s, %s, %s);", (cantidad_inicial, prod_id, ubi_id))
-            cursor.execute("UPDATE \"Productos\" SET stock = stock + %s WHERE producto_id = %s;", (cantidad_inicial, prod_id))
+        movimientos = [(random.randint(20, 100), prod_id, ubi_id) for prod_id, ubi_id in productos]
+        _insertar_por_lotes(cursor, "INSERT INTO \"MovimientosInventario\" (tipo, cantidad, producto_id, ubicacion_id) VALUES %s;", movimientos, cancelar,
+                            "Stock inicial", template="('compra_inicial', %s, %s, %s)")
+        psycopg2.extras.execute_values(cursor, """
+            UPDATE "Productos" p SET stock = p.stock + v.cantidad
+            FROM (VALUES %s) AS v (cantidad, producto_id)
+            WHERE p.producto_id = v.producto_id;
+        """, [(cantidad, prod_id) for cantidad, prod_id, _ in movimientos], page_size=1000)
     conn.commit()
     print("Stock inicial registrado y actualizado.")
 
-def registrar_ventas_periodo(conn):
+def _simular_ventas_mes(current_month_start: datetime.date, ventas_mes: tuple, cliente_ruts: list, productos_disponibles: list):
+    """
+    Sortea las ventas de un mes: devuelve una lista de (boleta, fecha, cliente_rut, items),
+    con items = [(producto_id, precio, cantidad), ...]. No revisa stock.
+    Los sorteos se hacen siempre en el mismo orden para que ambos modos de registro generen los mismos datos.
+    """
+    ventas = []
+    num_ventas_mes = random.randint(*ventas_mes)
+    days_in_month = (current_month_start + relativedelta(months=1) - datetime.timedelta(days=1)).day
+    for _ in range(num_ventas_mes):
+        cliente_rut = random.choice(cliente_ruts)
+        boleta = f"BOL-{random.randint(10000, 99999)}"
+        random_day = random.randint(1, days_in_month)
+        fecha = datetime.datetime(current_month_start.year, current_month_start.month, random_day, random.randint(9, 18), random.randint(0, 59))
+        items = []
+        num_productos_en_venta = random.randint(1, 4)
+        for _ in range(num_productos_en_venta):
+            prod_id, precio = random.choice(productos_disponibles)
+            items.append((prod_id, precio, random.randint(1, 5)))
+        ventas.append((boleta, fecha, cliente_rut, items))
+    return ventas
+
+def _registrar_ventas_mes_fila_a_fila(cursor, ventas: list) -> int:
+    filas = 0
+    for boleta, fecha, cliente_rut, items in ventas:
+        cursor.execute("INSERT INTO \"Ventas\" (boleta_numero, fecha, cliente_rut) VALUES (%s, %s, %s) RETURNING venta_id;", (boleta, fecha, cliente_rut))
+        venta_id = cursor.fetchone()[0]
+        filas += 1
+        for prod_id, precio, cantidad in items:
+            cursor.execute("SELECT stock FROM \"Productos\" WHERE producto_id = %s;", (prod_id,))
+            stock_actual = cursor.fetchone()[0]
+            if stock_actual < cantidad:
+                continue
+            subtotal = cantidad * precio
+            cursor.execute("INSERT INTO \"DetallesVenta\" (venta_id, producto_id, cantidad, precio_unitario, subtotal) VALUES (%s, %s, %s, %s, %s);", (venta_id, prod_id, cantidad, precio, subtotal))
+            cursor.execute("UPDATE \"Productos\" SET stock = stock - %s WHERE producto_id = %s;", (cantidad, prod_id))
+            cursor.execute("INSERT INTO \"MovimientosInventario\" (tipo, cantidad, producto_id) VALUES ('venta_cliente', %s, %s);", (cantidad, prod_id))
+            filas += 2
+    return filas
+
+def _registrar_ventas_mes_por_lotes(cursor, ventas: list, stock: dict) -> int:
+    """
+    Registra las ventas de un mes con pocas sentencias: reserva los venta_id de una vez,
+    revisa el stock contra el mapa en memoria `stock` (que se actualiza), inserta las tres tablas
+    con INSERT multi-fila y descuenta el stock con un solo UPDATE. Devuelve las filas insertadas.
+    """
+    if not ventas:
+        return 0
+    cursor.execute("SELECT nextval(pg_get_serial_sequence('\"Ventas\"', 'venta_id')) FROM generate_series(1, %s);", (len(ventas),))
+    venta_ids = sorted(row[0] for row in cursor.fetchall())
+
+    filas_ventas, filas_detalles, filas_movimientos = [], [], []
+    descuentos = {}
+    for venta_id, (boleta, fecha, cliente_rut, items) in zip(venta_ids, ventas):
+        filas_ventas.append((venta_id, boleta, fecha, cliente_rut))
+        for prod_id, precio, cantidad in items:
+            if stock[prod_id] < cantidad:
+                continue
+            stock[prod_id] -= cantidad
+            descuentos[prod_id] = descuentos.get(prod_id, 0) + cantidad
+            filas_detalles.append((venta_id, prod_id, cantidad, precio, cantidad * precio))
+            filas_movimientos.append((cantidad, prod_id))
+
+    psycopg2.extras.execute_values(cursor, "INSERT INTO \"Ventas\" (venta_id, boleta_numero, fecha, cliente_rut) VALUES %s;", filas_ventas, page_size=1000)
+    psycopg2.extras.execute_values(cursor, "INSERT INTO \"DetallesVenta\" (venta_id, producto_id, cantidad, precio_unitario, subtotal) VALUES %s;", filas_detalles, page_size=1000)
+    psycopg2.extras.execute_values(cursor, "INSERT INTO \"MovimientosInventario\" (tipo, cantidad, producto_id) VALUES %s;", filas_movimientos, template="('venta_cliente', %s, %s)", page_size=1000)
+    if descuentos:
+        psycopg2.extras.execute_values(cursor, """
+            UPDATE "Productos" p SET stock = p.stock - v.cantidad
+            FROM (VALUES %s) AS v (producto_id, cantidad)
+            WHERE p.producto_id = v.producto_id;
+        """, list(descuentos.items()), page_size=len(descuentos))
+    return len(filas_ventas) + len(filas_detalles) + len(filas_movimientos)
+
+def _meses_periodo(fecha_fin: datetime.date) -> list:
+    """Primer día de cada mes simulado del período de AÑOS_SIMULADOS años que termina en `fecha_fin`."""
+    start_date = fecha_fin - relativedelta(years=AÑOS_SIMULADOS)
+    meses = []
+    current_month_start = datetime.date(start_date.year, start_date.month, 1)
+    while current_month_start < fecha_fin:
+        meses.append(current_month_start)
+        current_month_start += relativedelta(months=1)
+    return meses
+
+def registrar_ventas_periodo(conn, ventas_mes: tuple = (VENTAS_MES_MIN, VENTAS_MES_MAX), fecha_fin: datetime.date = None,
+                             por_lotes: bool = True, progreso=None):
+    """
+    Simula las ventas mensuales de los AÑOS_SIMULADOS años que terminan en `fecha_fin` (hoy por defecto).
+    Para obtener los mismos datos con la misma semilla hay que fijar también `fecha_fin`.
+    Con `por_lotes` (por defecto) cada mes se escribe con unas pocas sentencias; con por_lotes=False
+    se usa el registro original venta por venta. Ambos modos producen los mismos datos.
+    `progreso`, si se entrega, se llama después de cada mes con (meses_hechos, meses_totales, filas_del_mes);
+    si lanza una excepción el período completo queda sin confirmar.
+    """
     with conn.cursor() as cursor:
-        print("Registrando ventas para el período de 3 años...")
-        cursor.execute("SELECT rut FROM \"Clientes\";")
+        print(f"Registrando ventas para el período de {AÑOS_SIMULADOS} años...")
+        cursor.execute("SELECT rut FROM \"Clientes\" ORDER BY rut;")
         cliente_ruts = [row[0] for row in cursor.fetchall()]
-        cursor.execute("SELECT producto_id, precio_venta FROM \"Productos\" WHERE stock > 0;")
-        productos_disponibles = cursor.fetchall()
-        if not productos_disponibles:
+        cursor.execute("SELECT producto_id, precio_venta, stock FROM \"Productos\" WHERE stock > 0 ORDER BY producto_id;")
+        filas_productos = cursor.fetchall()
+        if not filas_productos:
             print("No hay productos con stock para vender.")
             return
-        end_date = datetime.date.today()
-        start_date = end_date - relativedelta(years=3)
+        productos_disponibles = [(prod_id, precio) for prod_id, precio, _ in filas_productos]
+        stock = {prod_id: stock_actual for prod_id, _, stock_actual in filas_productos}
+        meses = _meses_periodo(fecha_fin or datetime.date.today())
         total_ventas = 0
-        current_month_start = datetime.date(start_date.year, start_date.month, 1)
-        while current_month_start < end_date:
-            num_ventas_mes = random.randint(480, 520)
-            for _ in range(num_ventas_mes):
-                cliente_rut = random.choice(cliente_ruts)
-                boleta = f"BOL-{random.randint(10000, 99999)}"
-                days_in_month = (current_month_start + relativedelta(months=1) - datetime.timedelta(days=1)).day
-                random_day = random.randint(1, days_in_month)
-                fecha = datetime.datetime(current_month_start.year, current_month_start.month, random_day, random.randint(9, 18), random.randint(0, 59))
-                cursor.execute("INSERT INTO \"Ventas\" (boleta_numero, fecha, cliente_rut) VALUES (%s, %s, %s) RETURNING venta_id;", (boleta, fecha, cliente_rut))
-                venta_id = cursor.fetchone()[0]
-                num_productos_en_venta = random.randint(1, 4)
-                for _ in range(num_productos_en_venta):
-                    prod_id, precio = random.choice(productos_disponibles)
-                    cantidad = random.randint(1, 5)
-                    cursor.execute("SELECT stock FROM \"Productos\" WHERE producto_id = %s;", (prod_id,))
-                    stock_actual = cursor.fetchone()[0]
-                    if stock_actual < cantidad:
-                        continue
-                    subtotal = cantidad * precio
-                    cursor.execute("INSERT INTO \"DetallesVenta\" (venta_id, producto_id, cantidad, precio_unitario, subtotal) VALUES (%s, %s, %s, %s, %s);", (venta_id, prod_id, cantidad, precio, subtotal))
-                    cursor.execute("UPDATE \"Productos\" SET stock = stock - %s WHERE producto_id = %s;", (cantidad, prod_id))
-                    cursor.execute("INSERT INTO \"MovimientosInventario\" (tipo, cantidad, producto_id) VALUES ('venta_cliente', %s, %s);", (cantidad, prod_id))
-            total_ventas += num_ventas_mes
-            print(f"  - Mes {current_month_start.strftime('%Y-%m')}: {num_ventas_mes} ventas registradas.")
-            current_month_start += relativedelta(months=1)
+        for i, current_month_start in enumerate(meses, start=1):
+            ventas = _simular_ventas_mes(current_month_start, ventas_mes, cliente_ruts, productos_disponibles)
+            if por_lotes:
+                filas = _registrar_ventas_mes_por_lotes(cursor, ventas, stock)
+            else:
+                filas = _registrar_ventas_mes_fila_a_fila(cursor, ventas)
+            total_ventas += len(ventas)
+            print(f"  - Mes {current_month_start.strftime('%Y-%m')}: {len(ventas)} ventas registradas.")
+            if progreso:
+                progreso(i, len(meses), filas)
     conn.commit()
     print(f"Ventas registradas. Total aproximado: {total_ventas}")
 
+def ejecutar_carga(scale: float = 1.0, seed: int = None, fecha_fin: datetime.date = None, por_lotes: bool = True,
+                   progreso=None, cancelar: threading.Event = None) -> int:
+    """
+    Puebla el esquema relacional con datos de prueba en el proceso actual y devuelve las filas escritas.
+    Pensada para correr en un hilo de trabajo (la GUI) o desde la línea de comandos.
+    `progreso`, si se entrega, recibe un ProgresoCarga al terminar cada etapa y cada mes de ventas.
+    Si `cancelar` se activa, la carga se detiene antes del siguiente lote de clientes, productos o
+    stock inicial, o al terminar el mes de ventas en curso; deshace lo
+    que no se haya confirmado, vacía las tablas (para no dejar una carga a medias) y lanza CargaCancelada.
+    Los errores de base de datos se propagan como psycopg2.Error.
+    """
+    tamaños = calcular_tamaños(scale)
+    if seed is not None:
+        random.seed(seed)
+    fecha_fin = fecha_fin or datetime.date.today()
+    inicio = time.monotonic()
+    avance = {'filas': 0, 'fraccion': 0.0, 'eta': None, 'inicio_ventas': None}
+
+    def informar(etapa: str, filas: int = 0):
+        avance['filas'] += filas
+        if progreso:
+            segundos = time.monotonic() - inicio
+            ritmo = avance['filas'] / segundos if segundos > 0 else 0.0
+            progreso(ProgresoCarga(etapa, avance['filas'], ritmo, avance['eta'], avance['fraccion']))
+        if cancelar is not None and cancelar.is_set():
+            raise CargaCancelada(f"Carga cancelada durante la etapa '{etapa}'.")
+
+    def informar_mes(hechos: int, totales: int, filas: int):
+        # Las ventas son casi todo el trabajo, así que el avance y la ETA se miden en meses
+        segundos = time.monotonic() - avance['inicio_ventas']
+        avance['fraccion'] = hechos / totales
+        avance['eta'] = segundos / hechos * (totales - hechos)
+        informar(f"Ventas: mes {hechos} de {totales}", filas)
 
-if __name__ == "__main__":
     conn = get_db_connection()
-    if conn:
-        try:
-            limpiar_tablas(conn)
-            insertar_catalogos(conn)
-            insertar_clientes(conn, 150)
-            insertar_productos(conn, 200)
-            registrar_movimientos_stock_inicial(conn)
-            registrar_ventas_periodo(conn)
-        except psycopg2.Error as e:
-            print(f"Ocurrió un error de base de datos: {e}")
-        finally:
-            conn.close()
-            print("Proceso finalizado. Conexión cerrada.")
+    if conn is None:
+        raise psycopg2.OperationalError("No se pudo conectar a la base de datos.")
+    try:
+        informar("Limpiando tablas")
+        limpiar_tablas(conn)
+        informar("Catálogos insertados", insertar_catalogos(conn))
+        insertar_clientes(conn, tamaños['clientes'], cancelar)
+        informar("Clientes insertados", tamaños['clientes'])
+        insertar_productos(conn, tamaños['productos'], cancelar)
+        informar("Productos insertados", tamaños['productos'])
+        registrar_movimientos_stock_inicial(conn, cancelar)
+        informar("Stock inicial registrado", tamaños['productos'])
+        avance['inicio_ventas'] = time.monotonic()
+        registrar_ventas_periodo(conn, tamaños['ventas_mes'], fecha_fin, por_lotes=por_lotes, progreso=informar_mes)
+        informar("Carga terminada")
+        return avance['filas']
+    except CargaCancelada:
+        conn.rollback()
+        limpiar_tablas(conn)
+        DIMENSIONES_RELACIONAL.invalidar()
+        raise
+    except psycopg2.Error:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+        print("Proceso finalizado. Conexión cerrada.")
+
+def _imprimir_progreso(evento: ProgresoCarga):
+    eta = f", faltan ~{evento.eta_seg:.0f} s" if evento.eta_seg is not None else ""
+    print(f"INFO: {evento.etapa} ({evento.filas} filas, {evento.filas_por_seg:.0f} filas/s{eta})")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Puebla el esquema relacional con datos de prueba.")
+    parser.add_argument("--scale", type=float, default=1.0, help="Factor de escala de clientes, productos y ventas (1 = ~18 mil ventas).")
+    parser.add_argument("--seed", type=int, default=None, help="Semilla aleatoria; junto con --hasta reproduce los mismos datos.")
+    parser.add_argument("--hasta", type=datetime.date.fromisoformat, default=None, help="Último día del período simulado (AAAA-MM-DD). Por defecto hoy.")
+    parser.add_argument("--fila-a-fila", action="store_true", help="Registra las ventas una por una en lugar de por lotes mensuales.")
+    args = parser.parse_args()
+
+    try:
+        ejecutar_carga(args.scale, args.seed, args.hasta, por_lotes=not args.fila_a_fila, progreso=_imprimir_progreso)
+    except psycopg2.Error as e:
+        print(f"Ocurrió un error de base de datos: {e}")
@@ -1,3 +1,4 @@
+import argparse
 import sys
 import os
 
@@ -9,26 +10,40 @@ from src.analysis import (
     analizar_evolucion_stock,
     analizar_distribucion_tipos_movimiento,
     analizar_top_productos_vendidos_en_rango,
-    analizar_ventas_por_cliente
+    analizar_ventas_por_cliente,
+    analizar_año,
+    analizar_años,
+    seleccionar_productos_stock
 )
 from src.config import check_db_config
 from src.database import test_connection
+from src.resumenes import refrescar_resumenes
+from src import cache_resultados
 from src.inserts import (AÑO_INICIO_SIM, AÑO_FIN_SIM)
 
-def ejecutar_analisis_completo(year_analisis: int):
+def ejecutar_analisis_completo(year_analisis: int, lote: bool = False, jobs: int = 1):
     """
     Ejecuta todos los análisis definidos para el año especificado.
+    Con `lote` los análisis anuales se derivan de una sola lectura de ventas y una de stock.
+    Con `jobs` > 1 las consultas corren en un pool de hilos y los gráficos en un pool de procesos.
     """
     print(f"============================================================")
     print(f"INICIANDO ANÁLISIS PARA EL AÑO: {year_analisis}")
     print(f"============================================================")
 
-    analizar_ventas_por_mes(year_analisis)
-    analizar_top_productos_vendidos(year_analisis)
-    analizar_ventas_por_categoria(year_analisis)
-    analizar_evolucion_stock(year_analisis)
-    analizar_distribucion_tipos_movimiento(year_analisis)
-    analizar_ventas_por_cliente(year_analisis)
+    print("INFO: Actualizando tablas de resumen con los hechos nuevos...")
+    if not refrescar_resumenes():
+        print("WARNING: No se pudieron actualizar los resúmenes; los análisis pueden no incluir los últimos hechos.")
+
+    if lote or jobs > 1:
+        analizar_año(year_analisis, lote=lote, jobs=jobs)
+    else:
+        analizar_ventas_por_mes(year_analisis)
+        analizar_top_productos_vendidos(year_analisis)
+        analizar_ventas_por_categoria(year_analisis)
+        analizar_evolucion_stock(year_analisis)
+        analizar_distribucion_tipos_movimiento(year_analisis)
+        analizar_ventas_por_cliente(year_analisis)
     analizar_top_productos_vendidos_en_rango(year_analisis)
 
     print(f"\n============================================================")
@@ -36,7 +51,58 @@ def ejecutar_analisis_completo(year_analisis: int):
     print(f"Los gráficos se han guardado en la carpeta '{os.path.join(os.getcwd(), 'output')}'.")
     print(f"============================================================")
 
+def ejecutar_analisis_multianual(years: list, jobs: int = 1, comparar: bool = False):
+    """
+    Ejecuta los análisis anuales de varios años en un solo proceso, leyendo los datos de
+    todos los años con una consulta por tabla. El análisis interactivo por rango de fechas
+    se omite porque está pensado para un solo año.
+    """
+    print(f"============================================================")
+    print(f"INICIANDO ANÁLISIS PARA LOS AÑOS: {', '.join(str(year) for year in years)}")
+    print(f"============================================================")
+
+    print("INFO: Actualizando tablas de resumen con los hechos nuevos...")
+    if not refrescar_resumenes():
+        print("WARNING: No se pudieron actualizar los resúmenes; los análisis pueden no incluir los últimos hechos.")
+
+    analizar_años(years, jobs=jobs, comparar=comparar)
+    print("INFO: El análisis interactivo por rango de fechas se omite al analizar varios años.")
+
+    print(f"\n============================================================")
+    print(f"TODOS LOS ANÁLISIS PARA LOS AÑOS {years} HAN FINALIZADO.")
+    print(f"Los gráficos se han guardado en la carpeta '{os.path.join(os.getcwd(), 'output')}'.")
+    print(f"============================================================")
+
+def parsear_años(argumentos: list) -> list:
+    """
+    Convierte argumentos como '2023', '2024-2025' en la lista ordenada de años que representan.
+    Lanza ValueError si algún argumento no es un año o rango válido dentro del período simulado.
+    """
+    years = set()
+    for argumento in argumentos:
+        if "-" in argumento:
+            inicio, fin = (int(parte) for parte in argumento.split("-", 1))
+            if inicio > fin:
+                raise ValueError(f"El rango '{argumento}' está invertido.")
+            years.update(range(inicio, fin + 1))
+        else:
+            years.add(int(argumento))
+    fuera_de_rango = [year for year in years if not (AÑO_INICIO_SIM <= year <= AÑO_FIN_SIM)]
+    if fuera_de_rango:
+        raise ValueError(f"Los años deben estar entre {AÑO_INICIO_SIM} y {AÑO_FIN_SIM}.")
+    return sorted(years)
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Genera los análisis y gráficos del lubricentro para uno o más años.")
+    parser.add_argument("years", nargs="+", help="Años a analizar: uno o más años (2023) o rangos (2023-2025).")
+    parser.add_argument("--lote", action="store_true", help="Lee las ventas y el stock del año una sola vez y deriva todos los análisis en pandas.")
+    parser.add_argument("--jobs", type=int, default=1, help="Cantidad de consultas y gráficos a generar en paralelo (por defecto 1).")
+    parser.add_argument("--comparar", action="store_true", help="Con varios años, agrega gráficos que comparan las ventas entre ellos.")
+    parser.add_argument("--cache", action="store_true", help="Reutiliza los resultados de consultas guardados en disco mientras los datos no cambien.")
+    parser.add_argument("--stock-top", type=int, default=None, help="Productos del gráfico de evolución de stock: los N con más movimiento (0 = todos, por defecto STOCK_EVOLUCION_TOP_N).")
+    parser.add_argument("--stock-productos", type=int, nargs="+", metavar="ID", help="Limita el gráfico de evolución de stock a estos producto_id.")
+    args = parser.parse_args()
+
     print("INFO: Verificando configuración de la base de datos...")
     if not check_db_config():
         print("CRITICAL: La configuración de la base de datos es inválida. Revisa tu archivo .env y los mensajes anteriores.")
@@ -50,17 +116,28 @@ if __name__ == "__main__":
         sys.exit(1)
     print("INFO: Conexión a la base de datos exitosa.")
 
-    if len(sys.argv) == 2:
-        try:
-            year_to_analyze = int(sys.argv[1])
-            if not (AÑO_INICIO_SIM <= year_to_analyze <= AÑO_FIN_SIM):
-                raise ValueError(f"El año debe estar entre {AÑO_INICIO_SIM} y {AÑO_FIN_SIM}.")
-            ejecutar_analisis_completo(year_to_analyze)
-        except ValueError as e:
-            print(f"ERROR: El argumento '{sys.argv[1]}' no es un año válido o está fuera del rango permitido. {e}")
-            print("Uso: python src/main.py <año>")
-            sys.exit(1)
-    else:
-        print("ERROR: Debes proporcionar exactamente un argumento: el año para el análisis.")
-        print("Uso: python src/main.py <año>")
+    try:
+        years_to_analyze = parsear_años(args.years)
+    except ValueError as e:
+        print(f"ERROR: Los argumentos {args.years} no son años válidos o están fuera del rango permitido. {e}")
+        print("Uso: python src/main.py <año|año-año> [<año|año-año> ...] [--lote] [--jobs N] [--comparar] [--cache] [--stock-top N] [--stock-productos ID ...]")
+        sys.exit(1)
+    if args.jobs < 1:
+        print("ERROR: --jobs debe ser al menos 1.")
         sys.exit(1)
+    if args.stock_top is not None and args.stock_top < 0:
+        print("ERROR: --stock-top no puede ser negativo.")
+        sys.exit(1)
+    if args.stock_top is not None or args.stock_productos:
+        # Con --stock-productos y sin --stock-top se muestran todos los productos indicados
+        seleccionar_productos_stock(args.stock_top, args.stock_productos)
+    if args.cache:
+        cache = cache_resultados.activar()
+        print(f"INFO: Caché de resultados activa en '{cache.directorio}'.")
+    if len(years_to_analyze) == 1:
+        ejecutar_analisis_completo(years_to_analyze[0], lote=args.lote, jobs=args.jobs)
+    else:
+        ejecutar_analisis_multianual(years_to_analyze, jobs=args.jobs, comparar=args.comparar)
+    cache = cache_resultados.cache_activa()
+    if cache is not None:
+        print(f"INFO: Caché de resultados: {cache.aciertos} consultas reutilizadas, {cache.fallos} ejecutadas.")
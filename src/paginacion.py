@@ -0,0 +1,192 @@
+# src/paginacion.py
+
+import threading
+from collections import OrderedDict
+from src.database import execute_query_rows
+from src.queries_relacional import (
+    PRODUCTS_PAGE_SQL,
+    PRODUCTS_PAGE_WITH_COUNT_SQL,
+    PRODUCTS_PAGE_WITH_ESTIMATE_SQL
+)
+
+# Estrategias para el total de productos que muestra la paginación de la GUI:
+#   'estimado'  -> sin filtro usa la estimación de pg_class.reltuples; con filtro, conteo exacto en caché
+#   'exacto'    -> conteo exacto en caché por término de búsqueda, también sin filtro
+#   'sin_total' -> no cuenta; la GUI solo sabe si hay página siguiente (pide page_size + 1 filas)
+ESTRATEGIAS_CONTEO = ('estimado', 'exacto', 'sin_total')
+
+# Bajo este tamaño el conteo exacto es barato y la estimación puede estar desactualizada
+UMBRAL_ESTIMACION = 10000
+
+# Cantidad máxima de términos de búsqueda con conteo guardado
+MAX_CONTEOS_CACHE = 256
+
+# Cantidad máxima de páginas guardadas en CachePaginas
+MAX_PAGINAS_CACHE = 64
+
+class ContadorProductos:
+    """
+    Decide cómo obtener el total de productos (opcionalmente filtrados por un término de búsqueda)
+    según la estrategia elegida, y guarda los conteos exactos por término. Hay que llamar a
+    invalidar() después de insertar, modificar o borrar productos; los cambios hechos por otros
+    clientes solo se ven al invalidar o al refrescar.
+    """
+
+    def __init__(self, estrategia: str = 'estimado'):
+        if estrategia not in ESTRATEGIAS_CONTEO:
+            raise ValueError(f"Estrategia de conteo desconocida '{estrategia}'. Opciones: {', '.join(ESTRATEGIAS_CONTEO)}.")
+        self.estrategia = estrategia
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self._version = 0
+
+    def invalidar(self):
+        """Descarta los conteos guardados."""
+        with self._lock:
+            self._cache.clear()
+            self._version += 1
+
+    def plan(self, termino: str) -> tuple[str, int | None, int]:
+        """
+        Devuelve (tipo, total, versión) para la siguiente página de `termino`. `tipo` es
+        'cache' (total ya conocido), 'sin_total', 'estimado' o 'exacto' (hay que consultarlo).
+        La versión se le pasa a guardar() para no guardar conteos anteriores a un invalidar().
+        """
+        if self.estrategia == 'sin_total':
+            return 'sin_total', None, self._version
+        with self._lock:
+            if termino in self._cache:
+                self._cache.move_to_end(termino)
+                return 'cache', self._cache[termino], self._version
+            version = self._version
+        if not termino and self.estrategia == 'estimado':
+            return 'estimado', None, version
+        return 'exacto', None, version
+
+    def guardar(self, termino: str, total: int, version: int):
+        """Guarda un conteo exacto de `termino`, salvo que se haya invalidado desde plan()."""
+        with self._lock:
+            if version != self._version:
+                return
+            self._cache[termino] = total
+            if len(self._cache) > MAX_CONTEOS_CACHE:
+                self._cache.popitem(last=False)
+
+class CachePaginas:
+    """
+    Caché LRU de páginas ya obtenidas, con clave (término, modo, cursor, tamaño). Igual que el contador,
+    hay que invalidarla después de insertar, modificar o borrar productos.
+    """
+
+    def __init__(self, max_paginas: int = MAX_PAGINAS_CACHE):
+        self.max_paginas = max_paginas
+        self._paginas = OrderedDict()
+        self._lock = threading.Lock()
+        self._version = 0
+
+    def invalidar(self):
+        """Descarta las páginas guardadas."""
+        with self._lock:
+            self._paginas.clear()
+            self._version += 1
+
+    def obtener(self, clave: tuple) -> tuple[dict | None, int]:
+        """Devuelve (página o None, versión actual)."""
+        with self._lock:
+            pagina = self._paginas.get(clave)
+            if pagina is not None:
+                self._paginas.move_to_end(clave)
+            return pagina, self._version
+
+    def contiene(self, clave: tuple) -> bool:
+        with self._lock:
+            return clave in self._paginas
+
+    def guardar(self, clave: tuple, pagina: dict, version: int):
+        """Guarda la página, salvo que se haya invalidado desde que se pidió."""
+        with self._lock:
+            if version != self._version:
+                return
+            self._paginas[clave] = pagina
+            self._paginas.move_to_end(clave)
+            while len(self._paginas) > self.max_paginas:
+                self._paginas.popitem(last=False)
+
+def obtener_pagina(contador: ContadorProductos, termino: str, modo: str, cursor: tuple | None,
+                   tamaño: int, cancelacion=None, cache: CachePaginas = None) -> dict | None:
+    """
+    Obtiene una página de productos y, si hace falta, su total en un solo viaje a la base de datos.
+    `modo` es 'inicio', 'siguiente' o 'anterior' y `cursor` el (nombre, producto_id) desde donde seguir.
+    Devuelve None si la consulta falló o se canceló, o un dict con:
+      columnas -> nombres de las columnas de la página
+      filas   -> lista de a lo más `tamaño` tuplas, en orden ascendente
+      hay_mas -> si quedan filas en la dirección pedida (se pide una fila extra)
+      total   -> total de productos del término, o None con la estrategia 'sin_total'
+      exacto  -> False si el total es una estimación
+    Con `cache` la página se busca primero ahí y se guarda al obtenerla.
+    """
+    termino = termino or ""
+    if cache is not None:
+        clave = (termino, modo, cursor, tamaño)
+        pagina, version_cache = cache.obtener(clave)
+        if pagina is not None:
+            return pagina
+    filtrado = bool(termino)
+    params_filtro = (f"%{termino}%", f"%{termino}%") if filtrado else ()
+    params = params_filtro + (cursor or ()) + (tamaño + 1,)
+
+    tipo, total, version = contador.plan(termino)
+    if tipo == 'estimado':
+        sql_query = PRODUCTS_PAGE_WITH_ESTIMATE_SQL[modo]
+        params += (UMBRAL_ESTIMACION, UMBRAL_ESTIMACION)
+    elif tipo == 'exacto':
+        sql_query = PRODUCTS_PAGE_WITH_COUNT_SQL[(modo, filtrado)]
+        params += params_filtro
+    else:
+        sql_query = PRODUCTS_PAGE_SQL[(modo, filtrado)]
+
+    resultado = execute_query_rows(sql_query, params, cancelacion=cancelacion)
+    if resultado is None:
+        return None
+    columnas, filas = resultado
+
+    exacto = tipo != 'sin_total'
+    if tipo in ('estimado', 'exacto'):
+        # Las columnas del total (total y, si es estimación, estimado) van al final de cada fila
+        n_columnas = columnas.index('total')
+        total = int(filas[0][n_columnas]) if filas else None
+        exacto = not ('estimado' in columnas and filas and filas[0][columnas.index('estimado')])
+        if exacto and total is not None:
+            contador.guardar(termino, total, version)
+        # una página vacía llega como una fila con solo el total (producto_id en NULL)
+        columnas = columnas[:n_columnas]
+        filas = [fila[:n_columnas] for fila in filas if fila[0] is not None]
+
+    hay_mas = len(filas) > tamaño
+    filas = filas[:tamaño]
+    # Las páginas hacia atrás vienen en orden descendente
+    if modo == 'anterior':
+        filas.reverse()
+    pagina = {'columnas': columnas, 'filas': filas, 'hay_mas': hay_mas, 'total': total, 'exacto': exacto}
+    if cache is not None:
+        cache.guardar(clave, pagina, version_cache)
+    return pagina
+
+def precargar_paginas(contador: ContadorProductos, cache: CachePaginas, termino: str,
+                      vecinas: list, tamaño: int) -> threading.Thread | None:
+    """
+    Obtiene en segundo plano y guarda en `cache` las páginas `vecinas` (lista de (modo, cursor))
+    que aún no estén guardadas, para que pasar a ellas no espere a la base de datos.
+    """
+    termino = termino or ""
+    pendientes = [(modo, cursor) for modo, cursor in vecinas if not cache.contiene((termino, modo, cursor, tamaño))]
+    if not pendientes:
+        return None
+
+    def precargar():
+        for modo, cursor in pendientes:
+            obtener_pagina(contador, termino, modo, cursor, tamaño, cache=cache)
+
+    hilo = threading.Thread(target=precargar, daemon=True)
+    hilo.start()
+    return hilo
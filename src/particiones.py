@@ -0,0 +1,167 @@
+# src/particiones.py
+
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import argparse
+import datetime
+import psycopg2
+from psycopg2 import sql
+from src.database import get_pooled_connection
+from src.queries import (
+    LIST_PARTICIONES_SQL,
+    EXISTE_TABLA_SQL,
+    CREATE_TABLA_PARTICION_SQL,
+    MOVER_DESDE_DEFAULT_SQL,
+    ATTACH_PARTICION_SQL,
+    DETACH_PARTICION_SQL,
+    DROP_PARTICION_SQL,
+    INSERT_SALDO_STOCK_ARCHIVADO_SQL,
+    DELETE_SALDO_STOCK_ARCHIVADO_SQL,
+    INCREMENTAR_VERSION_DATOS_SQL
+)
+from src.resumenes import recalcular_año
+
+# Tablas de hechos particionadas por año sobre `fecha` (sql/migracion_v2_03_particiones.sql).
+# Cada una tiene particiones <tabla>_<año> y una partición DEFAULT <tabla>_default.
+TABLAS_PARTICIONADAS = ('hechos_ventas', 'hechos_stock')
+
+def nombre_particion(tabla: str, año: int) -> str:
+    return f"{tabla}_{año}"
+
+def limites_año(año: int) -> tuple[datetime.date, datetime.date]:
+    """Rango semiabierto [1 de enero del año, 1 de enero del siguiente) de la partición del año."""
+    return datetime.date(año, 1, 1), datetime.date(año + 1, 1, 1)
+
+def _validar_tabla(tabla: str):
+    if tabla not in TABLAS_PARTICIONADAS:
+        raise ValueError(f"Tabla '{tabla}' no particionada. Opciones: {', '.join(TABLAS_PARTICIONADAS)}.")
+
+def _existe(cursor, nombre: str) -> bool:
+    cursor.execute(EXISTE_TABLA_SQL, (nombre,))
+    return cursor.fetchone()[0]
+
+def _sql(plantilla: str, **identificadores) -> sql.Composed:
+    return sql.SQL(plantilla).format(**{clave: sql.Identifier(valor) for clave, valor in identificadores.items()})
+
+def _marcar_cambio(cursor, tabla: str):
+    """Separar o adjuntar no dispara los triggers de version_datos: se incrementa a mano, si existe."""
+    if _existe(cursor, "version_datos"):
+        cursor.execute(INCREMENTAR_VERSION_DATOS_SQL, (tabla,))
+
+def listar_particiones(cursor, tabla: str) -> list:
+    """Lista de (partición, límites, filas estimadas) de `tabla`."""
+    _validar_tabla(tabla)
+    cursor.execute(LIST_PARTICIONES_SQL, (tabla,))
+    return cursor.fetchall()
+
+def _validar_saldo_archivado(cursor, tabla: str):
+    if tabla == 'hechos_stock' and not _existe(cursor, "saldo_stock_archivado"):
+        raise ValueError("No existe la tabla saldo_stock_archivado. ¿Se ejecutó sql/migracion_v2_06_saldo_stock_archivado.sql?")
+
+def _adjuntar(cursor, tabla: str, año: int):
+    particion = nombre_particion(tabla, año)
+    cursor.execute(_sql(ATTACH_PARTICION_SQL, tabla=tabla, particion=particion), limites_año(año))
+    _marcar_cambio(cursor, tabla)
+
+def adjuntar_particion(cursor, tabla: str, año: int):
+    """
+    Adjunta a `tabla` como partición del año una tabla suelta <tabla>_<año> (p. ej. una separada
+    antes con separar_particion). PostgreSQL revisa que todas sus filas sean de ese año.
+    En la misma transacción vuelve a agregar los meses del año al resumen y, en hechos_stock,
+    borra el saldo archivado del año, que desde ahora se obtiene otra vez del resumen.
+    """
+    _validar_tabla(tabla)
+    _validar_saldo_archivado(cursor, tabla)
+    _adjuntar(cursor, tabla, año)
+    if tabla == 'hechos_stock':
+        cursor.execute(DELETE_SALDO_STOCK_ARCHIVADO_SQL, (año,))
+    recalcular_año(cursor, tabla, año)
+
+def crear_particiones_anuales(cursor, años, tablas=TABLAS_PARTICIONADAS) -> list:
+    """
+    Crea las particiones anuales de `años` que falten en cada tabla de `tablas` y devuelve sus nombres.
+    Las filas de esos años que estuvieran en la partición DEFAULT se mueven a la nueva partición.
+    Se ejecuta en la transacción de `cursor`.
+    """
+    creadas = []
+    for tabla in tablas:
+        _validar_tabla(tabla)
+        for año in sorted(set(años)):
+            particion = nombre_particion(tabla, año)
+            if _existe(cursor, particion):
+                continue
+            cursor.execute(_sql(CREATE_TABLA_PARTICION_SQL, tabla=tabla, particion=particion))
+            cursor.execute(_sql(MOVER_DESDE_DEFAULT_SQL, default=f"{tabla}_default", particion=particion), limites_año(año))
+            # Las filas movidas desde DEFAULT ya estaban en el resumen: no hay que recalcularlo
+            _adjuntar(cursor, tabla, año)
+            creadas.append(particion)
+    return creadas
+
+def separar_particion(cursor, tabla: str, año: int, eliminar: bool = False):
+    """
+    Separa de `tabla` la partición del año: sus filas dejan de verse en los hechos al instante,
+    sin un DELETE masivo. La tabla <tabla>_<año> queda suelta para archivarla (pg_dump) o volver a
+    adjuntarla; con `eliminar` se borra. En la misma transacción se vacían los meses del año en el
+    resumen, así los análisis tampoco lo ven. En hechos_stock, el saldo del año por producto queda
+    en saldo_stock_archivado para el stock de apertura de los años siguientes.
+    """
+    _validar_tabla(tabla)
+    _validar_saldo_archivado(cursor, tabla)
+    particion = nombre_particion(tabla, año)
+    cursor.execute(_sql(DETACH_PARTICION_SQL, tabla=tabla, particion=particion))
+    _marcar_cambio(cursor, tabla)
+    if tabla == 'hechos_stock':
+        cursor.execute(_sql(INSERT_SALDO_STOCK_ARCHIVADO_SQL, particion=particion), (año,))
+    recalcular_año(cursor, tabla, año)
+    if eliminar:
+        cursor.execute(_sql(DROP_PARTICION_SQL, particion=particion))
+
+def main(argv=None) -> bool:
+    parser = argparse.ArgumentParser(description="Administra las particiones anuales de hechos_ventas y hechos_stock.")
+    parser.add_argument("--tabla", choices=TABLAS_PARTICIONADAS, action="append", help="Tabla sobre la que operar (por defecto ambas).")
+    subparsers = parser.add_subparsers(dest="accion", required=True)
+    subparsers.add_parser("listar", help="Muestra las particiones y sus límites.")
+    crear = subparsers.add_parser("crear", help="Crea las particiones de los años indicados.")
+    crear.add_argument("años", type=int, nargs="+")
+    separar = subparsers.add_parser("separar", help="Separa la partición de un año (queda como tabla suelta).")
+    separar.add_argument("año", type=int)
+    separar.add_argument("--eliminar", action="store_true", help="Borra la partición separada en lugar de conservarla.")
+    adjuntar = subparsers.add_parser("adjuntar", help="Vuelve a adjuntar la tabla <tabla>_<año> como partición.")
+    adjuntar.add_argument("año", type=int)
+    args = parser.parse_args(argv)
+    tablas = args.tabla or TABLAS_PARTICIONADAS
+
+    try:
+        with get_pooled_connection() as conn:
+            if not conn:
+                print("ERROR: No se pudo conectar a la base de datos.")
+                return False
+            with conn.cursor() as cursor:
+                if args.accion == "listar":
+                    for tabla in tablas:
+                        print(f"{tabla}:")
+                        for particion, limites, filas in listar_particiones(cursor, tabla):
+                            print(f"  {particion:<25} {limites} (~{filas} filas)")
+                elif args.accion == "crear":
+                    creadas = crear_particiones_anuales(cursor, args.años, tablas)
+                    print(f"INFO: Particiones creadas: {', '.join(creadas) if creadas else 'ninguna (ya existían)'}.")
+                else:
+                    for tabla in tablas:
+                        if args.accion == "separar":
+                            separar_particion(cursor, tabla, args.año, args.eliminar)
+                            accion = "eliminada" if args.eliminar else "separada"
+                        else:
+                            adjuntar_particion(cursor, tabla, args.año)
+                            accion = "adjuntada"
+                        print(f"INFO: Partición {nombre_particion(tabla, args.año)} {accion}.")
+            conn.commit()
+            return True
+    except (psycopg2.Error, ValueError) as e:
+        print(f"ERROR: No se pudo completar la operación sobre las particiones: {e}")
+        return False
+
+if __name__ == "__main__":
+    if not main():
+        sys.exit(1)
@@ -1,13 +1,65 @@
-import matplotlib.pyplot as plt
+import matplotlib
+matplotlib.use("Agg")  # Sin ventanas: los gráficos solo se guardan a archivo, también desde hilos y procesos
+import matplotlib.font_manager as font_manager
+from matplotlib.figure import Figure
 import seaborn as sns
+import numpy as np
 import pandas as pd
+import multiprocessing
 import os
+from concurrent.futures import ProcessPoolExecutor
 
 OUTPUT_DIR = "output"
 
 if not os.path.exists(OUTPUT_DIR):
     os.makedirs(OUTPUT_DIR)
 
+# rcParams comunes a todos los gráficos. Se aplican una vez por proceso (configurar_estilo).
+ESTILO_GRAFICOS = {
+    "figure.dpi": 100,
+    "savefig.dpi": 100,
+}
+
+_estilo_configurado = False
+
+def configurar_estilo():
+    """
+    Aplica ESTILO_GRAFICOS y deja cargadas las fuentes, una sola vez por proceso. La primera
+    búsqueda de fuente lee la lista de fuentes del sistema y el primer texto dibujado abre el
+    archivo de la fuente; después ambos quedan en caché y los gráficos siguientes los reutilizan.
+    """
+    global _estilo_configurado
+    if _estilo_configurado:
+        return
+    matplotlib.rcParams.update(ESTILO_GRAFICOS)
+    font_manager.findfont(font_manager.FontProperties(family=matplotlib.rcParams["font.family"]))
+    fig = Figure(figsize=(1, 1))
+    fig.text(0.5, 0.5, "Año")
+    fig.canvas.draw()
+    _estilo_configurado = True
+
+def _nueva_figura(figsize: tuple):
+    """
+    Figura y ejes nuevos con la API de objetos de matplotlib: no pasan por el estado global de
+    pyplot, así que cada gráfico es independiente del resto (hilos incluidos) y no hay que cerrarlo.
+    """
+    configurar_estilo()
+    fig = Figure(figsize=figsize)
+    return fig, fig.add_subplot()
+
+def _rotar_etiquetas_x(ax, ha: str = "center"):
+    for etiqueta in ax.get_xticklabels():
+        etiqueta.set_rotation(45)
+        etiqueta.set_horizontalalignment(ha)
+
+def _guardar(fig: Figure, filename: str):
+    filepath = os.path.join(OUTPUT_DIR, filename)
+    try:
+        fig.savefig(filepath)
+        print(f"INFO: Gráfico guardado en '{filepath}'")
+    except Exception as e:
+        print(f"ERROR: No se pudo guardar el gráfico en '{filepath}'. Razón: {e}")
+
 def graficar_ventas_por_mes(df_ventas_mes: pd.DataFrame, filename: str, year: int):
     """
     Grafica las ventas totales por mes y guarda el gráfico.
@@ -23,22 +75,16 @@ def graficar_ventas_por_mes(df_ventas_mes: pd.DataFrame, filename: str, year: in
     }
     df_ventas_mes['mes_nombre'] = df_ventas_mes['mes'].map(meses_nombres)
 
-    plt.figure(figsize=(10, 6))
-    sns.barplot(x='mes_nombre', y='ventas_totales', data=df_ventas_mes, palette="viridis", hue='mes_nombre', dodge=False, legend=False)
-    plt.title(f'Ventas Totales por Mes - Año {year}', fontsize=16)
-    plt.xlabel('Mes', fontsize=12)
-    plt.ylabel('Ventas Totales (CLP)', fontsize=12)
-    plt.xticks(rotation=45)
-    plt.grid(axis='y', linestyle='--')
-    plt.tight_layout()
+    fig, ax = _nueva_figura((10, 6))
+    sns.barplot(x='mes_nombre', y='ventas_totales', data=df_ventas_mes, palette="viridis", hue='mes_nombre', dodge=False, legend=False, ax=ax)
+    ax.set_title(f'Ventas Totales por Mes - Año {year}', fontsize=16)
+    ax.set_xlabel('Mes', fontsize=12)
+    ax.set_ylabel('Ventas Totales (CLP)', fontsize=12)
+    _rotar_etiquetas_x(ax)
+    ax.grid(axis='y', linestyle='--')
+    fig.tight_layout()
 
-    filepath = os.path.join(OUTPUT_DIR, filename)
-    try:
-        plt.savefig(filepath)
-        print(f"INFO: Gráfico guardado en '{filepath}'")
-    except Exception as e:
-        print(f"ERROR: No se pudo guardar el gráfico en '{filepath}'. Razón: {e}")
-    plt.close()
+    _guardar(fig, filename)
 
 def graficar_top_productos(df_top_productos: pd.DataFrame, filename: str, year: int):
     """
@@ -48,20 +94,14 @@ def graficar_top_productos(df_top_productos: pd.DataFrame, filename: str, year:
         print(f"INFO: No hay datos de top productos para el año {year} para graficar.")
         return
 
-    plt.figure(figsize=(10, 7))
-    sns.barplot(x='cantidad_total_vendida', y='nombre_articulo', data=df_top_productos, palette="coolwarm", hue='nombre_articulo', dodge=False, legend=False)
-    plt.title(f'Top 5 Productos Más Vendidos (por Cantidad) - Año {year}', fontsize=16)
-    plt.xlabel('Cantidad Total Vendida', fontsize=12)
-    plt.ylabel('Producto', fontsize=12)
-    plt.tight_layout()
+    fig, ax = _nueva_figura((10, 7))
+    sns.barplot(x='cantidad_total_vendida', y='nombre_articulo', data=df_top_productos, palette="coolwarm", hue='nombre_articulo', dodge=False, legend=False, ax=ax)
+    ax.set_title(f'Top 5 Productos Más Vendidos (por Cantidad) - Año {year}', fontsize=16)
+    ax.set_xlabel('Cantidad Total Vendida', fontsize=12)
+    ax.set_ylabel('Producto', fontsize=12)
+    fig.tight_layout()
 
-    filepath = os.path.join(OUTPUT_DIR, filename)
-    try:
-        plt.savefig(filepath)
-        print(f"INFO: Gráfico guardado en '{filepath}'")
-    except Exception as e:
-        print(f"ERROR: No se pudo guardar el gráfico en '{filepath}'. Razón: {e}")
-    plt.close()
+    _guardar(fig, filename)
 
 def graficar_ventas_por_categoria(df_ventas_categoria: pd.DataFrame, filename: str, year: int):
     """
@@ -71,50 +111,79 @@ def graficar_ventas_por_categoria(df_ventas_categoria: pd.DataFrame, filename: s
         print(f"INFO: No hay datos de ventas por categoría para el año {year} para graficar.")
         return
 
-    plt.figure(figsize=(12, 7))
-    sns.barplot(x='nombre_categoria', y='ventas_totales_categoria', data=df_ventas_categoria, palette="magma", hue='nombre_categoria', dodge=False, legend=False)
-    plt.title(f'Ventas Totales por Categoría de Producto - Año {year}', fontsize=16)
-    plt.xlabel('Categoría', fontsize=12)
-    plt.ylabel('Ventas Totales (CLP)', fontsize=12)
-    plt.xticks(rotation=45, ha="right")
-    plt.grid(axis='y', linestyle='--')
-    plt.tight_layout()
+    fig, ax = _nueva_figura((12, 7))
+    sns.barplot(x='nombre_categoria', y='ventas_totales_categoria', data=df_ventas_categoria, palette="magma", hue='nombre_categoria', dodge=False, legend=False, ax=ax)
+    ax.set_title(f'Ventas Totales por Categoría de Producto - Año {year}', fontsize=16)
+    ax.set_xlabel('Categoría', fontsize=12)
+    ax.set_ylabel('Ventas Totales (CLP)', fontsize=12)
+    _rotar_etiquetas_x(ax, ha="right")
+    ax.grid(axis='y', linestyle='--')
+    fig.tight_layout()
 
-    filepath = os.path.join(OUTPUT_DIR, filename)
-    try:
-        plt.savefig(filepath)
-        print(f"INFO: Gráfico guardado en '{filepath}'")
-    except Exception as e:
-        print(f"ERROR: No se pudo guardar el gráfico en '{filepath}'. Razón: {e}")
-    plt.close()
+    _guardar(fig, filename)
+
+def reducir_lttb(x: np.ndarray, y: np.ndarray, max_puntos: int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Reduce una serie a `max_puntos` puntos con Largest-Triangle-Three-Buckets: conserva el primero y
+    el último y, de cada tramo intermedio, el punto que forma el triángulo de mayor área con el punto
+    elegido en el tramo anterior y el promedio del tramo siguiente. A diferencia de tomar un punto cada
+    k, mantiene los picos y caídas de la serie. `x` puede ser numérico o datetime64.
+    """
+    n = len(x)
+    if max_puntos < 3 or n <= max_puntos:
+        return x, y
+    if np.issubdtype(x.dtype, np.datetime64):
+        xn = x.astype('datetime64[s]').astype(np.int64).astype(np.float64)
+    else:
+        xn = x.astype(np.float64)
+    yn = y.astype(np.float64)
+
+    # max_puntos - 2 tramos entre el primer y el último punto
+    bordes = np.linspace(1, n - 1, max_puntos - 1).astype(np.int64)
+    elegidos = np.empty(max_puntos, dtype=np.int64)
+    elegidos[0], elegidos[-1] = 0, n - 1
+    anterior = 0
+    for i in range(max_puntos - 2):
+        inicio, fin = bordes[i], bordes[i + 1]
+        siguiente_inicio, siguiente_fin = (bordes[i + 1], bordes[i + 2]) if i + 2 < len(bordes) else (n - 1, n)
+        x_promedio = xn[siguiente_inicio:siguiente_fin].mean()
+        y_promedio = yn[siguiente_inicio:siguiente_fin].mean()
+        xa, ya = xn[anterior], yn[anterior]
+        areas = np.abs((xa - x_promedio) * (yn[inicio:fin] - ya) - (xa - xn[inicio:fin]) * (y_promedio - ya))
+        anterior = inicio + int(np.argmax(areas))
+        elegidos[i + 1] = anterior
+    return x[elegidos], y[elegidos]
+
+# Puntos por línea del gráfico de evolución de stock y líneas hasta las que se muestra la leyenda:
+# con ambos límites el tiempo de dibujo no depende del tamaño del catálogo ni de los días del año
+MAX_PUNTOS_POR_LINEA = 200
+MAX_LINEAS_LEYENDA = 20
 
 def graficar_evolucion_stock(df_stock_evolucion: pd.DataFrame, filename: str, year: int):
     """
-    Grafica la evolución diaria del stock por producto y guarda el gráfico.
+    Grafica el saldo diario de stock por producto (columna `stock` de STOCK_EVOLUCION_SQL, ya
+    acumulado en la base de datos) y guarda el gráfico. Cada línea se reduce a MAX_PUNTOS_POR_LINEA
+    puntos con reducir_lttb.
     """
     if df_stock_evolucion.empty:
         print(f"INFO: No hay datos de evolución de stock para el año {year} para graficar.")
         return
 
-    plt.figure(figsize=(14, 7))
-    # Graficar una línea por producto
-    for producto, datos in df_stock_evolucion.groupby('nombre_articulo'):
-        datos_ordenados = datos.sort_values('fecha')
-        plt.plot(datos_ordenados['fecha'], datos_ordenados['variacion_stock'].cumsum(), marker='o', label=producto)
+    fig, ax = _nueva_figura((14, 7))
+    # Una línea por producto; las filas llegan ordenadas por producto y fecha
+    productos = df_stock_evolucion.groupby('nombre_articulo', sort=False)
+    for producto, datos in productos:
+        fechas, stock = reducir_lttb(datos['fecha'].to_numpy(), datos['stock'].to_numpy(), MAX_PUNTOS_POR_LINEA)
+        ax.plot(fechas, stock, label=producto)
 
-    plt.title(f'Evolución del Stock por Producto - Año {year}', fontsize=16)
-    plt.xlabel('Fecha', fontsize=12)
-    plt.ylabel('Stock Acumulado', fontsize=12)
-    plt.legend(title="Producto", bbox_to_anchor=(1.05, 1), loc='upper left')
-    plt.tight_layout()
+    ax.set_title(f'Evolución del Stock por Producto - Año {year}', fontsize=16)
+    ax.set_xlabel('Fecha', fontsize=12)
+    ax.set_ylabel('Stock', fontsize=12)
+    if productos.ngroups <= MAX_LINEAS_LEYENDA:
+        ax.legend(title="Producto", bbox_to_anchor=(1.05, 1), loc='upper left')
+    fig.tight_layout()
 
-    filepath = os.path.join(OUTPUT_DIR, filename)
-    try:
-        plt.savefig(filepath)
-        print(f"INFO: Gráfico guardado en '{filepath}'")
-    except Exception as e:
-        print(f"ERROR: No se pudo guardar el gráfico en '{filepath}'. Razón: {e}")
-    plt.close()
+    _guardar(fig, filename)
 
 def graficar_distribucion_tipos_movimiento(df_movimientos: pd.DataFrame, filename: str, year: int):
     """
@@ -124,25 +193,19 @@ def graficar_distribucion_tipos_movimiento(df_movimientos: pd.DataFrame, filenam
         print(f"INFO: No hay datos de movimientos de stock para el año {year} para graficar.")
         return
 
-    plt.figure(figsize=(14, 7))
+    fig, ax = _nueva_figura((14, 7))
     # Pivot para tener los tipos de movimiento como columnas
     df_pivot = df_movimientos.pivot(index='mes', columns='tipo_movimiento', values='total_movimiento').fillna(0)
     df_pivot.index = pd.to_datetime(df_pivot.index)
 
-    df_pivot.plot(ax=plt.gca(), marker='o')
-    plt.title(f'Distribución de Tipos de Movimiento de Stock por Mes - Año {year}', fontsize=16)
-    plt.xlabel('Mes', fontsize=12)
-    plt.ylabel('Total Movimiento', fontsize=12)
-    plt.legend(title="Tipo de Movimiento", bbox_to_anchor=(1.05, 1), loc='upper left')
-    plt.tight_layout()
+    df_pivot.plot(ax=ax, marker='o')
+    ax.set_title(f'Distribución de Tipos de Movimiento de Stock por Mes - Año {year}', fontsize=16)
+    ax.set_xlabel('Mes', fontsize=12)
+    ax.set_ylabel('Total Movimiento', fontsize=12)
+    ax.legend(title="Tipo de Movimiento", bbox_to_anchor=(1.05, 1), loc='upper left')
+    fig.tight_layout()
 
-    filepath = os.path.join(OUTPUT_DIR, filename)
-    try:
-        plt.savefig(filepath)
-        print(f"INFO: Gráfico guardado en '{filepath}'")
-    except Exception as e:
-        print(f"ERROR: No se pudo guardar el gráfico en '{filepath}'. Razón: {e}")
-    plt.close()
+    _guardar(fig, filename)
 
 def graficar_top_productos_rango(df_top_productos: pd.DataFrame, filename: str, fecha_inicio: str, fecha_fin: str):
     """
@@ -158,20 +221,14 @@ def graficar_top_productos_rango(df_top_productos: pd.DataFrame, filename: str,
         print(f"INFO: No hay datos de top productos para el rango {fecha_inicio} a {fecha_fin} para graficar.")
         return
 
-    plt.figure(figsize=(10, 7))
-    sns.barplot(x='cantidad_total_vendida', y='nombre_articulo', data=df_top_productos, palette="coolwarm", hue='nombre_articulo', dodge=False, legend=False)
-    plt.title(f'Top {len(df_top_productos)} Productos Más Vendidos ({fecha_inicio} a {fecha_fin})', fontsize=16)  # Título dinámico
-    plt.xlabel('Cantidad Total Vendida', fontsize=12)
-    plt.ylabel('Producto', fontsize=12)
-    plt.tight_layout()
+    fig, ax = _nueva_figura((10, 7))
+    sns.barplot(x='cantidad_total_vendida', y='nombre_articulo', data=df_top_productos, palette="coolwarm", hue='nombre_articulo', dodge=False, legend=False, ax=ax)
+    ax.set_title(f'Top {len(df_top_productos)} Productos Más Vendidos ({fecha_inicio} a {fecha_fin})', fontsize=16)  # Título dinámico
+    ax.set_xlabel('Cantidad Total Vendida', fontsize=12)
+    ax.set_ylabel('Producto', fontsize=12)
+    fig.tight_layout()
 
-    filepath = os.path.join(OUTPUT_DIR, filename)
-    try:
-        plt.savefig(filepath)
-        print(f"INFO: Gráfico guardado en '{filepath}'")
-    except Exception as e:
-        print(f"ERROR: No se pudo guardar el gráfico en '{filepath}'. Razón: {e}")
-    plt.close()
+    _guardar(fig, filename)
 
 def graficar_ventas_por_cliente(df_ventas_cliente: pd.DataFrame, filename: str, year: int):
     """
@@ -181,18 +238,91 @@ def graficar_ventas_por_cliente(df_ventas_cliente: pd.DataFrame, filename: str,
         print(f"INFO: No hay datos de ventas por cliente para el año {year} para graficar.")
         return
 
-    plt.figure(figsize=(12, 7))
-    sns.barplot(x='nombre_cliente', y='total_ventas', data=df_ventas_cliente, palette='viridis')
-    plt.title(f'Ventas Totales por Cliente - Año {year}', fontsize=16)
-    plt.xlabel('Cliente', fontsize=12)
-    plt.ylabel('Ventas Totales', fontsize=12)
-    plt.xticks(rotation=45, ha="right")  # Rotar las etiquetas para mejor legibilidad
-    plt.tight_layout()
+    fig, ax = _nueva_figura((12, 7))
+    sns.barplot(x='nombre_cliente', y='total_ventas', data=df_ventas_cliente, palette='viridis', ax=ax)
+    ax.set_title(f'Ventas Totales por Cliente - Año {year}', fontsize=16)
+    ax.set_xlabel('Cliente', fontsize=12)
+    ax.set_ylabel('Ventas Totales', fontsize=12)
+    _rotar_etiquetas_x(ax, ha="right")  # Rotar las etiquetas para mejor legibilidad
+    fig.tight_layout()
 
-    filepath = os.path.join(OUTPUT_DIR, filename)
+    _guardar(fig, filename)
+
+def graficar_comparacion_ventas_por_mes(df_ventas_mes: pd.DataFrame, filename: str, years: list):
+    """
+    Grafica las ventas totales por mes de varios años, una línea por año, y guarda el gráfico.
+    Espera las columnas anio, mes y ventas_totales.
+    """
+    if df_ventas_mes.empty:
+        print(f"INFO: No hay datos de ventas por mes para comparar los años {years}.")
+        return
+
+    df_ventas_mes = df_ventas_mes.sort_values(['anio', 'mes']).assign(anio=df_ventas_mes['anio'].astype(str))
+    meses_nombres = ['Ene', 'Feb', 'Mar', 'Abr', 'May', 'Jun', 'Jul', 'Ago', 'Sep', 'Oct', 'Nov', 'Dic']
+
+    fig, ax = _nueva_figura((12, 6))
+    sns.lineplot(x='mes', y='ventas_totales', hue='anio', data=df_ventas_mes, marker='o', palette="viridis", ax=ax)
+    ax.set_title(f'Ventas Totales por Mes - Comparación {min(years)} a {max(years)}', fontsize=16)
+    ax.set_xlabel('Mes', fontsize=12)
+    ax.set_ylabel('Ventas Totales (CLP)', fontsize=12)
+    ax.set_xticks(range(1, 13), meses_nombres, rotation=45)
+    ax.grid(axis='y', linestyle='--')
+    ax.legend(title="Año")
+    fig.tight_layout()
+
+    _guardar(fig, filename)
+
+def graficar_comparacion_ventas_por_categoria(df_ventas_categoria: pd.DataFrame, filename: str, years: list):
+    """
+    Grafica las ventas por categoría de varios años, con una barra por año dentro de cada categoría.
+    Espera las columnas anio, nombre_categoria y ventas_totales_categoria.
+    """
+    if df_ventas_categoria.empty:
+        print(f"INFO: No hay datos de ventas por categoría para comparar los años {years}.")
+        return
+
+    df_ventas_categoria = df_ventas_categoria.assign(anio=df_ventas_categoria['anio'].astype(str))
+
+    fig, ax = _nueva_figura((14, 7))
+    sns.barplot(x='nombre_categoria', y='ventas_totales_categoria', hue='anio', data=df_ventas_categoria, palette="magma", ax=ax)
+    ax.set_title(f'Ventas Totales por Categoría - Comparación {min(years)} a {max(years)}', fontsize=16)
+    ax.set_xlabel('Categoría', fontsize=12)
+    ax.set_ylabel('Ventas Totales (CLP)', fontsize=12)
+    _rotar_etiquetas_x(ax, ha="right")
+    ax.grid(axis='y', linestyle='--')
+    ax.legend(title="Año")
+    fig.tight_layout()
+
+    _guardar(fig, filename)
+
+def _renderizar(graficar, args) -> bool:
+    """Ejecuta una tarea de gráfico. Un error se informa sin detener el resto de las tareas."""
     try:
-        plt.savefig(filepath)
-        print(f"INFO: Gráfico guardado en '{filepath}'")
+        graficar(*args)
+        return True
     except Exception as e:
-        print(f"ERROR: No se pudo guardar el gráfico en '{filepath}'. Razón: {e}")
-    plt.close()
+        print(f"ERROR: Falló la generación del gráfico '{graficar.__name__}'. Razón: {e}")
+        return False
+
+def renderizar_en_paralelo(tareas: list, jobs: int = 1) -> int:
+    """
+    Ejecuta una lista de tareas de gráfico (función graficar_*, tupla de argumentos) y devuelve
+    cuántas terminaron bien. Con jobs > 1 las reparte en un pool de procesos; cada proceso prepara
+    el estilo y las fuentes una vez al iniciar (configurar_estilo) y las reutiliza en todas sus
+    tareas, así cientos de gráficos escalan con los núcleos. Se usa "spawn" para no heredar
+    conexiones ni hilos del padre.
+    """
+    if jobs <= 1 or len(tareas) <= 1:
+        return sum(_renderizar(graficar, args) for graficar, args in tareas)
+
+    contexto = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=min(jobs, len(tareas)), mp_context=contexto, initializer=configurar_estilo) as procesos:
+        futuros = [procesos.submit(_renderizar, graficar, args) for graficar, args in tareas]
+        correctas = 0
+        for futuro in futuros:
+            try:
+                correctas += futuro.result()
+            except Exception as e:
+                # Errores del pool, p. ej. argumentos que no se pueden enviar al proceso
+                print(f"ERROR: Falló la generación de un gráfico en el pool de procesos. Razón: {e}")
+        return correctas
@@ -1,29 +1,34 @@
+# Las consultas filtran por rangos semiabiertos [fecha_desde, fecha_hasta) para que
+# puedan usar los índices sobre fecha (ver sql/migracion_v2_01_indices_fechas.sql).
+# Las consultas anuales leen las tablas de resumen (sql/migracion_v2_02_resumenes.sql)
+# en lugar de reagregar hechos_ventas y hechos_stock en cada ejecución.
+
 # Consulta 1: Ventas totales por mes para un año dado
 VENTAS_POR_MES_SQL = """
 SELECT
-    EXTRACT(MONTH FROM fecha)::INTEGER AS mes,
-    SUM(total_venta) AS ventas_totales -- total_venta ya está en CLP (entero)
+    EXTRACT(MONTH FROM r.mes)::INTEGER AS mes,
+    SUM(r.total_venta) AS ventas_totales -- total_venta ya está en CLP (entero)
 FROM
-    hechos_ventas
+    resumen_ventas_mensual r
 WHERE
-    EXTRACT(YEAR FROM fecha) = %(year)s -- Parámetro para el año
+    r.mes >= %(fecha_desde)s AND r.mes < %(fecha_hasta)s -- Rango semiabierto del año
 GROUP BY
-    mes
+    r.mes
 ORDER BY
-    mes;
+    r.mes;
 """
 
 # Consulta 2: Top 5 productos más vendidos (por cantidad) en un año dado
 TOP_PRODUCTOS_CANTIDAD_SQL = """
 SELECT
     p.nombre_articulo,
-    SUM(hv.cantidad) AS cantidad_total_vendida
+    SUM(r.cantidad) AS cantidad_total_vendida
 FROM
-    hechos_ventas hv
+    resumen_ventas_mensual r
 JOIN
-    productos p ON hv.producto_fk = p.producto_id
+    productos p ON r.producto_fk = p.producto_id
 WHERE
-    EXTRACT(YEAR FROM hv.fecha) = %(year)s -- Parámetro para el año
+    r.mes >= %(fecha_desde)s AND r.mes < %(fecha_hasta)s -- Rango semiabierto del año
 GROUP BY
     p.nombre_articulo
 ORDER BY
@@ -35,54 +40,127 @@ LIMIT 5;
 VENTAS_POR_CATEGORIA_SQL = """
 SELECT
     c.nombre_categoria,
-    SUM(hv.total_venta) AS ventas_totales_categoria -- total_venta ya está en CLP (entero)
+    SUM(r.total_venta) AS ventas_totales_categoria -- total_venta ya está en CLP (entero)
 FROM
-    hechos_ventas hv
+    resumen_ventas_mensual r
 JOIN
-    productos p ON hv.producto_fk = p.producto_id
+    productos p ON r.producto_fk = p.producto_id
 JOIN
     categorias c ON p.categoria_fk = c.categoria_id
 WHERE
-    EXTRACT(YEAR FROM hv.fecha) = %(year)s -- Parámetro para el año
+    r.mes >= %(fecha_desde)s AND r.mes < %(fecha_hasta)s -- Rango semiabierto del año
 GROUP BY
     c.nombre_categoria
 ORDER BY
     ventas_totales_categoria DESC;
 """
 
-# Consulta 4: Evolución del stock total por día en un año dado (solo 2 columnas)
+# Consulta 4: Evolución del stock por producto y día en los años de `años` (lista de años, no
+# necesariamente consecutivos; cada año es un rango semiabierto que usa el índice sobre dia).
+# `stock` es el saldo al final de cada día: el stock al 1 de enero del año (suma de todos los
+# movimientos anteriores, que parten con ENTRADA_INI, más el saldo de los años anteriores ya separados,
+# en saldo_stock_archivado) más la suma acumulada de las variaciones del año,
+# calculada con una función de ventana. `cantidad` ya viene con signo (las salidas y ajustes negativos
+# son negativos). Solo se incluyen los productos de `productos` (lista de producto_id, o NULL para
+# todos) y de ellos, en cada año, los `top_n` con más movimiento (NULL para todos), así el gráfico
+# tiene un número acotado de líneas. La columna `anio` permite separar el resultado por año.
 STOCK_EVOLUCION_SQL = """
+WITH movimientos AS (
+    SELECT
+        a.anio,
+        r.producto_fk,
+        r.dia,
+        r.cantidad
+    FROM
+        UNNEST(%(años)s::INTEGER[]) AS a(anio)
+    JOIN
+        resumen_stock_diario r ON r.dia >= MAKE_DATE(a.anio, 1, 1) AND r.dia < MAKE_DATE(a.anio + 1, 1, 1)
+    WHERE
+        %(productos)s::INTEGER[] IS NULL OR r.producto_fk = ANY(%(productos)s::INTEGER[])
+),
+seleccion AS (
+    SELECT
+        anio,
+        producto_fk
+    FROM (
+        SELECT
+            anio,
+            producto_fk,
+            ROW_NUMBER() OVER (PARTITION BY anio ORDER BY SUM(ABS(cantidad)) DESC, producto_fk) AS puesto
+        FROM
+            movimientos
+        GROUP BY
+            anio, producto_fk
+    ) ranking
+    WHERE
+        %(top_n)s::INTEGER IS NULL OR puesto <= %(top_n)s::INTEGER
+),
+apertura AS (
+    SELECT
+        s.anio,
+        s.producto_fk,
+        SUM(r.cantidad) AS stock_inicial
+    FROM
+        seleccion s
+    JOIN
+        resumen_stock_diario r ON r.producto_fk = s.producto_fk AND r.dia < MAKE_DATE(s.anio, 1, 1)
+    GROUP BY
+        s.anio, s.producto_fk
+),
+archivado AS (
+    SELECT
+        s.anio,
+        s.producto_fk,
+        SUM(sa.cantidad) AS stock_archivado
+    FROM
+        seleccion s
+    JOIN
+        saldo_stock_archivado sa ON sa.producto_fk = s.producto_fk AND sa.anio < s.anio
+    GROUP BY
+        s.anio, s.producto_fk
+),
+diario AS (
+    SELECT
+        m.anio,
+        m.producto_fk,
+        m.dia,
+        SUM(m.cantidad) AS variacion_stock
+    FROM
+        movimientos m
+    JOIN
+        seleccion s ON m.anio = s.anio AND m.producto_fk = s.producto_fk
+    GROUP BY
+        m.anio, m.producto_fk, m.dia
+)
 SELECT
+    d.anio,
     p.nombre_articulo,
-    DATE(hs.fecha) AS fecha,
-    SUM(CASE
-        WHEN dm.tipo_movimiento LIKE 'ENTRADA%%' OR dm.tipo_movimiento = 'AJUSTE_INV_POS' THEN hs.cantidad
-        ELSE -hs.cantidad
-    END) AS variacion_stock
+    d.dia AS fecha,
+    d.variacion_stock::BIGINT AS variacion_stock,
+    (COALESCE(a.stock_inicial, 0) + COALESCE(ar.stock_archivado, 0)
+     + SUM(d.variacion_stock) OVER (PARTITION BY d.anio, d.producto_fk ORDER BY d.dia))::BIGINT AS stock
 FROM
-    hechos_stock hs
+    diario d
 JOIN
-    productos p ON hs.producto_fk = p.producto_id
-JOIN
-    dim_movimiento dm ON hs.tipo_movimiento_fk = dm.id
-WHERE
-    EXTRACT(YEAR FROM hs.fecha) = %(year)s
-GROUP BY
-    p.nombre_articulo, DATE(hs.fecha)
+    productos p ON d.producto_fk = p.producto_id
+LEFT JOIN
+    apertura a ON d.anio = a.anio AND d.producto_fk = a.producto_fk
+LEFT JOIN
+    archivado ar ON d.anio = ar.anio AND d.producto_fk = ar.producto_fk
 ORDER BY
-    p.nombre_articulo, fecha;
+    d.anio, p.nombre_articulo, fecha;
 """
 # Consulta 5 Distribucion de tipos de movimientode stock por año
 
 DISTRIBUCION_TIPOS_MOVIMIENTO_SQL = """SELECT
   dm.tipo_movimiento,
-  DATE_TRUNC('month', hs.fecha) AS mes,
-  SUM(hs.cantidad) AS total_movimiento
+  DATE_TRUNC('month', r.dia::TIMESTAMP) AS mes,
+  SUM(r.cantidad) AS total_movimiento
 FROM
-  hechos_stock hs
-JOIN dim_movimiento dm ON hs.tipo_movimiento_fk = dm.id
+  resumen_stock_diario r
+JOIN dim_movimiento dm ON r.tipo_movimiento_fk = dm.id
 WHERE
-  EXTRACT(YEAR FROM hs.fecha) = %(year)s
+  r.dia >= %(fecha_desde)s AND r.dia < %(fecha_hasta)s
 GROUP BY
   dm.tipo_movimiento, mes
 ORDER BY
@@ -99,7 +177,7 @@ FROM
 JOIN
     productos p ON hv.producto_fk = p.producto_id
 WHERE
-    hv.fecha BETWEEN %(fecha_inicio)s AND %(fecha_fin)s  -- Usar parámetros
+    hv.fecha >= %(fecha_desde)s AND hv.fecha < %(fecha_hasta)s  -- fecha_hasta = día siguiente al fin del rango
 GROUP BY
     p.nombre_articulo
 ORDER BY
@@ -112,19 +190,181 @@ LIMIT 10;
 VENTAS_POR_CLIENTE_SQL = """
 SELECT
     c.nombre_cliente,
-    SUM(hv.total_venta) AS total_ventas
+    SUM(r.total_venta) AS total_ventas
 FROM
-    hechos_ventas hv
+    resumen_ventas_mensual r
 JOIN
-    cliente c ON hv.cliente_fk = c.cliente_id
+    cliente c ON r.cliente_fk = c.cliente_id
 WHERE
-    EXTRACT(YEAR FROM hv.fecha) = %(year)s  -- Opcional: Filtrar por año
+    r.mes >= %(fecha_desde)s AND r.mes < %(fecha_hasta)s  -- Rango semiabierto del año
 GROUP BY
     c.nombre_cliente
 ORDER BY
     total_ventas DESC;
 """
 
+# --- MODO POR LOTES: una lectura de ventas y una de stock para todos los años pedidos (src/analysis.py) ---
+# `años` es la lista de años pedidos; cada uno se lee como un rango semiabierto, así los años
+# intermedios que no se pidieron (p. ej. 2024 en "2023 2025") no se leen
+
+# Ventas del año al grano del resumen, con las dimensiones ya unidas: el join se hace sobre filas ya
+# agregadas, así que es más barato que traer las dimensiones completas y unirlas en pandas
+VENTAS_ANUALES_DETALLE_SQL = """
+SELECT
+    r.mes,
+    p.nombre_articulo,
+    c.nombre_categoria,
+    cl.nombre_cliente,
+    r.cantidad,
+    r.total_venta
+FROM
+    UNNEST(%(años)s::INTEGER[]) AS a(anio)
+JOIN
+    resumen_ventas_mensual r ON r.mes >= MAKE_DATE(a.anio, 1, 1) AND r.mes < MAKE_DATE(a.anio + 1, 1, 1)
+JOIN
+    productos p ON r.producto_fk = p.producto_id
+JOIN
+    categorias c ON p.categoria_fk = c.categoria_id
+LEFT JOIN
+    cliente cl ON r.cliente_fk = cl.cliente_id;
+"""
+
+# Movimientos de stock del año por día y tipo de movimiento (la evolución por producto la calcula
+# STOCK_EVOLUCION_SQL)
+STOCK_ANUAL_DETALLE_SQL = """
+SELECT
+    r.dia,
+    dm.tipo_movimiento,
+    SUM(r.cantidad)::BIGINT AS cantidad
+FROM
+    UNNEST(%(años)s::INTEGER[]) AS a(anio)
+JOIN
+    resumen_stock_diario r ON r.dia >= MAKE_DATE(a.anio, 1, 1) AND r.dia < MAKE_DATE(a.anio + 1, 1, 1)
+JOIN
+    dim_movimiento dm ON r.tipo_movimiento_fk = dm.id
+GROUP BY
+    r.dia, dm.tipo_movimiento;
+"""
+
+# --- REFRESCO INCREMENTAL DE LAS TABLAS DE RESUMEN (src/resumenes.py) ---
+
+# Bloquea la fila de control de una tabla de hechos y devuelve el último id incorporado y la
+# versión de los datos (version_datos) con que se hizo el último refresco
+GET_RESUMEN_CONTROL_SQL = "SELECT ultimo_id, version_datos FROM resumen_control WHERE tabla_hechos = %s FOR UPDATE;"
+UPDATE_RESUMEN_CONTROL_SQL = "UPDATE resumen_control SET ultimo_id = %s, version_datos = %s WHERE tabla_hechos = %s;"
+
+MAX_VENTA_ID_SQL = "SELECT COALESCE(MAX(venta_id), 0) FROM hechos_ventas;"
+MAX_MOVIMIENTO_ID_SQL = "SELECT COALESCE(MAX(movimiento_id), 0) FROM hechos_stock;"
+
+# Meses que recibieron hechos con id en (ultimo_id, nuevo_max]
+MESES_CON_VENTAS_NUEVAS_SQL = """
+SELECT DISTINCT DATE_TRUNC('month', fecha)::DATE AS mes
+FROM hechos_ventas
+WHERE venta_id > %s AND venta_id <= %s;
+"""
+MESES_CON_STOCK_NUEVO_SQL = """
+SELECT DISTINCT DATE_TRUNC('month', fecha)::DATE AS mes
+FROM hechos_stock
+WHERE movimiento_id > %s AND movimiento_id <= %s;
+"""
+
+# Todos los meses con hechos, para reconstruir un resumen completo
+MESES_CON_VENTAS_SQL = "SELECT DISTINCT DATE_TRUNC('month', fecha)::DATE AS mes FROM hechos_ventas;"
+MESES_CON_STOCK_SQL = "SELECT DISTINCT DATE_TRUNC('month', fecha)::DATE AS mes FROM hechos_stock;"
+
+# Meses modificados, borrados o insertados según los triggers de sql/migracion_v2_05_meses_pendientes.sql.
+# Se borran al leerlos, dentro de la transacción del refresco. Un mes NULL pide reconstruir todo el resumen.
+CONSUMIR_MESES_PENDIENTES_SQL = "DELETE FROM resumen_meses_pendientes WHERE tabla_hechos = %s RETURNING mes;"
+
+TRUNCATE_RESUMEN_VENTAS_SQL = "TRUNCATE resumen_ventas_mensual;"
+TRUNCATE_RESUMEN_STOCK_SQL = "TRUNCATE resumen_stock_diario;"
+
+# Recalculo de un mes completo: parámetros (inicio_mes, inicio_mes_siguiente)
+DELETE_RESUMEN_VENTAS_MES_SQL = "DELETE FROM resumen_ventas_mensual WHERE mes >= %s AND mes < %s;"
+INSERT_RESUMEN_VENTAS_MES_SQL = """
+INSERT INTO resumen_ventas_mensual (mes, producto_fk, cliente_fk, cantidad, total_venta, n_ventas)
+SELECT
+    DATE_TRUNC('month', fecha)::DATE,
+    producto_fk,
+    cliente_fk,
+    SUM(cantidad),
+    SUM(total_venta),
+    COUNT(*)
+FROM
+    hechos_ventas
+WHERE
+    fecha >= %s AND fecha < %s
+GROUP BY
+    1, producto_fk, cliente_fk;
+"""
+DELETE_RESUMEN_STOCK_MES_SQL = "DELETE FROM resumen_stock_diario WHERE dia >= %s AND dia < %s;"
+INSERT_RESUMEN_STOCK_MES_SQL = """
+INSERT INTO resumen_stock_diario (dia, producto_fk, tipo_movimiento_fk, cantidad, n_movimientos)
+SELECT
+    fecha::DATE,
+    producto_fk,
+    tipo_movimiento_fk,
+    SUM(cantidad),
+    COUNT(*)
+FROM
+    hechos_stock
+WHERE
+    fecha >= %s AND fecha < %s
+GROUP BY
+    1, producto_fk, tipo_movimiento_fk;
+"""
+
+# --- VERSIÓN DE LOS DATOS (sql/migracion_v2_04_version_datos.sql) ---
+
+# Contadores de cambios de todas las tablas; juntos forman el token de versión de src/cache_resultados.py
+VERSION_DATOS_SQL = "SELECT tabla, version FROM version_datos ORDER BY tabla;"
+VERSION_TABLA_SQL = "SELECT version FROM version_datos WHERE tabla = %s;"
+# Para cambios que no disparan los triggers, como separar o adjuntar particiones
+INCREMENTAR_VERSION_DATOS_SQL = "UPDATE version_datos SET version = version + 1 WHERE tabla = %s;"
+
+# --- PARTICIONES ANUALES DE LOS HECHOS (src/particiones.py) ---
+# Las plantillas con {tabla}, {particion} y {default} se completan con psycopg2.sql.Identifier
+
+# Particiones de una tabla particionada con sus límites, p. ej. FOR VALUES FROM ('2024-01-01') TO ('2025-01-01')
+LIST_PARTICIONES_SQL = """
+SELECT
+    c.relname AS particion,
+    pg_get_expr(c.relpartbound, c.oid) AS limites,
+    GREATEST(c.reltuples, 0)::BIGINT AS filas_estimadas
+FROM
+    pg_inherits i
+JOIN
+    pg_class c ON c.oid = i.inhrelid
+WHERE
+    i.inhparent = %s::regclass
+ORDER BY
+    c.relname;
+"""
+EXISTE_TABLA_SQL = "SELECT to_regclass(%s) IS NOT NULL;"
+
+# Una partición anual se crea como tabla suelta, recibe las filas de su año que hubieran caído en la
+# partición DEFAULT y recién entonces se adjunta; así funciona aunque DEFAULT ya tenga filas de ese año
+CREATE_TABLA_PARTICION_SQL = "CREATE TABLE {particion} (LIKE {tabla} INCLUDING DEFAULTS INCLUDING CONSTRAINTS);"
+MOVER_DESDE_DEFAULT_SQL = """
+WITH movidas AS (
+    DELETE FROM {default} WHERE fecha >= %s AND fecha < %s RETURNING *
+)
+INSERT INTO {particion} SELECT * FROM movidas;
+"""
+ATTACH_PARTICION_SQL = "ALTER TABLE {tabla} ATTACH PARTITION {particion} FOR VALUES FROM (%s) TO (%s);"
+DETACH_PARTICION_SQL = "ALTER TABLE {tabla} DETACH PARTITION {particion};"
+DROP_PARTICION_SQL = "DROP TABLE {particion};"
+
+# Saldo por producto de un año separado de hechos_stock (sql/migracion_v2_06_saldo_stock_archivado.sql),
+# leído de la tabla suelta; al adjuntar el año de nuevo se borra
+INSERT_SALDO_STOCK_ARCHIVADO_SQL = """
+INSERT INTO saldo_stock_archivado (anio, producto_fk, cantidad)
+SELECT %s, producto_fk, SUM(cantidad)
+FROM {particion}
+GROUP BY producto_fk;
+"""
+DELETE_SALDO_STOCK_ARCHIVADO_SQL = "DELETE FROM saldo_stock_archivado WHERE anio = %s;"
+
 GET_ALL_PRODUCTS_SQL = """
 SELECT
     producto_id,
@@ -1,7 +1,45 @@
 # src/queries_relacional.py
 
-# Query para obtener una 'página' de productos con sus nombres de categoría, etc.
-GET_PAGINATED_PRODUCTS_SQL = """
+# --- PAGINACIÓN POR CLAVE (KEYSET) ---
+# Las páginas se ordenan por (nombre, producto_id) y se piden "después de" la última fila o
+# "antes de" la primera fila de la página actual, en vez de usar OFFSET. Con el índice de
+# sql/migracion_relacional_01_indice_paginacion.sql cualquier página cuesta lo mismo que la primera.
+# Las consultas "antes de" devuelven las filas en orden descendente; hay que invertirlas.
+
+# Query para obtener la primera 'página' de productos con sus nombres de categoría, etc.
+GET_FIRST_PRODUCTS_PAGE_SQL = """
+SELECT
+    p.producto_id, p.nombre, p.sku, p.costo_unitario, p.precio_venta,
+    p.stock, c.nombre AS categoria, f.nombre AS fabricante, u.descripcion AS ubicacion
+FROM
+    "Productos" p
+LEFT JOIN "Categorias" c ON p.categoria_id = c.categoria_id
+LEFT JOIN "Fabricantes" f ON p.fabricante_id = f.fabricante_id
+LEFT JOIN "Ubicaciones" u ON p.ubicacion_id = u.ubicacion_id
+ORDER BY
+    p.nombre, p.producto_id
+LIMIT %s;
+"""
+
+# Query para obtener la 'página' de productos que sigue al cursor (nombre, producto_id)
+GET_PRODUCTS_PAGE_AFTER_SQL = """
+SELECT
+    p.producto_id, p.nombre, p.sku, p.costo_unitario, p.precio_venta,
+    p.stock, c.nombre AS categoria, f.nombre AS fabricante, u.descripcion AS ubicacion
+FROM
+    "Productos" p
+LEFT JOIN "Categorias" c ON p.categoria_id = c.categoria_id
+LEFT JOIN "Fabricantes" f ON p.fabricante_id = f.fabricante_id
+LEFT JOIN "Ubicaciones" u ON p.ubicacion_id = u.ubicacion_id
+WHERE
+    (p.nombre, p.producto_id) > (%s, %s)
+ORDER BY
+    p.nombre, p.producto_id
+LIMIT %s;
+"""
+
+# Query para obtener la 'página' de productos que precede al cursor (nombre, producto_id), en orden inverso
+GET_PRODUCTS_PAGE_BEFORE_SQL = """
 SELECT
     p.producto_id, p.nombre, p.sku, p.costo_unitario, p.precio_venta,
     p.stock, c.nombre AS categoria, f.nombre AS fabricante, u.descripcion AS ubicacion
@@ -10,19 +48,34 @@ FROM
 LEFT JOIN "Categorias" c ON p.categoria_id = c.categoria_id
 LEFT JOIN "Fabricantes" f ON p.fabricante_id = f.fabricante_id
 LEFT JOIN "Ubicaciones" u ON p.ubicacion_id = u.ubicacion_id
+WHERE
+    (p.nombre, p.producto_id) < (%s, %s)
 ORDER BY
-    p.nombre
-LIMIT %s OFFSET %s;
+    p.nombre DESC, p.producto_id DESC
+LIMIT %s;
 """
 
 # Query para contar el total de productos
 COUNT_PRODUCTS_SQL = 'SELECT COUNT(*) as total FROM "Productos";'
 
+# Estimación del total de productos según las estadísticas del planificador (sin recorrer la tabla).
+# Si la estimación es menor que el umbral (ambos %s) se cuenta exacto, que en ese caso es barato;
+# reltuples vale -1 (o 0 en versiones antiguas) si la tabla aún no se ha analizado.
+ESTIMATE_PRODUCTS_COUNT_SQL = """
+SELECT
+    CASE WHEN c.reltuples >= %s THEN c.reltuples::BIGINT ELSE (SELECT COUNT(*) FROM "Productos") END AS total,
+    c.reltuples >= %s AS estimado
+FROM pg_class c
+WHERE c.oid = '"Productos"'::regclass;
+"""
+
 
-# --- QUERIES PARA BÚSQUEDA (ACTUALIZADAS CON UNACCENT) ---
+# --- QUERIES PARA BÚSQUEDA (INSENSIBLES A ACENTOS) ---
+# f_unaccent() es la versión IMMUTABLE de unaccent() creada en sql/migracion_relacional_02_busqueda_trigram.sql;
+# las expresiones deben coincidir con las de los índices de trigramas para que el planificador los use.
 
-# Query para obtener una 'página' de productos FILTRADOS por nombre o SKU (insensible a acentos)
-GET_FILTERED_PAGINATED_PRODUCTS_SQL = """
+# Query para obtener la primera 'página' de productos FILTRADOS por nombre o SKU (insensible a acentos)
+GET_FIRST_FILTERED_PRODUCTS_PAGE_SQL = """
 SELECT
     p.producto_id, p.nombre, p.sku, p.costo_unitario, p.precio_venta,
     p.stock, c.nombre AS categoria, f.nombre AS fabricante, u.descripcion AS ubicacion
@@ -32,14 +85,95 @@ LEFT JOIN "Categorias" c ON p.categoria_id = c.categoria_id
 LEFT JOIN "Fabricantes" f ON p.fabricante_id = f.fabricante_id
 LEFT JOIN "Ubicaciones" u ON p.ubicacion_id = u.ubicacion_id
 WHERE
-    unaccent(p.nombre) ILIKE unaccent(%s) OR unaccent(p.sku) ILIKE unaccent(%s)
+    (f_unaccent(p.nombre) ILIKE f_unaccent(%s) OR f_unaccent(p.sku) ILIKE f_unaccent(%s))
 ORDER BY
-    p.nombre
-LIMIT %s OFFSET %s;
+    p.nombre, p.producto_id
+LIMIT %s;
+"""
+
+# Query para obtener la 'página' de productos FILTRADOS que sigue al cursor (nombre, producto_id)
+GET_FILTERED_PRODUCTS_PAGE_AFTER_SQL = """
+SELECT
+    p.producto_id, p.nombre, p.sku, p.costo_unitario, p.precio_venta,
+    p.stock, c.nombre AS categoria, f.nombre AS fabricante, u.descripcion AS ubicacion
+FROM
+    "Productos" p
+LEFT JOIN "Categorias" c ON p.categoria_id = c.categoria_id
+LEFT JOIN "Fabricantes" f ON p.fabricante_id = f.fabricante_id
+LEFT JOIN "Ubicaciones" u ON p.ubicacion_id = u.ubicacion_id
+WHERE
+    (f_unaccent(p.nombre) ILIKE f_unaccent(%s) OR f_unaccent(p.sku) ILIKE f_unaccent(%s))
+    AND (p.nombre, p.producto_id) > (%s, %s)
+ORDER BY
+    p.nombre, p.producto_id
+LIMIT %s;
+"""
+
+# Query para obtener la 'página' de productos FILTRADOS que precede al cursor (nombre, producto_id), en orden inverso
+GET_FILTERED_PRODUCTS_PAGE_BEFORE_SQL = """
+SELECT
+    p.producto_id, p.nombre, p.sku, p.costo_unitario, p.precio_venta,
+    p.stock, c.nombre AS categoria, f.nombre AS fabricante, u.descripcion AS ubicacion
+FROM
+    "Productos" p
+LEFT JOIN "Categorias" c ON p.categoria_id = c.categoria_id
+LEFT JOIN "Fabricantes" f ON p.fabricante_id = f.fabricante_id
+LEFT JOIN "Ubicaciones" u ON p.ubicacion_id = u.ubicacion_id
+WHERE
+    (f_unaccent(p.nombre) ILIKE f_unaccent(%s) OR f_unaccent(p.sku) ILIKE f_unaccent(%s))
+    AND (p.nombre, p.producto_id) < (%s, %s)
+ORDER BY
+    p.nombre DESC, p.producto_id DESC
+LIMIT %s;
 """
 
 # Query para contar el total de productos FILTRADOS (insensible a acentos)
-COUNT_FILTERED_PRODUCTS_SQL = 'SELECT COUNT(*) as total FROM "Productos" WHERE unaccent(nombre) ILIKE unaccent(%s) OR unaccent(sku) ILIKE unaccent(%s);'
+COUNT_FILTERED_PRODUCTS_SQL = 'SELECT COUNT(*) as total FROM "Productos" WHERE f_unaccent(nombre) ILIKE f_unaccent(%s) OR f_unaccent(sku) ILIKE f_unaccent(%s);'
+
+
+# --- PÁGINA Y TOTAL EN UNA SOLA CONSULTA ---
+# Consultas de página por modo ('inicio', 'siguiente', 'anterior') y si hay filtro de búsqueda
+PRODUCTS_PAGE_SQL = {
+    ('inicio', False): GET_FIRST_PRODUCTS_PAGE_SQL,
+    ('siguiente', False): GET_PRODUCTS_PAGE_AFTER_SQL,
+    ('anterior', False): GET_PRODUCTS_PAGE_BEFORE_SQL,
+    ('inicio', True): GET_FIRST_FILTERED_PRODUCTS_PAGE_SQL,
+    ('siguiente', True): GET_FILTERED_PRODUCTS_PAGE_AFTER_SQL,
+    ('anterior', True): GET_FILTERED_PRODUCTS_PAGE_BEFORE_SQL,
+}
+
+_ORDEN_PAGINA = {
+    'inicio': 'pagina.nombre, pagina.producto_id',
+    'siguiente': 'pagina.nombre, pagina.producto_id',
+    'anterior': 'pagina.nombre DESC, pagina.producto_id DESC',
+}
+
+def _pagina_con_total(pagina_sql: str, total_sql: str, modo: str) -> str:
+    """
+    Une una consulta de página y una de total en un solo viaje a la base de datos.
+    Los parámetros van en orden: los de la página y después los del total. Si la página
+    está vacía se devuelve una sola fila con el total y el resto de las columnas en NULL.
+    """
+    return f"""
+WITH pagina AS ({pagina_sql.strip().rstrip(';')}),
+total AS ({total_sql.strip().rstrip(';')})
+SELECT pagina.*, total.*
+FROM total
+LEFT JOIN pagina ON TRUE
+ORDER BY {_ORDEN_PAGINA[modo]};
+"""
+
+# Página + conteo exacto (COUNT_PRODUCTS_SQL o COUNT_FILTERED_PRODUCTS_SQL), por (modo, filtrado)
+PRODUCTS_PAGE_WITH_COUNT_SQL = {
+    (modo, filtrado): _pagina_con_total(sql, COUNT_FILTERED_PRODUCTS_SQL if filtrado else COUNT_PRODUCTS_SQL, modo)
+    for (modo, filtrado), sql in PRODUCTS_PAGE_SQL.items()
+}
+
+# Página sin filtro + estimación (ESTIMATE_PRODUCTS_COUNT_SQL), por modo
+PRODUCTS_PAGE_WITH_ESTIMATE_SQL = {
+    modo: _pagina_con_total(PRODUCTS_PAGE_SQL[(modo, False)], ESTIMATE_PRODUCTS_COUNT_SQL, modo)
+    for modo in _ORDEN_PAGINA
+}
 
 
 # --- RESTO DE QUERIES (SIN CAMBIOS) ---
@@ -57,9 +191,62 @@ DELETE_PRODUCT_SQL = 'DELETE FROM "Productos" WHERE producto_id = %s;'
 GET_ALL_CATEGORIAS_SQL = 'SELECT categoria_id, nombre FROM "Categorias" ORDER BY nombre;'
 GET_ALL_FABRICANTES_SQL = 'SELECT fabricante_id, nombre FROM "Fabricantes" ORDER BY nombre;'
 GET_ALL_UBICACIONES_SQL = 'SELECT ubicacion_id, descripcion FROM "Ubicaciones" ORDER BY descripcion;'
-GET_LAST_SKU_SQL = """
-SELECT sku FROM "Productos"
-WHERE fabricante_id = %s AND categoria_id = %s
-ORDER BY sku DESC
-LIMIT 1;
+# Los tres catálogos en una sola consulta, como filas (dimension, id, nombre), para src/dimensiones.py
+GET_ALL_DIMENSIONS_SQL = """
+SELECT 'categoria' AS dimension, categoria_id AS id, nombre FROM "Categorias"
+UNION ALL
+SELECT 'fabricante', fabricante_id, nombre FROM "Fabricantes"
+UNION ALL
+SELECT 'ubicacion', ubicacion_id, descripcion FROM "Ubicaciones"
+ORDER BY dimension, id;
+"""
+
+# --- SKU: CONTADORES POR (FABRICANTE, CATEGORÍA) (sql/migracion_relacional_03_secuencias_sku.sql) ---
+
+# Próximo número de SKU de una combinación, sin reservarlo (vista previa en el formulario)
+PREVIEW_SKU_SQL = """
+SELECT COALESCE((SELECT ultimo FROM "SkuSecuencias" WHERE fabricante_id = %s AND categoria_id = %s), 0) + 1 AS siguiente;
+"""
+
+# Reserva el siguiente número de la combinación e inserta el producto con ese SKU en una sola sentencia.
+# El prefijo (FAB-CAT) lo arma src/skus.py; el número se rellena con ceros a 4 dígitos como mínimo.
+INSERT_PRODUCT_WITH_SKU_SQL = """
+WITH seq AS (
+    INSERT INTO "SkuSecuencias" (fabricante_id, categoria_id, ultimo)
+    VALUES (%(fabricante_id)s, %(categoria_id)s, 1)
+    ON CONFLICT (fabricante_id, categoria_id) DO UPDATE SET ultimo = "SkuSecuencias".ultimo + 1
+    RETURNING ultimo
+)
+INSERT INTO "Productos" (nombre, sku, costo_unitario, precio_venta, stock, categoria_id, fabricante_id, ubicacion_id)
+SELECT
+    %(nombre)s, %(prefijo)s || '-' || LPAD(seq.ultimo::TEXT, GREATEST(4, LENGTH(seq.ultimo::TEXT)), '0'),
+    %(costo_unitario)s, %(precio_venta)s, %(stock)s, %(categoria_id)s, %(fabricante_id)s, %(ubicacion_id)s
+FROM seq
+RETURNING producto_id, sku;
+"""
+
+# Igual que UPDATE_PRODUCT_SQL pero reservando un SKU nuevo, para cuando cambian el fabricante o la categoría
+UPDATE_PRODUCT_WITH_NEW_SKU_SQL = """
+WITH seq AS (
+    INSERT INTO "SkuSecuencias" (fabricante_id, categoria_id, ultimo)
+    VALUES (%(fabricante_id)s, %(categoria_id)s, 1)
+    ON CONFLICT (fabricante_id, categoria_id) DO UPDATE SET ultimo = "SkuSecuencias".ultimo + 1
+    RETURNING ultimo
+)
+UPDATE "Productos"
+SET nombre = %(nombre)s, sku = %(prefijo)s || '-' || LPAD(seq.ultimo::TEXT, GREATEST(4, LENGTH(seq.ultimo::TEXT)), '0'),
+    costo_unitario = %(costo_unitario)s, precio_venta = %(precio_venta)s, stock = %(stock)s,
+    categoria_id = %(categoria_id)s, fabricante_id = %(fabricante_id)s, ubicacion_id = %(ubicacion_id)s
+FROM seq
+WHERE producto_id = %(producto_id)s
+RETURNING producto_id, sku;
+"""
+
+# Reserva en bloque: suma `cantidad` al contador de cada combinación y devuelve el último número reservado.
+# Se usa con psycopg2.extras.execute_values(..., fetch=True); las filas (fabricante_id, categoria_id, cantidad).
+RESERVE_SKU_BLOCKS_SQL = """
+INSERT INTO "SkuSecuencias" (fabricante_id, categoria_id, ultimo)
+VALUES %s
+ON CONFLICT (fabricante_id, categoria_id) DO UPDATE SET ultimo = "SkuSecuencias".ultimo + EXCLUDED.ultimo
+RETURNING fabricante_id, categoria_id, ultimo;
 """
@@ -0,0 +1,133 @@
+# src/resumenes.py
+
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import argparse
+import datetime
+import psycopg2
+from dateutil.relativedelta import relativedelta
+from src.database import get_pooled_connection
+from src.queries import (
+    GET_RESUMEN_CONTROL_SQL,
+    UPDATE_RESUMEN_CONTROL_SQL,
+    VERSION_TABLA_SQL,
+    MAX_VENTA_ID_SQL,
+    MAX_MOVIMIENTO_ID_SQL,
+    MESES_CON_VENTAS_NUEVAS_SQL,
+    MESES_CON_STOCK_NUEVO_SQL,
+    MESES_CON_VENTAS_SQL,
+    MESES_CON_STOCK_SQL,
+    CONSUMIR_MESES_PENDIENTES_SQL,
+    TRUNCATE_RESUMEN_VENTAS_SQL,
+    TRUNCATE_RESUMEN_STOCK_SQL,
+    DELETE_RESUMEN_VENTAS_MES_SQL,
+    INSERT_RESUMEN_VENTAS_MES_SQL,
+    DELETE_RESUMEN_STOCK_MES_SQL,
+    INSERT_RESUMEN_STOCK_MES_SQL
+)
+
+# tabla de hechos -> (max id, meses con hechos nuevos, todos los meses, vaciado del resumen,
+#                     borrado de un mes, recalculo de un mes)
+RESUMENES = {
+    'hechos_ventas': (MAX_VENTA_ID_SQL, MESES_CON_VENTAS_NUEVAS_SQL, MESES_CON_VENTAS_SQL, TRUNCATE_RESUMEN_VENTAS_SQL,
+                      DELETE_RESUMEN_VENTAS_MES_SQL, INSERT_RESUMEN_VENTAS_MES_SQL),
+    'hechos_stock': (MAX_MOVIMIENTO_ID_SQL, MESES_CON_STOCK_NUEVO_SQL, MESES_CON_STOCK_SQL, TRUNCATE_RESUMEN_STOCK_SQL,
+                     DELETE_RESUMEN_STOCK_MES_SQL, INSERT_RESUMEN_STOCK_MES_SQL),
+}
+
+def _recalcular_meses(cursor, meses, delete_sql: str, insert_sql: str) -> int:
+    """Borra y vuelve a agregar cada mes de `meses`; un mes que ya no tiene hechos queda vacío."""
+    meses = sorted(meses)
+    for mes in meses:
+        mes_siguiente = mes + relativedelta(months=1)
+        cursor.execute(delete_sql, (mes, mes_siguiente))
+        cursor.execute(insert_sql, (mes, mes_siguiente))
+    return len(meses)
+
+def recalcular_año(cursor, tabla_hechos: str, año: int) -> int:
+    """
+    Recalcula en el resumen de `tabla_hechos` los doce meses de `año`, en la transacción de `cursor`.
+    Lo usa src/particiones.py: tras separar la partición del año sus meses quedan vacíos, y tras
+    adjuntarla se vuelven a agregar desde los hechos.
+    """
+    _, _, _, _, delete_sql, insert_sql = RESUMENES[tabla_hechos]
+    return _recalcular_meses(cursor, (datetime.date(año, mes, 1) for mes in range(1, 13)), delete_sql, insert_sql)
+
+def _refrescar_tabla(cursor, tabla_hechos: str, completo: bool) -> int:
+    """
+    Recalcula en el resumen de `tabla_hechos` los meses que cambiaron desde el último refresco:
+    los que recibieron ids nuevos y los anotados en resumen_meses_pendientes por los triggers de
+    sql/migracion_v2_05_meses_pendientes.sql (UPDATE, DELETE e inserciones con ids menores que se
+    confirmaron tarde). Si la versión de la tabla en version_datos no cambió, no lee la tabla de hechos.
+    Con `completo`, o si los hechos se truncaron, vacía el resumen y lo reconstruye entero.
+    Devuelve la cantidad de meses recalculados.
+    """
+    max_id_sql, meses_nuevos_sql, todos_meses_sql, truncate_sql, delete_sql, insert_sql = RESUMENES[tabla_hechos]
+    cursor.execute(GET_RESUMEN_CONTROL_SQL, (tabla_hechos,))
+    fila = cursor.fetchone()
+    if fila is None:
+        raise ValueError(f"No existe la fila de control para '{tabla_hechos}' en resumen_control. ¿Se ejecutó sql/migracion_v2_02_resumenes.sql?")
+    ultimo_id = fila[0]
+
+    # La versión se lee antes que los meses pendientes y el máximo id: si llegan hechos entre medio,
+    # el próximo refresco ve otra versión y los revisa (recalcular un mes dos veces no cambia el resultado)
+    cursor.execute(VERSION_TABLA_SQL, (tabla_hechos,))
+    version = cursor.fetchone()
+    if version is None:
+        raise ValueError(f"No existe la versión de '{tabla_hechos}' en version_datos. ¿Se ejecutó sql/migracion_v2_04_version_datos.sql?")
+    version = version[0]
+    if not completo and version == fila[1]:
+        return 0
+
+    cursor.execute(CONSUMIR_MESES_PENDIENTES_SQL, (tabla_hechos,))
+    meses = {row[0] for row in cursor.fetchall()}
+    cursor.execute(max_id_sql)
+    nuevo_max = cursor.fetchone()[0]
+
+    if completo or None in meses:
+        cursor.execute(truncate_sql)
+        cursor.execute(todos_meses_sql)
+        recalculados = _recalcular_meses(cursor, (row[0] for row in cursor.fetchall()), delete_sql, insert_sql)
+        cursor.execute(UPDATE_RESUMEN_CONTROL_SQL, (nuevo_max, version, tabla_hechos))
+        return recalculados
+
+    if nuevo_max > ultimo_id:
+        cursor.execute(meses_nuevos_sql, (ultimo_id, nuevo_max))
+        meses.update(row[0] for row in cursor.fetchall())
+    recalculados = _recalcular_meses(cursor, meses, delete_sql, insert_sql)
+    # Borrar los últimos ids no hace retroceder la marca: la secuencia nunca los vuelve a entregar
+    cursor.execute(UPDATE_RESUMEN_CONTROL_SQL, (max(nuevo_max, ultimo_id), version, tabla_hechos))
+    return recalculados
+
+def refrescar_resumenes(completo: bool = False) -> bool:
+    """
+    Actualiza resumen_ventas_mensual y resumen_stock_diario en una sola transacción,
+    recalculando solo los meses con hechos nuevos, modificados o borrados (ver _refrescar_tabla).
+    Las tablas de hechos cuya versión en version_datos no cambió desde el último refresco no se leen.
+    Con `completo` los resúmenes se vacían y se reconstruyen desde los hechos.
+    Devuelve True si el refresco terminó bien.
+    """
+    try:
+        with get_pooled_connection() as conn:
+            if not conn:
+                print("ERROR: No se pudo conectar a la base de datos para refrescar los resúmenes.")
+                return False
+            with conn.cursor() as cursor:
+                for tabla_hechos in RESUMENES:
+                    meses = _refrescar_tabla(cursor, tabla_hechos, completo)
+                    if meses:
+                        print(f"INFO: Resumen de {tabla_hechos}: {meses} meses recalculados.")
+            conn.commit()
+            return True
+    except (psycopg2.Error, ValueError) as e:
+        print(f"ERROR: No se pudieron refrescar las tablas de resumen: {e}")
+        return False
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Refresca las tablas de resumen del esquema estrella.")
+    parser.add_argument("--completo", action="store_true", help="Vacía los resúmenes y recalcula todos los meses, no solo los que cambiaron.")
+    args = parser.parse_args()
+    if not refrescar_resumenes(args.completo):
+        sys.exit(1)
@@ -0,0 +1,42 @@
+# src/skus.py
+
+import psycopg2.extras
+from src.database import execute_query_rows
+from src.queries_relacional import PREVIEW_SKU_SQL, RESERVE_SKU_BLOCKS_SQL
+
+# Los SKU tienen la forma FAB-CAT-0001: tres letras del fabricante, tres de la categoría y un número
+# correlativo por (fabricante, categoría) que se reserva en la tabla "SkuSecuencias".
+
+def prefijo_sku(nombre_fabricante: str, nombre_categoria: str) -> str:
+    """Prefijo FAB-CAT a partir de los nombres del fabricante y la categoría."""
+    return f"{nombre_fabricante[:3].upper()}-{nombre_categoria[:3].upper()}"
+
+def formatear_sku(prefijo: str, numero: int) -> str:
+    """SKU completo con el número rellenado a 4 dígitos (igual que INSERT_PRODUCT_WITH_SKU_SQL)."""
+    return f"{prefijo}-{numero:04d}"
+
+def previsualizar_sku(fabricante_id: int, categoria_id: int, prefijo: str) -> str | None:
+    """
+    SKU que recibiría el próximo producto de la combinación, con una lectura por llave primaria.
+    No reserva el número: otro usuario puede usarlo antes; el definitivo lo asigna la inserción.
+    """
+    resultado = execute_query_rows(PREVIEW_SKU_SQL, (fabricante_id, categoria_id))
+    if resultado is None:
+        return None
+    return formatear_sku(prefijo, int(resultado[1][0][0]))
+
+def reservar_skus(cursor, cantidades: dict) -> dict:
+    """
+    Reserva de una vez `cantidad` números para cada (fabricante_id, categoria_id) de `cantidades`
+    y devuelve {(fabricante_id, categoria_id): primer número reservado}. Los números van del
+    primero al primero + cantidad - 1. Se ejecuta en la transacción de `cursor`, así que la
+    reserva se confirma o se descarta junto con la carga.
+    """
+    if not cantidades:
+        return {}
+    filas = psycopg2.extras.execute_values(
+        cursor, RESERVE_SKU_BLOCKS_SQL,
+        [(fab_id, cat_id, cantidad) for (fab_id, cat_id), cantidad in sorted(cantidades.items())],
+        fetch=True
+    )
+    return {(fab_id, cat_id): ultimo - cantidades[(fab_id, cat_id)] + 1 for fab_id, cat_id, ultimo in filas}
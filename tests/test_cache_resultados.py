@@ -0,0 +1,70 @@
+# tests/test_cache_resultados.py
+#
+# Pruebas de CacheResultados sobre una carpeta temporal; no usan la base de datos.
+#   python -m unittest discover -s tests
+
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import tempfile
+import unittest
+import pandas as pd
+from src.cache_resultados import CacheResultados
+
+class CacheResultadosTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directorio = tempfile.TemporaryDirectory()
+        self.cache = CacheResultados(self.directorio.name, max_bytes=16 * 1024 * 1024)
+        self.df = pd.DataFrame({'mes': [1, 2, 3], 'ventas_totales': [10.5, 20.0, 30.25]})
+
+    def tearDown(self):
+        self.directorio.cleanup()
+
+    def _entradas(self) -> set:
+        return {nombre[:-len(".parquet")] for nombre in os.listdir(self.directorio.name) if nombre.endswith(".parquet")}
+
+    def test_clave_no_depende_del_orden_de_los_parametros(self):
+        sql_query = "SELECT 1 WHERE fecha >= %(fecha_desde)s AND fecha < %(fecha_hasta)s;"
+        clave = CacheResultados.clave(sql_query, {'fecha_desde': '2024-01-01', 'fecha_hasta': '2025-01-01'}, "v1")
+        self.assertEqual(clave, CacheResultados.clave(sql_query, {'fecha_hasta': '2025-01-01', 'fecha_desde': '2024-01-01'}, "v1"))
+        self.assertNotEqual(clave, CacheResultados.clave(sql_query, {'fecha_desde': '2023-01-01', 'fecha_hasta': '2025-01-01'}, "v1"))
+        self.assertNotEqual(clave, CacheResultados.clave(sql_query, {'fecha_desde': '2024-01-01', 'fecha_hasta': '2025-01-01'}, "v2"))
+
+    def test_guardar_y_leer(self):
+        self.cache.guardar("a", self.df)
+        pd.testing.assert_frame_equal(self.cache.leer("a"), self.df)
+        self.assertIsNone(self.cache.leer("b"))
+        self.assertEqual((self.cache.aciertos, self.cache.fallos), (1, 1))
+
+    def test_guardar_omite_resultados_sin_columnas(self):
+        self.cache.guardar("vacio", pd.DataFrame())
+        self.cache.guardar("nulo", None)
+        self.assertEqual(self._entradas(), set())
+
+    def test_leer_descarta_un_archivo_ilegible(self):
+        with open(os.path.join(self.directorio.name, "danada.parquet"), "wb") as archivo:
+            archivo.write(b"no es parquet")
+        self.assertIsNone(self.cache.leer("danada"))
+        self.assertEqual(self.cache.fallos, 1)
+        self.assertEqual(self._entradas(), set())
+
+    def test_recortar_borra_la_entrada_usada_hace_mas_tiempo(self):
+        self.cache.guardar("a", self.df)
+        self.cache.guardar("b", self.df)
+        os.utime(os.path.join(self.directorio.name, "a.parquet"), (1000, 1000))
+        os.utime(os.path.join(self.directorio.name, "b.parquet"), (2000, 2000))
+        # Leer "a" actualiza su fecha de modificación: la menos usada pasa a ser "b"
+        self.assertIsNotNone(self.cache.leer("a"))
+        self.cache.max_bytes = 2 * os.path.getsize(os.path.join(self.directorio.name, "a.parquet"))
+        self.cache.guardar("c", self.df)
+        self.assertEqual(self._entradas(), {"a", "c"})
+
+    def test_limpiar(self):
+        self.cache.guardar("a", self.df)
+        self.cache.limpiar()
+        self.assertEqual(self._entradas(), set())
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+# tests/test_cache_resultados_integracion.py
+#
+# Prueba de integración: necesita la base de datos del .env con el esquema estrella, las migraciones
+# v2_04 y v2_05 y datos de ventas. Modifica una venta (y la restaura al terminar), así que solo corre
+# si se pide explícitamente; úsese solo con una base de pruebas:
+#   PRUEBAS_INTEGRACION_BD=1 python -m unittest discover -s tests
+
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import tempfile
+import unittest
+from src import cache_resultados, database
+from src.analysis import obtener_ventas_por_mes
+from src.resumenes import refrescar_resumenes
+
+VENTA_DE_PRUEBA_SQL = """
+SELECT venta_id, EXTRACT(YEAR FROM fecha)::INTEGER, EXTRACT(MONTH FROM fecha)::INTEGER
+FROM hechos_ventas
+ORDER BY venta_id
+LIMIT 1;
+"""
+SUMAR_TOTAL_VENTA_SQL = "UPDATE hechos_ventas SET total_venta = total_venta + %s WHERE venta_id = %s;"
+
+def _ejecutar(sql_query: str, params: tuple = None) -> list | None:
+    with database.get_pooled_connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute(sql_query, params)
+            filas = cursor.fetchall() if cursor.description else None
+        conn.commit()
+        return filas
+
+@unittest.skipUnless(os.getenv("PRUEBAS_INTEGRACION_BD") == "1",
+                     "Modifica la base de datos del .env; definir PRUEBAS_INTEGRACION_BD=1 para ejecutarla.")
+class CacheResultadosConHechosModificadosTest(unittest.TestCase):
+    """
+    Una consulta anual servida desde la caché debe cambiar cuando se modifica un hecho ya resumido:
+    el UPDATE cambia version_datos (la clave de la caché) y el refresco recalcula el mes del resumen.
+    """
+
+    DIFERENCIA = 1000
+
+    @classmethod
+    def setUpClass(cls):
+        if not database.test_connection():
+            raise unittest.SkipTest("No hay conexión a la base de datos.")
+        filas = _ejecutar(VENTA_DE_PRUEBA_SQL)
+        if not filas:
+            raise unittest.SkipTest("hechos_ventas no tiene datos.")
+        cls.venta_id, cls.year, cls.mes = filas[0]
+
+    def setUp(self):
+        self.directorio = tempfile.TemporaryDirectory()
+        cache_resultados.activar(self.directorio.name, max_mb=16)
+        self.modificada = False
+        self.assertTrue(refrescar_resumenes())
+
+    def tearDown(self):
+        if self.modificada:
+            _ejecutar(SUMAR_TOTAL_VENTA_SQL, (-self.DIFERENCIA, self.venta_id))
+            refrescar_resumenes()
+        cache_resultados.desactivar()
+        self.directorio.cleanup()
+
+    def _ventas_del_mes(self) -> float:
+        df = obtener_ventas_por_mes(self.year)
+        self.assertIsNotNone(df)
+        return float(df.loc[df['mes'] == self.mes, 'ventas_totales'].sum())
+
+    def test_update_de_un_hecho_cambia_el_resultado_cacheado(self):
+        antes = self._ventas_del_mes()
+        self.assertEqual(self._ventas_del_mes(), antes)
+        self.assertGreaterEqual(cache_resultados.cache_activa().aciertos, 1)
+
+        _ejecutar(SUMAR_TOTAL_VENTA_SQL, (self.DIFERENCIA, self.venta_id))
+        self.modificada = True
+        self.assertTrue(refrescar_resumenes())
+
+        self.assertAlmostEqual(self._ventas_del_mes(), antes + self.DIFERENCIA, places=2)
+
+if __name__ == "__main__":
+    unittest.main()
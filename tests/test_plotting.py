@@ -0,0 +1,60 @@
+# tests/test_plotting.py
+#
+# Pruebas de la reducción de series de src/plotting.py; no usan la base de datos.
+#   python -m unittest discover -s tests
+
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import unittest
+import numpy as np
+from src.plotting import reducir_lttb
+
+class ReducirLttbTest(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.x = np.arange(1000, dtype=np.int64)
+        self.y = np.cumsum(rng.normal(size=1000))
+
+    def _indices(self, x_reducido: np.ndarray) -> np.ndarray:
+        return np.searchsorted(self.x, x_reducido)
+
+    def test_conserva_extremos_y_orden(self):
+        x, y = reducir_lttb(self.x, self.y, 50)
+        self.assertEqual(len(x), 50)
+        self.assertEqual(len(y), 50)
+        self.assertEqual((x[0], x[-1]), (self.x[0], self.x[-1]))
+        self.assertEqual((y[0], y[-1]), (self.y[0], self.y[-1]))
+        self.assertTrue(np.all(np.diff(self._indices(x)) > 0))
+        np.testing.assert_array_equal(y, self.y[self._indices(x)])
+
+    def test_conserva_un_pico_aislado(self):
+        y = np.zeros(1000)
+        y[537] = 100.0
+        x, y_reducido = reducir_lttb(self.x, y, 20)
+        self.assertIn(537, x)
+        self.assertEqual(y_reducido.max(), 100.0)
+
+    def test_fechas(self):
+        x = np.arange('2024-01-01', '2025-01-01', dtype='datetime64[D]')
+        y = np.sin(np.linspace(0, 12, len(x)))
+        x_reducido, y_reducido = reducir_lttb(x, y, 30)
+        self.assertEqual(x_reducido.dtype, x.dtype)
+        self.assertEqual(len(x_reducido), 30)
+        self.assertEqual((x_reducido[0], x_reducido[-1]), (x[0], x[-1]))
+        self.assertTrue(np.all(np.diff(x_reducido) > np.timedelta64(0, 'D')))
+
+    def test_series_cortas_o_limite_menor_a_tres_no_cambian(self):
+        x_corta, y_corta = self.x[:40], self.y[:40]
+        x, y = reducir_lttb(x_corta, y_corta, 40)
+        self.assertIs(x, x_corta)
+        self.assertIs(y, y_corta)
+        for max_puntos in (0, 2):
+            x, y = reducir_lttb(self.x, self.y, max_puntos)
+            self.assertIs(x, self.x)
+            self.assertIs(y, self.y)
+
+if __name__ == "__main__":
+    unittest.main()